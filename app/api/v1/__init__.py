@@ -1,9 +1,11 @@
 from .routes import router as api_router
 from .auth import router as auth_router
+from .profiles import router as profiles_router
 from fastapi import APIRouter
 
 router = APIRouter()
 router.include_router(api_router)
 router.include_router(auth_router, prefix="/auth")
+router.include_router(profiles_router, prefix="/profiles")
 
 __all__ = ["router"]
@@ -1,12 +1,13 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from app.models.api import UserCreate, UserLogin, User, Token, TokenRefresh
 from app.services.auth.user_service import UserService
+from app.services.auth.session_service import SessionService
 from app.core.auth import create_access_token, create_refresh_token, verify_refresh_token
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.core.dependencies import get_user_service
+from app.core.dependencies import get_user_service, get_session_service
 
 # Create logger
 logger = get_logger(__name__)
@@ -46,16 +47,20 @@ async def register(
 @router.post("/login", response_model=TokenRefresh, tags=["auth"])
 async def login(
     user_data: UserLogin,
-    user_service: UserService = Depends(get_user_service)
+    user_service: UserService = Depends(get_user_service),
+    session_service: SessionService = Depends(get_session_service)
 ) -> TokenRefresh:
     """
     Login user and return JWT token.
     
+    Each login starts its own session, so signing in on another device does
+    not sign out the first one.
+    
     Args:
-        user_data: User login credentials (email and password)
+        user_data: User login credentials (email, password and optional device label)
         
     Returns:
-        Token: JWT access token
+        Token: JWT access token and refresh token
     """
     logger.info("User login attempt", email=user_data.email)
     
@@ -70,7 +75,7 @@ async def login(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "tier": user.tier}, expires_delta=access_token_expires
     )
 
     refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -78,10 +83,11 @@ async def login(
         data={"sub": user.email}, expires_delta=refresh_token_expires
     )
 
-    user.refresh_token = refresh_token
-    await user_service.update_user(user.id, user)
+    await session_service.create_session(
+        user.id, refresh_token, datetime.now(timezone.utc) + refresh_token_expires, device=user_data.device
+    )
     
-    logger.info("User logged in successfully", user_id=user.id, email=user.email)
+    logger.info("User logged in successfully", user_id=user.id, email=user.email, device=user_data.device)
     return TokenRefresh(access_token=access_token, refresh_token=refresh_token, token_type="bearer", expires_in=access_token_expires.total_seconds())
 
 
@@ -112,28 +118,31 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "tier": user.tier}, expires_delta=access_token_expires
     )
     
     logger.info("OAuth2 token issued successfully", user_id=user.id, email=user.email)
     return Token(access_token=access_token, token_type="bearer", expires_in=access_token_expires.total_seconds())
 
 
-@router.post("/refresh_token", response_model=Token, tags=["auth"])
+@router.post("/refresh_token", response_model=TokenRefresh, tags=["auth"])
 async def refresh_token(
     refresh_token: str,
-    user_service: UserService = Depends(get_user_service)
-) -> Token:
+    session_service: SessionService = Depends(get_session_service)
+) -> TokenRefresh:
     """
     Refresh JWT access token using a refresh token.
     
+    The refresh token is rotated: a new one is returned and the presented one
+    can no longer be used.
+    
     Args:
         refresh_token: Refresh token
         
     Returns:
-        Token: JWT access token
+        Token: JWT access token and rotated refresh token
     """
-    logger.info("Refresh token request", refresh_token=refresh_token)
+    logger.info("Refresh token request")
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,18 +151,56 @@ async def refresh_token(
     )
 
     token_data = verify_refresh_token(refresh_token, credentials_exception)
-    user = await user_service.get_user_by_email(email=token_data.email)
-    if not user:
-        logger.warning("Refresh token failed - invalid credentials", email=token_data.email)
-        raise credentials_exception
-    if user.refresh_token != refresh_token:
+    session = await session_service.get_active_session(refresh_token)
+    if session is None or session.email != token_data.email:
         logger.warning("Refresh token failed - invalid refresh token", email=token_data.email)
         raise credentials_exception
+
+    refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    new_refresh_token = create_refresh_token(
+        data={"sub": session.email}, expires_delta=refresh_token_expires
+    )
+    rotated = await session_service.rotate_session(
+        session.id, refresh_token, new_refresh_token, datetime.now(timezone.utc) + refresh_token_expires
+    )
+    if not rotated:
+        logger.warning("Refresh token failed - refresh token already used", email=token_data.email)
+        raise credentials_exception
         
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": session.email, "uid": session.user_id, "tier": session.tier}, expires_delta=access_token_expires
     )
 
-    logger.info("Refreshed access token issued successfully", user_id=user.id, email=user.email)
-    return Token(access_token=access_token, token_type="bearer", expires_in=access_token_expires.total_seconds())
+    logger.info("Refreshed access token issued successfully", user_id=session.user_id, email=session.email, session_id=session.id)
+    return TokenRefresh(access_token=access_token, refresh_token=new_refresh_token, token_type="bearer", expires_in=access_token_expires.total_seconds())
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, tags=["auth"])
+async def logout(
+    refresh_token: str,
+    session_service: SessionService = Depends(get_session_service)
+) -> None:
+    """
+    Log out the session of a refresh token.
+    
+    The refresh token stops working, and so does every access token of the
+    user issued so far; the user's other devices stay signed in and get a new
+    access token on their next refresh. Logging out a session that has already
+    ended succeeds.
+    
+    Args:
+        refresh_token: Refresh token of the session to end
+    """
+    logger.info("Logout request")
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token_data = verify_refresh_token(refresh_token, credentials_exception)
+    revoked = await session_service.revoke_session(refresh_token)
+
+    logger.info("User logged out", email=token_data.email, revoked=revoked)
@@ -0,0 +1,116 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response, status
+
+from app.models.api import Profile, StoredProfile, User
+from app.core.dependencies import get_current_active_user, get_profile_service
+from app.core.logging import get_logger
+from app.services.profiles.profile_service import ProfileConflictError, ProfileService, etag_matches
+
+# Create logger
+logger = get_logger(__name__)
+
+# Create router
+router = APIRouter()
+
+# Longest profile ID that can be stored
+PROFILE_ID_MAX_LENGTH = 64
+
+
+@router.get(
+    "/{profile_id}",
+    response_model=StoredProfile,
+    tags=["profiles"],
+    responses={304: {"description": "Profile unchanged since the ETag in If-None-Match"}},
+)
+async def get_profile(
+    response: Response,
+    profile_id: str = Path(..., max_length=PROFILE_ID_MAX_LENGTH),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    profile_service: ProfileService = Depends(get_profile_service)
+):
+    """
+    Get a stored profile.
+    
+    Args:
+        profile_id: Profile ID
+        if_none_match: ETag of the copy the client already has
+        
+    Returns:
+        StoredProfile: The profile with its version and ETag, or an empty
+        304 response if the client's copy is current
+    """
+    profile = await profile_service.get_profile(current_user.id, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    
+    if etag_matches(if_none_match, profile):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": profile.etag})
+    
+    response.headers["ETag"] = profile.etag
+    return profile
+
+
+@router.put(
+    "/{profile_id}",
+    response_model=StoredProfile,
+    tags=["profiles"],
+    responses={201: {"model": StoredProfile, "description": "Profile created"}},
+)
+async def put_profile(
+    profile: Profile,
+    response: Response,
+    profile_id: str = Path(..., max_length=PROFILE_ID_MAX_LENGTH),
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    profile_service: ProfileService = Depends(get_profile_service)
+) -> StoredProfile:
+    """
+    Create or replace a stored profile.
+    
+    The system prompt is compiled once here, so rewrites that reference the
+    profile by ID neither send nor validate it again.
+    
+    Args:
+        profile: Profile to store; its ID must match the path
+        profile_id: Profile ID
+        if_match: Optional ETag the current version must have
+        
+    Returns:
+        StoredProfile: The stored profile with its version and ETag
+    """
+    if profile.id != profile_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Profile ID does not match the URL")
+    
+    try:
+        stored, created = await profile_service.put_profile(current_user.id, profile, if_match)
+    except ProfileConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    
+    response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    response.headers["ETag"] = stored.etag
+    return stored
+
+
+@router.delete("/{profile_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["profiles"])
+async def delete_profile(
+    profile_id: str = Path(..., max_length=PROFILE_ID_MAX_LENGTH),
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    profile_service: ProfileService = Depends(get_profile_service)
+) -> Response:
+    """
+    Delete a stored profile.
+    
+    Args:
+        profile_id: Profile ID
+        if_match: Optional ETag the current version must have
+    """
+    try:
+        deleted = await profile_service.delete_profile(current_user.id, profile_id, if_match)
+    except ProfileConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
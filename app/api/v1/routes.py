@@ -1,22 +1,41 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
+import asyncio
 import time
 import tempfile
 import os
+import shutil
 from pathlib import Path
 
 from app.models.api import (
     HealthResponse,
     TranscribeResponse,
+    TranscribeErrorEvent,
+    TranscribeFinalEvent,
     RewriteRequest,
     RewriteResponse,
     UsageMetrics,
+    UsageEvent,
+    UsageSummaryResponse,
+    UsageTotals,
+    DailyUsageResponse,
     User
 )
 from app.core.logging import get_logger
-from app.core.dependencies import get_current_active_user
+from app.core.database import db_health
+from app.core.deadline import DeadlineExceeded
+from app.core.dependencies import get_current_active_user, get_profile_service, get_usage_service
+from app.core.rate_limit import charge_usage, estimate_tokens
+from app.core.tracing import tracer
+from app.core.upload_limits import upload_limits
 from app.services.llm.factory import get_llm_provider
+from app.services.llm.prompts import build_system_prompt
+from app.services.profiles.profile_service import ProfileService
+from app.services.stt.audio import AudioProbeError, AudioTooLongError, estimated_duration_seconds, probe_audio
 from app.services.stt.factory import get_stt_provider
+from app.services.usage.usage_service import UsageService, usage_recorder
 
 # Create logger
 logger = get_logger(__name__)
@@ -24,6 +43,12 @@ logger = get_logger(__name__)
 # Create router
 router = APIRouter()
 
+# Media type for streamed transcription events
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Period covered by the usage endpoints when no start is given
+USAGE_DEFAULT_PERIOD_DAYS = 30
+
 
 @router.get("/health", response_model=HealthResponse, tags=["health"])
 async def health_check() -> HealthResponse:
@@ -31,69 +56,159 @@ async def health_check() -> HealthResponse:
     Health check endpoint.
     
     Returns:
-        HealthResponse: A simple response indicating the service is running.
+        HealthResponse: A simple response indicating the service is running,
+        with the database state reported by the background health monitor.
     """
     logger.info("Health check requested")
-    return HealthResponse(status="ok")
+    return HealthResponse(status="ok", database="ok" if db_health.available else "unavailable")
 
 
-@router.post("/transcribe", response_model=TranscribeResponse, tags=["transcribe"])
+@router.post(
+    "/transcribe",
+    response_model=TranscribeResponse,
+    tags=["transcribe"],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
 async def transcribe_audio(
     audio: UploadFile = File(...),
     language: Optional[str] = Form(None),
+    stream: bool = Form(False),
     current_user: User = Depends(get_current_active_user)
-) -> TranscribeResponse:
+):
     """
     Transcribe audio to text using OpenAI Whisper API.
     
     Args:
         audio: Audio file to transcribe
         language: Optional language hint
+        stream: Stream NDJSON segment events as they are decoded
         
     Returns:
-        TranscribeResponse: The transcribed text
+        TranscribeResponse: The transcribed text, or a StreamingResponse of
+        NDJSON segment events ending with a final event when streaming
     """
-    logger.info("Transcribe request received", filename=audio.filename, language=language, user_id=current_user.id)
+    logger.info("Transcribe request received", filename=audio.filename, language=language, stream=stream, user_id=current_user.id)
     
     # Validate audio file
     if not audio.filename:
         raise HTTPException(status_code=400, detail="Audio file is required")
     
+    # Reject oversized and overlong uploads from the container header, before
+    # anything is copied or decoded
+    upload_limits.check_size(current_user.tier, audio.size)
+    with tracer.span("transcribe.probe_audio"):
+        try:
+            audio_info = await asyncio.to_thread(probe_audio, audio.file)
+        except AudioProbeError as e:
+            raise upload_limits.reject("unsupported_media", f"Unsupported audio file: {e}", status_code=415)
+    audio_seconds = estimated_duration_seconds(audio_info, audio.size or 0)
+    logger.info(
+        "Audio probed",
+        audio_seconds=round(audio_seconds, 1),
+        codec=audio_info.codec,
+        sample_rate=audio_info.sample_rate,
+        channels=audio_info.channels,
+    )
+    upload_limits.check_audio_seconds(current_user.tier, audio_seconds)
+    max_audio_seconds = upload_limits.max_audio_seconds(current_user.tier)
+    
+    # Charge the audio length against the user's transcription budget
+    await charge_usage(audio_seconds)
+    
     # Save audio to temporary file
     with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio.filename)[1]) as temp_file:
         temp_path = Path(temp_file.name)
         try:
-            # Write audio data to temporary file
-            content = await audio.read()
-            temp_file.write(content)
-            temp_file.flush()
+            # Copy the spooled upload in chunks rather than reading it into memory
+            with tracer.span("transcribe.write_temp_file", bytes=audio.size):
+                await asyncio.to_thread(_copy_upload, audio.file, temp_file)
             
-            # Transcribe audio
             stt_provider = get_stt_provider()
-            text, stt_ms = await stt_provider.transcribe(temp_path, language)
+            
+            if stream:
+                # The stream owns the temporary file from here on
+                response = StreamingResponse(
+                    _stream_transcription(
+                        stt_provider, temp_path, language, current_user, audio_seconds, max_audio_seconds
+                    ),
+                    media_type=NDJSON_MEDIA_TYPE,
+                )
+                temp_path = None
+                return response
+            
+            # Transcribe audio
+            text, stt_ms = await stt_provider.transcribe(
+                temp_path, language, audio_seconds=audio_seconds, max_audio_seconds=max_audio_seconds
+            )
+            _record_usage(current_user, "transcribe", stt_ms=stt_ms, audio_seconds=audio_seconds)
             
             return TranscribeResponse(text=text)
         
+        except HTTPException:
+            raise
+        except AudioTooLongError as e:
+            raise upload_limits.reject("audio_seconds", str(e))
+        except DeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Transcription did not finish within the request deadline")
         except Exception as e:
             logger.exception("Error transcribing audio", error=str(e))
             raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
         
         finally:
             # Clean up temporary file
-            if temp_path.exists():
+            if temp_path is not None and temp_path.exists():
                 os.unlink(temp_path)
 
 
+def _copy_upload(source, destination) -> None:
+    """Copy an uploaded file to an open file from its start."""
+    source.seek(0)
+    shutil.copyfileobj(source, destination)
+    destination.flush()
+
+
+async def _stream_transcription(
+    stt_provider,
+    temp_path: Path,
+    language: Optional[str],
+    user: User,
+    audio_seconds: float,
+    max_audio_seconds: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield NDJSON lines for each transcription event and remove the temporary file.
+    
+    Errors after the response has started cannot change the status code, so they
+    are reported as a final error event instead.
+    """
+    try:
+        events = stt_provider.transcribe_stream(
+            temp_path, language, audio_seconds=audio_seconds, max_audio_seconds=max_audio_seconds
+        )
+        async for event in events:
+            if isinstance(event, TranscribeFinalEvent):
+                _record_usage(user, "transcribe", stt_ms=event.stt_ms, audio_seconds=audio_seconds)
+            yield event.model_dump_json() + "\n"
+    except Exception as e:
+        logger.exception("Error streaming transcription", error=str(e))
+        yield TranscribeErrorEvent(detail=f"Error transcribing audio: {str(e)}").model_dump_json() + "\n"
+    finally:
+        if temp_path.exists():
+            os.unlink(temp_path)
+
+
 @router.post("/rewrite", response_model=RewriteResponse, tags=["rewrite"])
 async def rewrite_text(
     request: RewriteRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    profile_service: ProfileService = Depends(get_profile_service)
 ) -> RewriteResponse:
     """
     Rewrite text using the configured LLM provider.
     
     Args:
-        request: RewriteRequest containing transcript, profile, and options
+        request: RewriteRequest containing transcript, an inline profile or
+            the ID of a stored one, and options
         
     Returns:
         RewriteResponse: The rewritten text and usage metrics
@@ -102,8 +217,8 @@ async def rewrite_text(
     
     logger.info(
         "Rewrite request received",
-        profile_id=request.profile.id,
-        profile_name=request.profile.name,
+        profile_id=request.profile.id if request.profile else request.profile_id,
+        stored_profile=request.profile is None,
         transcript_length=len(request.transcript) if request.transcript else 0,
         user_id=current_user.id
     )
@@ -112,15 +227,37 @@ async def rewrite_text(
     if not request.transcript:
         raise HTTPException(status_code=400, detail="Transcript is required")
     
+    if request.profile is not None:
+        profile = request.profile
+        profile_tokens = estimate_tokens(profile.model_dump_json())
+    else:
+        profile = await profile_service.get_profile(current_user.id, request.profile_id, request.profile_version)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        if request.profile_version is not None and request.profile_version != profile.version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Profile is at version {profile.version}, not {request.profile_version}",
+            )
+        # The compiled prompt is what is sent to the LLM
+        profile_tokens = estimate_tokens(build_system_prompt(profile))
+    
+    # Charge the prompt plus an output of similar length against the user's token budget
+    estimated_tokens = 2 * estimate_tokens(request.transcript) + profile_tokens
+    await charge_usage(estimated_tokens)
+    
     try:
         # Get LLM provider
-        llm_provider = get_llm_provider()
+        llm_provider = get_llm_provider(
+            request.options.provider_hint if request.options else None, profile.rewrite_mode
+        )
         
         # Rewrite text
         rewritten_text, llm_ms = await llm_provider.rewrite(
             transcript=request.transcript,
-            profile=request.profile,
-            options=request.options
+            profile=profile,
+            options=request.options,
+            user=current_user
         )
         
         # Create usage metrics
@@ -128,15 +265,91 @@ async def rewrite_text(
             stt_ms=0,  # No STT used in this endpoint
             llm_ms=llm_ms
         )
+        _record_usage(current_user, "rewrite", llm_ms=llm_ms, estimated_tokens=estimated_tokens)
         
         return RewriteResponse(
             draft=rewritten_text,
             usage=usage
         )
         
+    except HTTPException:
+        raise
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Rewrite did not finish within the request deadline")
     except ValueError as e:
         logger.exception("Value error in rewrite", error=str(e))
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception("Error in rewrite", error=str(e))
         raise HTTPException(status_code=500, detail=f"Error rewriting text: {str(e)}")
+
+
+@router.get("/usage", response_model=UsageSummaryResponse, tags=["usage"])
+async def get_usage(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user),
+    usage_service: UsageService = Depends(get_usage_service)
+) -> UsageSummaryResponse:
+    """
+    Get the current user's usage per endpoint.
+    
+    Args:
+        start: Start of the period (inclusive), defaults to 30 days before end
+        end: End of the period (exclusive), defaults to now
+        
+    Returns:
+        UsageSummaryResponse: Totals for the period and per endpoint
+    """
+    start, end = _usage_period(start, end)
+    endpoints = await usage_service.get_usage_by_endpoint(current_user.id, start, end)
+    total = UsageTotals(
+        requests=sum(e.requests for e in endpoints),
+        stt_ms=sum(e.stt_ms for e in endpoints),
+        llm_ms=sum(e.llm_ms for e in endpoints),
+        audio_seconds=sum(e.audio_seconds for e in endpoints),
+        estimated_tokens=sum(e.estimated_tokens for e in endpoints),
+    )
+    return UsageSummaryResponse(start=start, end=end, total=total, endpoints=endpoints)
+
+
+@router.get("/usage/daily", response_model=DailyUsageResponse, tags=["usage"])
+async def get_daily_usage(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user),
+    usage_service: UsageService = Depends(get_usage_service)
+) -> DailyUsageResponse:
+    """
+    Get the current user's usage per day.
+    
+    Args:
+        start: Start of the period (inclusive), defaults to 30 days before end
+        end: End of the period (exclusive), defaults to now
+        
+    Returns:
+        DailyUsageResponse: Totals for each day with usage
+    """
+    start, end = _usage_period(start, end)
+    days = await usage_service.get_daily_usage(current_user.id, start, end)
+    return DailyUsageResponse(start=start, end=end, days=days)
+
+
+def _usage_period(start: Optional[datetime], end: Optional[datetime]):
+    """Resolve the default usage period, treating naive times as UTC, and reject inverted ones."""
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=USAGE_DEFAULT_PERIOD_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _record_usage(user: User, endpoint: str, **usage) -> None:
+    """Buffer a usage event for the write-behind recorder."""
+    usage_recorder.record(
+        UsageEvent(user_id=user.id, endpoint=endpoint, occurred_at=datetime.now(timezone.utc), **usage)
+    )
@@ -1,14 +1,22 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException
+from fastapi import HTTPException, status
 from app.models.api.schemas import TokenData
 from app.core.config import settings
+from app.core.metrics import MetricsRegistry, registry
+from app.core.token_cache import token_cache
 from fastapi.security import OAuth2PasswordBearer
+from starlette.types import Scope
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; hashes with a different cost are flagged for update
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
 # JWT settings
@@ -25,6 +33,99 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHashExecutor:
+    """
+    Bounded thread pool for bcrypt so hashing never blocks the event loop.
+
+    At most ``max_workers`` hashes run at once and at most ``max_queue`` wait
+    for a worker; further requests are rejected with a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, metrics: Optional[MetricsRegistry] = None):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._max_workers = max_workers
+        self._max_pending = max_workers + max_queue
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+        self._queued = metrics.gauge("password_hash_queued", "Password hash operations waiting for a worker")
+        self._in_flight = metrics.gauge("password_hash_in_flight", "Password hash operations running")
+        self._queue_wait = metrics.gauge("password_hash_queue_wait_seconds", "Queue wait of the most recent password hash operation")
+        self._queue_wait_total = metrics.counter("password_hash_queue_wait_seconds_total", "Total time password hash operations waited for a worker")
+        self._operations = metrics.counter("password_hash_operations_total", "Password hash operations run")
+        self._rejected = metrics.counter("password_hash_rejected_total", "Password hash operations rejected because the queue was full")
+        self._queue_wait_histogram = metrics.histogram(
+            "queue_wait_seconds", "Time spent waiting for a worker or resource", labelnames=("queue",)
+        ).labels("password_hash")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a password hashing function on the bounded pool.
+
+        Raises:
+            HTTPException: 503 if the queue is full
+        """
+        if self._pending >= self._max_pending:
+            self._rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="SayWrite is busy. Please try again later.",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        self._update_gauges()
+        submitted = time.perf_counter()
+
+        def timed() -> Any:
+            wait = time.perf_counter() - submitted
+            self._queue_wait.set(wait)
+            self._queue_wait_total.inc(wait)
+            self._queue_wait_histogram.observe(wait)
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._pending -= 1
+            self._operations.inc()
+            self._update_gauges()
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _update_gauges(self) -> None:
+        self._in_flight.set(min(self._pending, self._max_workers))
+        self._queued.set(max(self._pending - self._max_workers, 0))
+
+
+# Create a singleton instance
+password_hasher = PasswordHashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    metrics=registry,
+)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop."""
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop.
+
+    Returns:
+        Tuple of whether the password matched and, if PASSWORD_REHASH_ON_LOGIN
+        is enabled and the stored hash uses an outdated cost, a replacement hash
+    """
+    if settings.PASSWORD_REHASH_ON_LOGIN:
+        return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password), None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -33,7 +134,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # A fractional issue time orders tokens against revocations in the same second
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -46,24 +148,65 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode.update({"exp": expire})
+    # A unique ID keeps tokens issued in the same second distinct per session
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.REFRESH_SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and indexed lookup."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def verify_token(token: str, credentials_exception: HTTPException) -> TokenData:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token, reusing cached verifications."""
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or token_cache.is_revoked(email, payload.get("iat")):
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(email=email, tier=payload.get("tier"), user_id=payload.get("uid"))
+        token_cache.put(token, token_data, payload.get("exp"))
         return token_data
     except JWTError:
         raise credentials_exception
 
 
+def authenticated_token(scope: Scope) -> Optional[TokenData]:
+    """
+    Get the token data of a request with a valid bearer token.
+
+    For middleware that needs the user before the authentication dependency
+    runs; verifications go through the token cache.
+
+    Args:
+        scope: ASGI connection scope
+
+    Returns:
+        The token data, or None if the request has no valid bearer token
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not credentials:
+                return None
+            try:
+                return verify_token(credentials, HTTPException(status_code=status.HTTP_401_UNAUTHORIZED))
+            except HTTPException:
+                return None
+    return None
+
+
+def authenticated_subject(scope: Scope) -> Optional[str]:
+    """Get the token subject of a request with a valid bearer token, or None."""
+    token_data = authenticated_token(scope)
+    return token_data.email if token_data is not None else None
+
+
 def verify_refresh_token(token: str, credentials_exception: HTTPException) -> TokenData:
     """Verify and decode a JWT refresh token."""
     try:
@@ -1,15 +1,108 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import event
+from sqlalchemy import event, make_url
 from sqlalchemy import Boolean, Column, DateTime, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from datetime import datetime, timezone
 from sqlalchemy.ext.declarative import as_declarative
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import registry
+
+# Create logger
+logger = get_logger(__name__)
+
+# Pool metrics
+pool_in_use = registry.gauge("db_pool_in_use", "Pooled connections currently checked out")
+pool_checkout_wait = registry.gauge("db_pool_checkout_wait_seconds", "Checkout wait of the most recent pooled connection")
+pool_checkout_wait_total = registry.counter("db_pool_checkout_wait_seconds_total", "Total time spent waiting for pooled connections")
+pool_checkouts = registry.counter("db_pool_checkouts_total", "Pooled connection checkouts")
+pool_timeouts = registry.counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a pooled connection")
+pool_queue_wait = registry.histogram("queue_wait_seconds", "Time spent waiting for a worker or resource", labelnames=("queue",)).labels("db_pool")
+query_duration = registry.histogram("db_query_duration_seconds", "Time to execute a database statement")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long callers wait for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            pool_checkout_wait.set(wait)
+            pool_checkout_wait_total.inc(wait)
+            pool_queue_wait.observe(wait)
+            pool_checkouts.inc()
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Build create_async_engine options for the configured database.
+
+    Args:
+        database_url: SQLAlchemy database URL
+
+    Returns:
+        Keyword arguments for create_async_engine
+    """
+    url = make_url(database_url)
+    # Stale pooled connections are detected at checkout
+    options: Dict[str, Any] = {"echo": settings.DEBUG, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    # In-memory SQLite uses a single static connection
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+    if url.get_driver_name() == "asyncpg":
+        # Set to 0 behind transaction-pooling proxies such as PgBouncer
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
 
 # Create async engine
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_in_use.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_in_use.dec()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _on_before_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _on_after_execute(conn, cursor, statement, parameters, context, executemany):
+    query_duration.observe(time.perf_counter() - context.query_start)
 
 # Create async session factory
 async_session = sessionmaker(
@@ -32,40 +125,112 @@ class BaseModel:
 event.listen(BaseModel, 'before_delete', BaseModel.soft_delete)
 
 
+class DatabaseHealthMonitor:
+    """Background task that periodically checks database connectivity."""
+
+    def __init__(self, interval_seconds: float):
+        self.available = True
+        self._interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._gauge = registry.gauge("db_available", "1 if the last database health check succeeded, else 0")
+        self._gauge.set(1)
+
+    async def check(self) -> bool:
+        """Run a single connectivity check and record the result."""
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        except Exception as e:
+            if self.available:
+                logger.warning("Database health check failed", error=str(e))
+            self._set_available(False)
+        else:
+            if not self.available:
+                logger.info("Database connectivity restored")
+            self._set_available(True)
+        return self.available
+
+    def mark_unavailable(self) -> None:
+        """Record a connectivity failure observed while serving a request."""
+        self._set_available(False)
+
+    def start(self) -> None:
+        """Start the periodic health check."""
+        if self._task is None and self._interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic health check."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self._interval_seconds)
+
+    def _set_available(self, available: bool) -> None:
+        self.available = available
+        self._gauge.set(1 if available else 0)
+
+
+# Create a singleton instance
+db_health = DatabaseHealthMonitor(interval_seconds=settings.DB_HEALTH_CHECK_INTERVAL_SECONDS)
+
+
+def is_connectivity_error(error: BaseException) -> bool:
+    """Return True if the error means the database could not be reached."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError, TimeoutError))
+
+
 async def init_db():
     """Initialize database connection"""
     # Alembic migrations handle table creation
-    pass
+    db_health.start()
 
 
 async def close_db():
     """Close database connection"""
+    await db_health.stop()
     await engine.dispose()
 
 
 # Dependency to get DB session
 async def get_db():
     """
-    Dependency function that yields db sessions
+    Dependency function that yields db sessions.
+
+    Sessions are lazy: a pooled connection is only checked out when the handler
+    first executes a statement, and the pool pre-pings it at checkout. Handlers
+    that never touch the session cost no database round trips; ones that do pay
+    the pre-ping on top of their statements, as they paid the old SELECT 1
+    probe. Connectivity failures and pool exhaustion surface as a clean 503.
     """
     async with async_session() as session:
-        # Proactively verify DB connectivity to fail fast with a clean 503
         try:
-            await session.execute(text("SELECT 1"))
+            yield session
+            if session.in_transaction():
+                await session.commit()
         except Exception as e:
             # Ensure no transaction state is left dangling
-            try:
-                await session.rollback()
-            except Exception:
-                pass
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="SayWrite is unavailable. Please try again later.",
-            ) from e
-
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
+            if session.in_transaction():
+                try:
+                    await session.rollback()
+                except Exception:
+                    pass
+            if isinstance(e, PoolTimeoutError) or is_connectivity_error(e):
+                # An exhausted pool is an overload, not an outage
+                if not isinstance(e, PoolTimeoutError):
+                    db_health.mark_unavailable()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="SayWrite is unavailable. Please try again later.",
+                ) from e
             raise
@@ -0,0 +1,182 @@
+"""
+End-to-end request deadlines.
+
+Each request to a configured endpoint gets a deadline: the endpoint's default
+budget, shortened by the client with an ``X-Request-Timeout`` header (seconds).
+The budget starts once the request body has been received, so a slow upload
+does not use up the time meant for the providers. The deadline is held in a
+context variable, so provider calls anywhere below the handler can size their
+timeouts and retries to the time that is left instead of holding a worker past
+the point where the client has given up.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Header a client sends to shorten the request's budget, in seconds
+REQUEST_TIMEOUT_HEADER = "x-request-timeout"
+
+class _Deadline:
+    """Absolute deadline on the monotonic clock, or None until its clock starts."""
+
+    __slots__ = ("at",)
+
+    def __init__(self, at: Optional[float]):
+        self.at = at
+
+
+# Deadline of the current request; a mutable holder, so starting its clock later
+# is seen by every context copied from the request's
+_deadline: ContextVar[Optional[_Deadline]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of its time budget."""
+
+
+def remaining() -> Optional[float]:
+    """
+    Get the time left before the current request's deadline.
+
+    Returns:
+        Seconds left, at most 0, or None if the request has no deadline or
+        its clock has not started
+    """
+    deadline = _deadline.get()
+    if deadline is None or deadline.at is None:
+        return None
+    return max(0.0, deadline.at - time.monotonic())
+
+
+def bounded_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Cap a timeout to the time left before the deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+def deadline_headers() -> Dict[str, str]:
+    """Headers passing the time left on to an upstream call, if there is a deadline."""
+    left = remaining()
+    if left is None:
+        return {}
+    return {REQUEST_TIMEOUT_HEADER: f"{left:.3f}"}
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run a block with a deadline ``seconds`` from now.
+
+    An enclosing deadline that is earlier still applies.
+    """
+    if seconds is None:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and current.at is not None:
+        deadline = min(current.at, deadline)
+    token = _deadline.set(_Deadline(deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@asynccontextmanager
+async def within_deadline() -> AsyncIterator[None]:
+    """
+    Cancel the block when the current request's deadline passes.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the block finishes
+    """
+    left = remaining()
+    if left is None:
+        yield
+        return
+
+    scope = asyncio.timeout(left)
+    try:
+        async with scope:
+            yield
+    except TimeoutError as e:
+        # Only this scope's expiry is the deadline; other timeouts inside the block are not
+        if scope.expired():
+            raise DeadlineExceeded("Request deadline exceeded") from e
+        raise
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware giving requests to the configured paths a deadline.
+
+    A client may shorten an endpoint's default budget with
+    ``X-Request-Timeout`` but not extend it; an invalid value is a 400. The
+    budget starts when the last chunk of the request body is received.
+    """
+
+    def __init__(self, app: ASGIApp, defaults: Dict[str, float]):
+        """
+        Args:
+            app: ASGI application
+            defaults: Default budget in seconds by path
+        """
+        self.app = app
+        self.defaults = defaults
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.defaults:
+            await self.app(scope, receive, send)
+            return
+
+        budget = self.defaults[scope["path"]]
+        requested = _header(scope, REQUEST_TIMEOUT_HEADER.encode())
+        if requested is not None:
+            try:
+                seconds = float(requested)
+            except ValueError:
+                seconds = 0.0
+            if not seconds > 0:
+                response = JSONResponse(
+                    {"detail": "X-Request-Timeout must be a positive number of seconds"}, status_code=400
+                )
+                await response(scope, receive, send)
+                return
+            budget = min(budget, seconds)
+
+        deadline = _Deadline(None)
+
+        async def receive_starting_clock() -> Message:
+            message = await receive()
+            if deadline.at is None and not message.get("more_body", False):
+                deadline.at = time.monotonic() + budget
+            return message
+
+        token = _deadline.set(deadline)
+        try:
+            await self.app(scope, receive_starting_clock, send)
+        finally:
+            _deadline.reset(token)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
@@ -1,15 +1,28 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import verify_token
+from app.core.user_cache import user_cache
 from app.services.auth.user_service import UserService
+from app.services.auth.session_service import SessionService
+from app.services.usage.usage_service import UsageService
+from app.services.profiles.profile_service import ProfileService
 from app.repositories.user_repository import SQLAlchemyUserRepository
+from app.repositories.session_repository import SQLAlchemySessionRepository
+from app.repositories.usage_repository import SQLAlchemyUsageRepository
+from app.repositories.profile_repository import SQLAlchemyProfileRepository
 from app.core.database import get_db
+from app.core.metrics import registry
+from app.core.tracing import tracer
 from app.models.api.schemas import User
 
 # Security scheme
 security = HTTPBearer()
 
+# Time to resolve the bearer token to a user, including any user lookup
+auth_duration = registry.histogram("auth_duration_seconds", "Time to authenticate a request")
+
 
 def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     """Get user service with injected repository."""
@@ -17,6 +30,24 @@ def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     return UserService(user_repository)
 
 
+def get_session_service(db: AsyncSession = Depends(get_db)) -> SessionService:
+    """Get session service with injected repository."""
+    session_repository = SQLAlchemySessionRepository(db)
+    return SessionService(session_repository)
+
+
+def get_usage_service(db: AsyncSession = Depends(get_db)) -> UsageService:
+    """Get usage service with injected repository."""
+    usage_repository = SQLAlchemyUsageRepository(db)
+    return UsageService(usage_repository)
+
+
+def get_profile_service(db: AsyncSession = Depends(get_db)) -> ProfileService:
+    """Get profile service with injected repository."""
+    profile_repository = SQLAlchemyProfileRepository(db)
+    return ProfileService(profile_repository)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     user_service: UserService = Depends(get_user_service)
@@ -28,13 +59,25 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(credentials.credentials, credentials_exception)
-    user = await user_service.get_user_by_email(email=token_data.email)
-    
-    if user is None:
-        raise credentials_exception
-    
-    return user
+    start = time.perf_counter()
+    with tracer.span("auth.get_current_user") as span:
+        try:
+            token_data = verify_token(credentials.credentials, credentials_exception)
+            user = user_cache.get(token_data.email)
+            if span is not None:
+                span.set_attribute("user_cache.hit", user is not None)
+            if user is not None:
+                return user
+            
+            user = await user_service.get_user_by_email(email=token_data.email)
+            
+            if user is None:
+                raise credentials_exception
+            
+            user_cache.put(user)
+            return user
+        finally:
+            auth_duration.observe(time.perf_counter() - start)
 
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
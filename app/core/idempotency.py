@@ -0,0 +1,656 @@
+"""
+Idempotency keys for expensive endpoints.
+
+A client retrying a transcription or rewrite after a timeout or dropped
+connection sends the same ``Idempotency-Key`` header as the first attempt.
+``IdempotencyMiddleware`` runs the first request and stores its response per
+user and key for ``ttl_seconds``; a retry arriving while the first attempt is
+still running waits for it, and a later retry gets the stored response
+replayed with ``Idempotency-Replayed: true`` instead of running, and paying
+for, the model call again.
+
+A key is bound to the request it was first used with: reusing it for a
+different method, path or body is rejected with 422. Multipart forms are
+compared by their fields rather than their bytes, so a retry that rebuilds
+the form with a new boundary still matches. Responses are only stored when
+the outcome is final for that request, so a retry after a server error, rate
+limit rejection, conflict or streamed response runs again.
+"""
+import asyncio
+import hashlib
+import math
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import status
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import authenticated_subject
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.metrics import MetricsRegistry
+from app.models.db.idempotency import IdempotencyKeyModel
+
+IDEMPOTENCY_KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotency-replayed"
+MAX_KEY_LENGTH = 255
+
+# Request bodies are spooled in memory up to this size and on disk beyond it
+BODY_SPOOL_MEMORY_BYTES = 1024 * 1024
+# Size of the body chunks passed on to the app
+BODY_CHUNK_BYTES = 64 * 1024
+
+
+class StoredResponse(NamedTuple):
+    """A response kept for replay."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyRecord(NamedTuple):
+    """State of an idempotency key."""
+    fingerprint: str
+    # None while the first request is still running
+    response: Optional[StoredResponse]
+
+
+class IdempotencyStore(ABC):
+    """Abstract interface for idempotency key storage."""
+
+    @abstractmethod
+    async def reserve(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[IdempotencyRecord]:
+        """
+        Atomically claim a key for a request, unless it is already in use.
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Fingerprint of the request
+            lock_ttl: Seconds after which an unfinished claim lapses, in case
+                its holder died
+
+        Returns:
+            None if the key was claimed, otherwise the existing record
+        """
+        pass
+
+    @abstractmethod
+    async def complete(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        """Store the final record for a claimed key, keeping it for ``ttl`` seconds."""
+        pass
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Drop a claim without storing a response, so the request can be retried."""
+        pass
+
+    @abstractmethod
+    async def wait(self, key: str, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for a claimed key to be completed or released."""
+        pass
+
+
+class _Entry:
+    """A key held by ``InProcessIdempotencyStore``."""
+
+    __slots__ = ("record", "expires_at", "done")
+
+    def __init__(self, record: IdempotencyRecord, expires_at: float):
+        self.record = record
+        self.expires_at = expires_at
+        self.done = asyncio.Event()
+
+
+class InProcessIdempotencyStore(IdempotencyStore):
+    """
+    Keys held in this worker's memory.
+
+    Only retries that reach the same worker are deduplicated. Waiters are
+    woken as soon as the key is completed. The least recently used keys are
+    evicted once ``max_keys`` is reached.
+    """
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self._max_keys = max_keys
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    async def reserve(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[IdempotencyRecord]:
+        """Claim ``key`` unless it is in use."""
+        # No awaits between the read and the write, so this is atomic on the event loop
+        entry = self._get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry.record
+        self._entries[key] = _Entry(IdempotencyRecord(fingerprint, None), self._clock() + lock_ttl)
+        while len(self._entries) > self._max_keys:
+            self._remove(next(iter(self._entries)))
+        return None
+
+    async def complete(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        """Store the final record for ``key``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            # Evicted while running; keep the result for later retries all the same
+            entry = self._entries[key] = _Entry(record, 0)
+        entry.record = record
+        entry.expires_at = self._clock() + ttl
+        entry.done.set()
+
+    async def release(self, key: str) -> None:
+        """Drop the claim on ``key``."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.record.response is None:
+            self._remove(key)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Wait for ``key`` to be completed or released."""
+        entry = self._get(key)
+        if entry is None or entry.record.response is not None:
+            return
+        try:
+            await asyncio.wait_for(entry.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Keys held in the application database, shared by every worker and host.
+
+    A key is claimed by inserting its row, which the primary key makes atomic
+    across workers, and completed by writing the response into that row.
+    Waiters poll, since the database does not notify them, and expiry uses the
+    wall clock, since monotonic clocks are not comparable across processes.
+    Expired rows are replaced when their key is claimed again and deleted at
+    most every ``purge_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        clock: Callable[[], float] = time.time,
+        poll_interval: float = 0.1,
+        purge_interval: float = 60,
+    ):
+        self._session_factory = session_factory
+        self._clock = clock
+        self._poll_interval = poll_interval
+        self._purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    async def reserve(self, key: str, fingerprint: str, lock_ttl: float) -> Optional[IdempotencyRecord]:
+        """Claim ``key`` unless it is in use."""
+        await self._purge_expired()
+        while True:
+            now = self._clock()
+            async with self._session_factory() as db:
+                await db.execute(
+                    delete(IdempotencyKeyModel)
+                    .where(IdempotencyKeyModel.key == key, IdempotencyKeyModel.expires_at <= now)
+                )
+                db.add(IdempotencyKeyModel(key=key, fingerprint=fingerprint, expires_at=now + lock_ttl))
+                try:
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+                record = await self._get(db, key)
+            # A key released since the insert failed is claimed on the next pass
+            if record is not None:
+                return record
+
+    async def complete(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        """Store the final record for ``key``."""
+        response = record.response
+        values = {
+            "fingerprint": record.fingerprint,
+            "status": response.status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+            "body": response.body,
+            "expires_at": self._clock() + ttl,
+        }
+        async with self._session_factory() as db:
+            result = await db.execute(
+                update(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key).values(**values)
+            )
+            if result.rowcount == 0:
+                # Lapsed while running; keep the result for later retries all the same
+                db.add(IdempotencyKeyModel(key=key, **values))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Claimed again by a retry in the meantime, which will store its own response
+                await db.rollback()
+
+    async def release(self, key: str) -> None:
+        """Drop the claim on ``key``."""
+        async with self._session_factory() as db:
+            await db.execute(
+                delete(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key, IdempotencyKeyModel.status.is_(None))
+            )
+            await db.commit()
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Poll until ``key`` is completed or released."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            async with self._session_factory() as db:
+                record = await self._get(db, key)
+            if record is None or record.response is not None:
+                return
+            await asyncio.sleep(min(self._poll_interval, max(deadline - time.monotonic(), 0)))
+
+    async def _get(self, db: AsyncSession, key: str) -> Optional[IdempotencyRecord]:
+        row = (await db.execute(
+            select(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key)
+        )).scalar_one_or_none()
+        if row is None or row.expires_at <= self._clock():
+            return None
+        response = None
+        if row.status is not None:
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers]
+            response = StoredResponse(row.status, headers, row.body)
+        return IdempotencyRecord(row.fingerprint, response)
+
+    async def _purge_expired(self) -> None:
+        now = self._clock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self._purge_interval
+        async with self._session_factory() as db:
+            await db.execute(delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at <= now))
+            await db.commit()
+
+
+class RequestFingerprint:
+    """
+    Incremental fingerprint of a request, so a key can be checked against the
+    request it was first used for.
+
+    A multipart form is fingerprinted by its field names and a digest of each
+    field's content, leaving out the random boundary and per-part headers that
+    differ when a client rebuilds the form. Any other body, or a form that does
+    not parse, is fingerprinted byte for byte.
+    """
+
+    def __init__(self, method: str, path: str, content_type: Optional[str] = None):
+        """
+        Args:
+            method: Request method
+            path: Request path
+            content_type: Content-Type header of the request
+        """
+        self._prefix = _length_prefixed(method.encode(), path.encode())
+        self._raw = hashlib.sha256(self._prefix)
+        self._parser: Optional[MultipartParser] = None
+        self._fields: List[Tuple[bytes, bytes]] = []
+        self._form_complete = False
+
+        media_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if media_type == b"multipart/form-data" and boundary:
+            self._parser = MultipartParser(boundary, self._multipart_callbacks())
+
+    def _multipart_callbacks(self) -> dict:
+        header_field = bytearray()
+        header_value = bytearray()
+        name = b""
+        content = hashlib.sha256()
+
+        def on_part_begin() -> None:
+            nonlocal name, content
+            name = b""
+            content = hashlib.sha256()
+
+        def on_header_field(data: bytes, start: int, end: int) -> None:
+            header_field.extend(data[start:end])
+
+        def on_header_value(data: bytes, start: int, end: int) -> None:
+            header_value.extend(data[start:end])
+
+        def on_header_end() -> None:
+            nonlocal name
+            if bytes(header_field).lower() == b"content-disposition":
+                name = parse_options_header(bytes(header_value))[1].get(b"name", b"")
+            header_field.clear()
+            header_value.clear()
+
+        def on_part_data(data: bytes, start: int, end: int) -> None:
+            content.update(data[start:end])
+
+        def on_part_end() -> None:
+            self._fields.append((name, content.digest()))
+
+        def on_end() -> None:
+            self._form_complete = True
+
+        return {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_end": on_end,
+        }
+
+    def update(self, chunk: bytes) -> None:
+        """Add the next chunk of the body."""
+        self._raw.update(chunk)
+        if self._parser is not None:
+            try:
+                self._parser.write(chunk)
+            except MultipartParseError:
+                self._parser = None
+
+    def hexdigest(self) -> str:
+        """Fingerprint of the body so far."""
+        if self._parser is None or not self._form_complete:
+            return self._raw.hexdigest()
+        digest = hashlib.sha256(self._prefix + b"multipart/form-data")
+        # Field order is not significant in a form
+        for name, content in sorted(self._fields):
+            digest.update(_length_prefixed(name, content))
+        return digest.hexdigest()
+
+
+def _length_prefixed(*parts: bytes) -> bytes:
+    return b"".join(len(part).to_bytes(8, "big") + part for part in parts)
+
+
+class _BodySpool:
+    """A request body kept in memory while small and in a temporary file beyond that."""
+
+    def __init__(self, max_memory_bytes: int = BODY_SPOOL_MEMORY_BYTES):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+
+    def _on_disk(self) -> bool:
+        return getattr(self._file, "_rolled", True)
+
+    async def write(self, chunk: bytes) -> None:
+        # Disk writes go to a thread rather than blocking the event loop
+        if self._on_disk():
+            await asyncio.to_thread(self._file.write, chunk)
+        else:
+            self._file.write(chunk)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Read the body back from the start."""
+        self._file.seek(0)
+        while True:
+            if self._on_disk():
+                chunk = await asyncio.to_thread(self._file.read, BODY_CHUNK_BYTES)
+            else:
+                chunk = self._file.read(BODY_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware deduplicating retried POST requests by ``Idempotency-Key``.
+
+    Applies to the configured paths, for authenticated requests carrying the
+    header; anything else passes through untouched. The request body is read
+    and fingerprinted before the handler runs, spooled to a temporary file
+    once it is larger than ``BODY_SPOOL_MEMORY_BYTES`` so that uploads are not
+    held in memory, and then passed on to the handler in chunks.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        paths: List[str],
+        ttl_seconds: float,
+        lock_ttl_seconds: float,
+        wait_timeout_seconds: float,
+        max_response_bytes: int,
+        enabled: bool = True,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self.app = app
+        self.store = store
+        self.paths = set(paths)
+        self.ttl_seconds = ttl_seconds
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.max_response_bytes = max_response_bytes
+        self.enabled = enabled
+
+        self._requests = metrics.counter(
+            "idempotency_requests_total", "Requests carrying an idempotency key, by outcome", labelnames=("outcome",)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.enabled
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        subject = authenticated_subject(scope)
+        if subject is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._reject(
+                scope, receive, send, status.HTTP_400_BAD_REQUEST,
+                f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters", "invalid",
+            )
+            return
+
+        spool = _BodySpool()
+        try:
+            fingerprint = await _spool_body(scope, receive, spool)
+            if fingerprint is None:
+                # The client went away, or an upload limit cut the body off
+                return
+            await self._deduplicate(scope, receive, send, subject, idempotency_key, fingerprint, spool)
+        finally:
+            spool.close()
+
+    async def _deduplicate(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        subject: str,
+        idempotency_key: str,
+        fingerprint: str,
+        spool: _BodySpool,
+    ) -> None:
+        """Replay, wait for or run the request, depending on the state of its key."""
+        key = f"{subject}:{idempotency_key}"
+
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        waited = False
+        while True:
+            record = await self.store.reserve(key, fingerprint, self.lock_ttl_seconds)
+            if record is None:
+                break
+            if record.fingerprint != fingerprint:
+                await self._reject(
+                    scope, receive, send, status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    "Idempotency-Key was already used for a different request", "mismatch",
+                )
+                return
+            if record.response is not None:
+                self._requests.labels("replayed_after_wait" if waited else "replayed").inc()
+                await _replay(record.response, send)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await self._reject(
+                    scope, receive, send, status.HTTP_409_CONFLICT,
+                    "A request with this Idempotency-Key is still in progress", "in_progress",
+                    headers={"Retry-After": str(max(1, math.ceil(self.wait_timeout_seconds)))},
+                )
+                return
+            waited = True
+            await self.store.wait(key, remaining)
+
+        await self._run(scope, _replay_body(spool, receive), send, key, fingerprint)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint: str) -> None:
+        """Run the request, storing its response under the claimed key."""
+        status_code = 0
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        finished = False
+        streamed = False
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status_code, headers, size, finished, streamed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_response_bytes:
+                    chunks.append(chunk)
+                finished = not message.get("more_body", False)
+                streamed = streamed or not finished
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive, send_and_capture)
+            if finished and not streamed and self._storable(status_code, size):
+                response = StoredResponse(status_code, headers, b"".join(chunks))
+                await self.store.complete(key, IdempotencyRecord(fingerprint, response), self.ttl_seconds)
+                stored = True
+        finally:
+            if not stored:
+                await self.store.release(key)
+            self._requests.labels("stored" if stored else "not_stored").inc()
+
+    def _storable(self, status_code: int, size: int) -> bool:
+        """
+        Whether a response is the final outcome of its request and small enough to keep.
+
+        Streamed responses are never stored: their status is sent before the
+        outcome is known, so a stream that fails partway still reads as a 200.
+        Conflicts, such as a profile version this worker has not seen yet, may
+        clear up on a retry and are not stored either.
+        """
+        if status_code >= 500 or status_code in (
+            status.HTTP_408_REQUEST_TIMEOUT,
+            status.HTTP_409_CONFLICT,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ):
+            return False
+        return size <= self.max_response_bytes
+
+    async def _reject(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        status_code: int,
+        detail: str,
+        outcome: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._requests.labels(outcome).inc()
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+        await response(scope, receive, send)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for header, value in scope["headers"]:
+        if header == name:
+            return value.decode("latin-1").strip()
+    return None
+
+
+async def _spool_body(scope: Scope, receive: Receive, spool: _BodySpool) -> Optional[str]:
+    """
+    Read the request body into a spool, fingerprinting it on the way.
+
+    Returns:
+        The request fingerprint, or None if the body did not arrive in full
+    """
+    fingerprint = RequestFingerprint(scope["method"], scope["path"], _header(scope, b"content-type"))
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        chunk = message.get("body", b"")
+        fingerprint.update(chunk)
+        await spool.write(chunk)
+        if not message.get("more_body", False):
+            return fingerprint.hexdigest()
+
+
+def _replay_body(spool: _BodySpool, receive: Receive) -> Receive:
+    """Build a receive channel serving a spooled body in chunks, then the client's own messages."""
+    chunks = spool.chunks()
+    done = False
+
+    async def receive_body() -> Message:
+        nonlocal done
+        if done:
+            return await receive()
+        chunk = await anext(chunks, None)
+        if chunk is None:
+            done = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    return receive_body
+
+
+async def _replay(response: StoredResponse, send: Send) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": response.headers + [(REPLAYED_HEADER, b"true")],
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+
+def _create_store() -> IdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    return InProcessIdempotencyStore(max_keys=settings.IDEMPOTENCY_MAX_KEYS)
+
+
+# Create a singleton instance
+idempotency_store = _create_store()
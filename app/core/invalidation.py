@@ -0,0 +1,210 @@
+"""
+Cache invalidation channels.
+
+Each worker process keeps its own in-memory caches, so writes that invalidate a
+cached entry are published on a channel the caches subscribe to. The
+in-process channel only reaches the caches of the worker that made the write;
+the database channel reaches every worker, pre-forked or on another host,
+within its poll interval.
+"""
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.logging import get_logger
+from app.models.db.invalidation import InvalidationModel
+
+# Create logger
+logger = get_logger(__name__)
+
+# Published rows are re-read for this long, so rows committed out of order or
+# stamped by a host with a slightly different clock are not missed
+POLL_WINDOW_SECONDS = 10
+
+
+class InvalidationChannel(ABC):
+    """Abstract interface for a cross-worker invalidation channel."""
+
+    @abstractmethod
+    def publish(self, key: str) -> None:
+        """Publish an invalidation for the given key."""
+        pass
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Register a callback invoked with every published key."""
+        pass
+
+
+class LocalInvalidationChannel(InvalidationChannel):
+    """Channel reaching the subscribers of this worker only."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def publish(self, key: str) -> None:
+        """Deliver the key to every subscriber synchronously."""
+        for callback in list(self._subscribers):
+            callback(key)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        """Register a callback invoked with every published key."""
+        self._subscribers.append(callback)
+
+
+class DatabaseInvalidationChannel(LocalInvalidationChannel):
+    """
+    Channel carried by a table in the application database, reaching every worker.
+
+    A published key is delivered to this worker's subscribers at once and
+    written to the table in the background. Each worker polls the table every
+    ``poll_interval`` seconds and delivers the keys published since, its own
+    included. When the channel starts, keys published in the last
+    ``replay_seconds`` are delivered again, so a worker started after a
+    revocation still honours it.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        poll_interval: float,
+        replay_seconds: float = 0,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__()
+        self.topic = topic
+        self._poll_interval = poll_interval
+        self._replay_seconds = replay_seconds
+        self._retention_seconds = max(replay_seconds, POLL_WINDOW_SECONDS)
+        self._session_factory = session_factory
+        self._clock = clock
+        # Delivered row id -> published_at, forgotten once out of the poll window
+        self._seen: Dict[int, float] = {}
+        self._outbox: List[Tuple[str, float]] = []
+        self._polled = False
+        self._writes: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, key: str) -> None:
+        """Deliver the key on this worker and queue it for the others."""
+        super().publish(key)
+        self._outbox.append((key, self._clock()))
+        if self._task is not None:
+            write = asyncio.get_running_loop().create_task(self._flush())
+            self._writes.add(write)
+            write.add_done_callback(self._writes.discard)
+
+    def start(self) -> None:
+        """Start polling for keys published by other workers."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling, after writing any keys still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        await self._flush()
+
+    async def poll(self) -> int:
+        """
+        Deliver keys published since the last poll.
+
+        Returns:
+            Number of keys delivered
+        """
+        now = self._clock()
+        since = now - (POLL_WINDOW_SECONDS if self._polled else self._replay_seconds)
+        async with self._session_factory() as db:
+            rows = (await db.execute(
+                select(InvalidationModel.id, InvalidationModel.key, InvalidationModel.published_at)
+                .where(InvalidationModel.topic == self.topic, InvalidationModel.published_at >= since)
+                .order_by(InvalidationModel.id)
+            )).all()
+        delivered = 0
+        for row_id, key, published_at in rows:
+            if row_id in self._seen:
+                continue
+            self._seen[row_id] = published_at
+            LocalInvalidationChannel.publish(self, key)
+            delivered += 1
+        cutoff = now - 2 * POLL_WINDOW_SECONDS
+        for row_id in [i for i, published_at in self._seen.items() if published_at < cutoff]:
+            del self._seen[row_id]
+        self._polled = True
+        return delivered
+
+    async def _flush(self) -> None:
+        outbox, self._outbox = self._outbox, []
+        if not outbox:
+            return
+        try:
+            async with self._session_factory() as db:
+                db.add_all(InvalidationModel(topic=self.topic, key=key, published_at=at) for key, at in outbox)
+                await db.execute(
+                    delete(InvalidationModel).where(
+                        InvalidationModel.topic == self.topic,
+                        InvalidationModel.published_at < self._clock() - self._retention_seconds,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            # Kept for the next flush rather than lost
+            self._outbox = outbox + self._outbox
+            logger.warning("Publishing invalidations failed", topic=self.topic, error=str(e))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._flush()
+                await self.poll()
+            except Exception as e:
+                logger.warning("Polling invalidations failed", topic=self.topic, error=str(e))
+            await asyncio.sleep(self._poll_interval)
+
+
+# Database channels created so far, started and stopped with the application
+_database_channels: List[DatabaseInvalidationChannel] = []
+
+
+def create_channel(topic: str, replay_seconds: float = 0) -> InvalidationChannel:
+    """
+    Create the channel for a topic on the configured backend.
+
+    Args:
+        topic: Name separating this channel's keys from other channels'
+        replay_seconds: How far back a starting worker re-delivers keys
+
+    Returns:
+        The channel
+    """
+    if settings.INVALIDATION_BACKEND == "database":
+        channel = DatabaseInvalidationChannel(topic, settings.INVALIDATION_POLL_SECONDS, replay_seconds)
+        _database_channels.append(channel)
+        return channel
+    return LocalInvalidationChannel()
+
+
+def start_channels() -> None:
+    """Start polling on every database channel."""
+    for channel in _database_channels:
+        channel.start()
+
+
+async def stop_channels() -> None:
+    """Stop every database channel."""
+    for channel in _database_channels:
+        await channel.stop()
@@ -1,18 +1,281 @@
+"""
+Structured logging.
+
+structlog renders each event to a single line with orjson and hands it to a
+queue; a background writer thread drains the queue and writes lines to stdout
+in batches, so log calls on the event loop never wait on I/O. Standard library
+loggers (uvicorn, SQLAlchemy) are routed through the same writer. If the queue
+is full, lines are dropped and counted rather than blocking the caller.
+
+Chatty events can be sampled or rate limited by event name through
+``event_sampler``. With ``ENABLE_REDACTION`` set, every event is redacted
+before rendering: values under sensitive keys at any depth, and emails, bearer
+strings and tokens found in any string value.
+"""
+import atexit
 import logging
+import os
+import queue
+import re
 import sys
-from typing import Any, Dict, Optional
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, TextIO
 
+import orjson
 import structlog
-from structlog.types import Processor
+from structlog.types import EventDict, Processor, WrappedLogger
 
 from app.core.config import settings
+from app.core.metrics import MetricsRegistry, registry
+
+# Upper bound on lines written per batch by the writer thread
+_WRITE_BATCH_SIZE = 1000
+_STOP = object()
+
+REDACTED = "[REDACTED]"
+
+# Keys whose values are redacted wherever they appear, matched as substrings
+_SENSITIVE_KEY_RE = re.compile(
+    "api_key|key|token|secret|password|authorization|transcript|text|content|draft", re.IGNORECASE
+)
+
+# One pass over each string value finds every kind of PII or credential. The
+# regex engine tries every alternative at every position, so strings are only
+# scanned when they contain one of the literals a match must include.
+_SENSITIVE_VALUE_RE = re.compile(
+    r"(?<![\w.+-])(?:"                                      # only start at token boundaries
+    r"[Bb]earer\s+[\w\-.~+/]+=*"                            # bearer credentials
+    r"|eyJ[\w-]+\.[\w-]+\.[\w-]*"                           # JWTs
+    r"|sk-[\w-]{16,}"                                       # OpenAI style API keys
+    r"|[\w.+-]++@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}"         # email addresses
+    r")"
+)
+
+# Keys structlog adds itself; never redacted by name
+_STRUCTLOG_KEYS = frozenset(("event", "level", "timestamp", "logger", "exception"))
+
+# Containers nested deeper than this are replaced rather than walked
+_MAX_REDACTION_DEPTH = 8
+
+
+class LogWriter:
+    """Background thread writing queued log lines to a stream in batches."""
+
+    def __init__(self, stream: TextIO, max_queue: int, metrics: Optional[MetricsRegistry] = None, name: str = "log"):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._stream = stream
+        self._max_queue = max_queue
+        self._name = name
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._dropped = metrics.counter(
+            f"{name}_lines_dropped_total", f"{name.capitalize()} lines dropped because the {name} queue was full"
+        )
+
+    def put(self, line: str) -> None:
+        """Queue a line for writing, or write it directly if the writer is not running."""
+        if self._thread is None:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+            return
+        if self._max_queue and self._queue.qsize() >= self._max_queue:
+            self._dropped.inc()
+            return
+        self._queue.put(line)
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{self._name}-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Write every queued line and stop the writer thread."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _reset_after_fork(self) -> None:
+        # The writer thread does not exist in a forked child; start over unstarted
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[str] = []
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= _WRITE_BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._stream.write("\n".join(batch) + "\n")
+                    self._stream.flush()
+                except Exception:
+                    # Nowhere left to report a broken log stream
+                    pass
+            if item is _STOP:
+                return
+
+
+class QueueLogger:
+    """structlog logger handing rendered lines to a LogWriter."""
+
+    def __init__(self, writer: LogWriter):
+        self._writer = writer
+
+    def msg(self, message: str) -> None:
+        self._writer.put(message)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class QueueLoggerFactory:
+    """Creates QueueLoggers sharing one writer."""
+
+    def __init__(self, writer: LogWriter):
+        self._writer = writer
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self._writer)
+
+
+class _WriterHandler(logging.Handler):
+    """Standard library handler forwarding formatted records to a LogWriter."""
+
+    def __init__(self, writer: LogWriter):
+        super().__init__()
+        self._writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._writer.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class _SampleRule:
+    __slots__ = ("one_in", "max_per_second", "seen", "tokens", "updated_at", "suppressed")
+
+    def __init__(self, one_in: int, max_per_second: Optional[float], now: float):
+        self.one_in = one_in
+        self.max_per_second = max_per_second
+        self.seen = 0
+        self.tokens = 1.0
+        self.updated_at = now
+        self.suppressed = 0
+
+
+class EventSampler:
+    """
+    Processor sampling or rate limiting chatty events by event name.
+
+    Events without a rule pass through after a single dict lookup. A kept event
+    that follows suppressed ones carries their count as ``suppressed``.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, metrics: Optional[MetricsRegistry] = None):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._clock = clock
+        self._rules: Dict[str, _SampleRule] = {}
+        self._sampled_out = metrics.counter("log_events_sampled_out_total", "Log events dropped by sampling or rate limits")
+
+    def configure(self, event: str, one_in: int = 1, max_per_second: Optional[float] = None) -> None:
+        """
+        Sample an event.
+
+        Args:
+            event: Event name (the log message)
+            one_in: Keep one in every ``one_in`` occurrences
+            max_per_second: Keep at most this many occurrences per second, after sampling
+        """
+        self._rules[event] = _SampleRule(one_in, max_per_second, self._clock())
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        rule = self._rules.get(event_dict.get("event"))
+        if rule is None:
+            return event_dict
+
+        rule.seen += 1
+        keep = rule.seen % rule.one_in == 0
+        if keep and rule.max_per_second is not None:
+            now = self._clock()
+            rule.tokens = min(1.0, rule.tokens + (now - rule.updated_at) * rule.max_per_second)
+            rule.updated_at = now
+            keep = rule.tokens >= 1.0
+            if keep:
+                rule.tokens -= 1.0
+        if not keep:
+            rule.suppressed += 1
+            self._sampled_out.inc()
+            raise structlog.DropEvent
+        if rule.suppressed:
+            event_dict["suppressed"] = rule.suppressed
+            rule.suppressed = 0
+        return event_dict
+
+
+@lru_cache(maxsize=4096)
+def _is_sensitive_key(key: str) -> bool:
+    return key not in _STRUCTLOG_KEYS and _SENSITIVE_KEY_RE.search(key) is not None
+
+
+def _redact(value: Any, sensitive: bool, depth: int) -> Any:
+    """Redact a value, copying only the containers it walks."""
+    if isinstance(value, str):
+        if sensitive:
+            return REDACTED
+        if "@" in value or "earer" in value or "eyJ" in value or "sk-" in value:
+            return _SENSITIVE_VALUE_RE.sub(REDACTED, value)
+        return value
+    if isinstance(value, dict):
+        if depth >= _MAX_REDACTION_DEPTH:
+            return REDACTED
+        return {
+            k: _redact(v, sensitive or (isinstance(k, str) and _is_sensitive_key(k)), depth + 1)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        if depth >= _MAX_REDACTION_DEPTH:
+            return REDACTED
+        return [_redact(v, sensitive, depth + 1) for v in value]
+    if isinstance(value, (int, float, bool)) or value is None:
+        # Counts and timings stay readable even under sensitive keys
+        return value
+    # Anything else renders through str(), so redact what it would render
+    return _redact(str(value), sensitive, depth)
+
+
+def redact_event(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+    """Processor redacting sensitive keys and PII in string values at any depth."""
+    return _redact(event_dict, False, 0)
+
+
+def render_json(logger: WrappedLogger, method_name: str, event_dict: EventDict) -> str:
+    """Render an event as a JSON line with orjson."""
+    return orjson.dumps(event_dict, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Create singleton instances
+event_sampler = EventSampler(metrics=registry)
+log_writer = LogWriter(sys.stdout, max_queue=settings.LOG_QUEUE_SIZE, metrics=registry)
 
 
 def configure_logging() -> None:
-    """Configure structlog for the application."""
+    """Configure structlog and standard library logging for the application."""
     
-    # Set up structlog processors
+    # Set up structlog processors; sampling runs first so dropped events cost nothing more
     processors: list[Processor] = [
+        event_sampler,
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
         structlog.processors.StackInfoRenderer(),
@@ -20,29 +283,45 @@ def configure_logging() -> None:
         structlog.processors.TimeStamper(fmt="iso"),
     ]
     
+    if settings.ENABLE_REDACTION:
+        processors.append(redact_event)
+    
     # Add console renderer for development
     if settings.LOG_LEVEL != "DEBUG":
         # In production, use JSON renderer
-        processors.append(structlog.processors.JSONRenderer())
+        processors.append(render_json)
     else:
         # In development, use console renderer
         processors.append(structlog.dev.ConsoleRenderer())
     
+    log_level = getattr(logging, settings.LOG_LEVEL)
+    log_writer.start()
     structlog.configure(
         processors=processors,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
+        logger_factory=QueueLoggerFactory(log_writer),
+        # Calls below the level return before any processor runs
+        wrapper_class=structlog.make_filtering_bound_logger(log_level),
         cache_logger_on_first_use=True,
     )
     
     # Set log level
     logging.basicConfig(
         format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL)
+        handlers=[_WriterHandler(log_writer)],
+        level=log_level,
+        force=True,
     )
 
 
+def shutdown_logging() -> None:
+    """Write every queued log line and stop the writer thread."""
+    log_writer.stop()
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=log_writer._reset_after_fork)
+
+
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """Get a logger instance for the given name."""
     return structlog.get_logger(name)
@@ -56,20 +335,10 @@ def redact_sensitive_data(data: Dict[str, Any]) -> Dict[str, Any]:
         data: Dictionary containing data that might include sensitive information
         
     Returns:
-        Dictionary with sensitive data redacted if redaction is enabled
+        Copy of the dictionary with sensitive keys and PII redacted at any depth
+        if redaction is enabled
     """
     if not settings.ENABLE_REDACTION:
         return data
     
-    result = data.copy()
-    sensitive_keys = [
-        "api_key", "key", "token", "secret", "password", "authorization",
-        "transcript", "text", "content", "draft"
-    ]
-    
-    for key in result:
-        if any(sensitive in key.lower() for sensitive in sensitive_keys):
-            if isinstance(result[key], str):
-                result[key] = "[REDACTED]"
-    
-    return result
+    return _redact(data, False, 0)
@@ -0,0 +1,236 @@
+"""
+In-process metrics primitives.
+
+Metrics are plain Python objects registered on a process-wide registry so hot
+paths only pay for an attribute update. The registry renders itself in the
+Prometheus text exposition format for scraping.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple, Union
+
+# Latency buckets in seconds for request and database timings
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Latency buckets in seconds for model inference and upstream API calls
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0
+
+    def inc(self, amount: Union[int, float] = 1) -> None:
+        """Increment the counter."""
+        self._value += amount
+
+    @property
+    def value(self) -> Union[int, float]:
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0
+
+    def set(self, value: Union[int, float]) -> None:
+        """Set the gauge to the given value."""
+        self._value = value
+
+    def inc(self, amount: Union[int, float] = 1) -> None:
+        """Increment the gauge."""
+        self._value += amount
+
+    def dec(self, amount: Union[int, float] = 1) -> None:
+        """Decrement the gauge."""
+        self._value -= amount
+
+    @property
+    def value(self) -> Union[int, float]:
+        return self._value
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket plus the +Inf overflow, non-cumulative
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block in seconds."""
+        return _Timer(self)
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """Return (upper bound, count of observations <= bound) pairs ending with +Inf."""
+        total = 0
+        counts = []
+        for bound, count in zip(self.buckets + (math.inf,), self._counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def value(self) -> int:
+        return self._count
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class MetricFamily:
+    """A metric split by label values, with one child metric per combination."""
+
+    def __init__(self, cls, name: str, description: str, labelnames: Sequence[str], **kwargs):
+        self.cls = cls
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._kwargs = kwargs
+        self._children: Dict[Tuple[str, ...], Union[Counter, Gauge, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Get or create the child metric for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Metric {self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self.cls(self.name, self.description, **self._kwargs))
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Union[Counter, Gauge, Histogram]]]:
+        """Return (label values, child metric) pairs."""
+        return list(self._children.items())
+
+    @property
+    def value(self) -> Union[int, float]:
+        return sum(child.value for child in list(self._children.values()))
+
+
+class MetricsRegistry:
+    """Registry of named metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Gauge, Histogram, MetricFamily]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "", labelnames: Sequence[str] = ()) -> Union[Counter, MetricFamily]:
+        """Get or create a counter, or a family of counters if label names are given."""
+        return self._get_or_create(Counter, name, description, labelnames)
+
+    def gauge(self, name: str, description: str = "", labelnames: Sequence[str] = ()) -> Union[Gauge, MetricFamily]:
+        """Get or create a gauge, or a family of gauges if label names are given."""
+        return self._get_or_create(Gauge, name, description, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Union[Histogram, MetricFamily]:
+        """Get or create a histogram, or a family of histograms if label names are given."""
+        return self._get_or_create(Histogram, name, description, labelnames, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        """Return the current value of every registered metric (observation counts for histograms)."""
+        return {name: metric.value for name, metric in list(self._metrics.items())}
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for name, metric in sorted(list(self._metrics.items())):
+            if isinstance(metric, MetricFamily):
+                cls, labelnames, children = metric.cls, metric.labelnames, sorted(metric.children(), key=lambda c: c[0])
+            else:
+                cls, labelnames, children = type(metric), (), [((), metric)]
+            lines.append(f"# HELP {name} {_escape_help(metric.description)}")
+            lines.append(f"# TYPE {name} {_PROMETHEUS_TYPES[cls]}")
+            for values, child in children:
+                labels = list(zip(labelnames, values))
+                if isinstance(child, Histogram):
+                    for bound, count in child.cumulative_counts():
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', _format_value(bound))])} {count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_format_value(child.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {child.count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_format_value(child.value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, cls, name: str, description: str, labelnames: Sequence[str] = (), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = MetricFamily(cls, name, description, labelnames, **kwargs) if labelnames else cls(name, description, **kwargs)
+                self._metrics[name] = metric
+            elif (metric.cls if isinstance(metric, MetricFamily) else type(metric)) is not cls:
+                raise ValueError(f"Metric {name} is already registered as {type(metric).__name__}")
+            elif tuple(labelnames) != (metric.labelnames if isinstance(metric, MetricFamily) else ()):
+                raise ValueError(f"Metric {name} is already registered with different labels")
+            return metric
+
+
+_PROMETHEUS_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in labels) + "}"
+
+
+def _format_value(value: Union[int, float]) -> str:
+    return "+Inf" if value == math.inf else repr(value)
+
+
+# Create global metrics registry
+registry = MetricsRegistry()
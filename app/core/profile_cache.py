@@ -0,0 +1,123 @@
+"""
+Read-through cache of stored rewrite profiles.
+
+Rewrite requests that reference a profile by ID resolve it here, together with
+the system prompt compiled when it was stored. Profiles are cached by owner and
+ID for ``PROFILE_CACHE_TTL_SECONDS`` and invalidated explicitly whenever they
+are replaced or deleted. With ``INVALIDATION_BACKEND=memory`` the invalidation
+only reaches this worker, so other worker processes keep serving their copy
+until it expires; with ``database`` they drop it within
+``INVALIDATION_POLL_SECONDS``. Callers that pin a version check a mismatch
+against the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.invalidation import InvalidationChannel, create_channel
+from app.core.metrics import MetricsRegistry, registry
+from app.models.api.schemas import StoredProfile
+
+
+class _Entry(NamedTuple):
+    profile: StoredProfile
+    expires_at: float
+
+
+def profile_cache_key(user_id: str, profile_id: str) -> str:
+    """Cache and invalidation key of a user's profile."""
+    return f"{user_id}/{profile_id}"
+
+
+class ProfileCache:
+    """Bounded TTL cache of stored profiles keyed by owner and profile ID."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        channel: Optional[InvalidationChannel] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._channel = channel
+        if channel is not None:
+            channel.subscribe(self._drop)
+
+        self._hits = metrics.counter("profile_cache_hits_total", "Stored profile lookups served from cache")
+        self._misses = metrics.counter("profile_cache_misses_total", "Stored profile lookups that required a DB query")
+        self._invalidations = metrics.counter("profile_cache_invalidations_total", "Cached profiles dropped after an update")
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl_seconds > 0
+
+    def get(self, user_id: str, profile_id: str) -> Optional[StoredProfile]:
+        """
+        Get a cached profile.
+
+        Args:
+            user_id: Owner of the profile
+            profile_id: Profile ID
+
+        Returns:
+            The cached profile, or None if not cached or expired
+        """
+        if not self.enabled:
+            return None
+
+        key = profile_cache_key(user_id, profile_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry.profile
+
+    def put(self, user_id: str, profile: StoredProfile) -> None:
+        """Cache a profile loaded from or written to the database."""
+        if not self.enabled:
+            return
+
+        key = profile_cache_key(user_id, profile.id)
+        with self._lock:
+            self._entries[key] = _Entry(profile, time.monotonic() + self._ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, profile_id: str) -> None:
+        """Drop a profile on this worker and publish the invalidation to the others."""
+        key = profile_cache_key(user_id, profile_id)
+        self._drop(key)
+        if self._channel is not None:
+            self._channel.publish(key)
+
+    def clear(self) -> None:
+        """Drop every cached profile on this worker."""
+        with self._lock:
+            self._entries.clear()
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._invalidations.inc()
+
+
+# Create a singleton instance
+profile_cache = ProfileCache(
+    max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+    channel=create_channel("profiles"),
+    metrics=registry,
+)
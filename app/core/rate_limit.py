@@ -0,0 +1,369 @@
+"""
+Per-user token bucket rate limiting.
+
+Every authenticated request takes one token from the user's request bucket in
+``RateLimitMiddleware``. Expensive endpoints additionally charge their actual
+cost (estimated LLM tokens, audio seconds) to a per-user, per-endpoint bucket
+through ``charge_usage`` once the handler knows it. A charge is admitted while
+the bucket holds at least ``min(cost, capacity)`` tokens and may drive it
+negative, so a single large job is never locked out but the user waits for the
+debt to refill before the next one. Charges are refunded when the request ends
+in a server error, including a missed deadline, so a retry is not charged twice.
+
+Buckets are keyed on the user ID carried in the access token, so changing the
+email address does not start a fresh budget.
+
+Responses carry ``RateLimit-Limit``, ``RateLimit-Remaining`` and
+``RateLimit-Reset`` headers for the most constrained bucket involved, and
+rejected requests get a 429 with ``Retry-After``.
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import authenticated_token
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.metrics import MetricsRegistry, registry
+from app.models.db.rate_limit import RateLimitBucketModel
+
+# Rough characters per token for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class RateLimit(NamedTuple):
+    """Token bucket parameters."""
+    capacity: float
+    refill_per_second: float
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of taking tokens from a bucket."""
+    allowed: bool
+    limit: float
+    remaining: float
+    reset_after: float
+    retry_after: float
+
+
+def _take(tokens: float, updated_at: float, now: float, cost: float, limit: RateLimit) -> Tuple[float, RateLimitDecision]:
+    """
+    Refill a bucket up to ``now`` and try to take ``cost`` tokens from it.
+
+    Returns:
+        Tuple of the new token count and the decision
+    """
+    tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_per_second)
+    required = min(cost, limit.capacity)
+    allowed = tokens >= required
+    if allowed:
+        # A refund (negative cost) never fills the bucket beyond capacity
+        tokens = min(limit.capacity, tokens - cost)
+    rate = limit.refill_per_second
+    reset_after = (limit.capacity - tokens) / rate if rate > 0 else math.inf
+    retry_after = 0.0 if allowed else ((required - tokens) / rate if rate > 0 else math.inf)
+    return tokens, RateLimitDecision(allowed, limit.capacity, max(tokens, 0.0), reset_after, retry_after)
+
+
+class RateLimitBackend(ABC):
+    """Abstract interface for token bucket storage."""
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, limit: RateLimit) -> RateLimitDecision:
+        """Atomically refill the bucket for ``key`` and try to take ``cost`` tokens."""
+        pass
+
+
+class InProcessRateLimitBackend(RateLimitBackend):
+    """
+    Buckets held in this worker's memory.
+
+    Limits are enforced per worker, so with N workers a user effectively gets N
+    times the configured rate. Idle buckets are evicted least recently used
+    first once ``max_keys`` is reached; an evicted bucket would have refilled.
+    """
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self._max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, cost: float, limit: RateLimit) -> RateLimitDecision:
+        """Refill the bucket for ``key`` and try to take ``cost`` tokens."""
+        # No awaits between the read and the write, so this is atomic on the event loop
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        tokens, decision = _take(tokens, updated_at, now, cost, limit)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Buckets held in the application database, shared by every worker and host.
+
+    Each consume locks the bucket's row, runs the refill-and-take step and
+    writes the result back in one transaction, so concurrent requests from any
+    worker draw from one bucket; this costs a few database round trips per
+    request. Bucket timestamps use the wall clock, since monotonic clocks are
+    not comparable across processes, and rows are dropped once the bucket has
+    refilled, at most every ``purge_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        clock: Callable[[], float] = time.time,
+        purge_interval: float = 60,
+    ):
+        self._session_factory = session_factory
+        self._clock = clock
+        self._purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    async def consume(self, key: str, cost: float, limit: RateLimit) -> RateLimitDecision:
+        """Refill the bucket for ``key`` and try to take ``cost`` tokens."""
+        await self._purge_expired()
+        while True:
+            async with self._session_factory() as db:
+                bucket = (await db.execute(
+                    select(RateLimitBucketModel).where(RateLimitBucketModel.key == key).with_for_update()
+                )).scalar_one_or_none()
+                now = self._clock()
+                if bucket is None or bucket.expires_at <= now:
+                    tokens, refilled_at = limit.capacity, now
+                else:
+                    tokens, refilled_at = bucket.tokens, bucket.refilled_at
+                tokens, decision = _take(tokens, refilled_at, now, cost, limit)
+                if bucket is None:
+                    db.add(RateLimitBucketModel(key=key, tokens=tokens, refilled_at=now, expires_at=now + decision.reset_after))
+                else:
+                    bucket.tokens, bucket.refilled_at, bucket.expires_at = tokens, now, now + decision.reset_after
+                try:
+                    await db.commit()
+                    return decision
+                except IntegrityError:
+                    # Another worker created the bucket first; take from theirs
+                    await db.rollback()
+
+    async def _purge_expired(self) -> None:
+        now = self._clock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self._purge_interval
+        async with self._session_factory() as db:
+            await db.execute(delete(RateLimitBucketModel).where(RateLimitBucketModel.expires_at <= now))
+            await db.commit()
+
+
+class RateLimiter:
+    """Per-user request and per-endpoint cost buckets."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        user_limit: RateLimit,
+        endpoint_limits: Dict[str, RateLimit],
+        enabled: bool = True,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self.backend = backend
+        self.user_limit = user_limit
+        self.endpoint_limits = endpoint_limits
+        self.enabled = enabled
+
+        self._allowed = metrics.counter("rate_limit_allowed_total", "Requests and charges admitted by the rate limiter")
+        self._rejected = metrics.counter("rate_limit_rejected_total", "Requests and charges rejected by the rate limiter")
+
+    async def hit(self, subject: str) -> RateLimitDecision:
+        """Take one request from a user's request bucket."""
+        return self._count(await self.backend.consume(f"user:{subject}", 1, self.user_limit))
+
+    async def charge(self, subject: str, endpoint: str, cost: float) -> Optional[RateLimitDecision]:
+        """
+        Charge a cost to a user's bucket for an endpoint.
+
+        Returns:
+            The decision, or None if the endpoint has no cost limit
+        """
+        limit = self.endpoint_limits.get(endpoint)
+        if limit is None:
+            return None
+        return self._count(await self.backend.consume(f"{endpoint}:{subject}", cost, limit))
+
+    async def refund(self, subject: str, endpoint: str, cost: float) -> None:
+        """Give a charged cost back to a user's bucket for an endpoint."""
+        await self.backend.consume(f"{endpoint}:{subject}", -cost, self.endpoint_limits[endpoint])
+
+    def _count(self, decision: RateLimitDecision) -> RateLimitDecision:
+        if decision.allowed:
+            self._allowed.inc()
+        else:
+            self._rejected.inc()
+        return decision
+
+
+class _RequestUsage:
+    """Rate limit state of the request being handled."""
+
+    def __init__(self, limiter: RateLimiter, subject: str, endpoint: Optional[str], decision: RateLimitDecision):
+        self.limiter = limiter
+        self.subject = subject
+        self.endpoint = endpoint
+        self.decisions: List[RateLimitDecision] = [decision]
+        self.charged = 0.0
+
+    async def refund(self) -> None:
+        """Give the costs charged so far back to the endpoint bucket."""
+        charged, self.charged = self.charged, 0.0
+        if charged:
+            await self.limiter.refund(self.subject, self.endpoint, charged)
+
+    def headers(self) -> Dict[str, str]:
+        """Rate limit headers for the most constrained bucket."""
+        return rate_limit_headers(min(self.decisions, key=lambda d: d.remaining / d.limit))
+
+
+_current_usage: ContextVar[Optional[_RequestUsage]] = ContextVar("rate_limit_usage", default=None)
+
+
+def rate_limit_headers(decision: RateLimitDecision) -> Dict[str, str]:
+    """Build standard rate limit response headers for a decision."""
+    headers = {
+        "RateLimit-Limit": str(int(decision.limit)),
+        "RateLimit-Remaining": str(int(decision.remaining)),
+        "RateLimit-Reset": str(math.ceil(min(decision.reset_after, 86400))),
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(min(decision.retry_after, 86400)))
+    return headers
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in a piece of text."""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+async def charge_usage(cost: float) -> None:
+    """
+    Charge the cost of the current request to its endpoint bucket.
+
+    Does nothing for requests the middleware did not identify a user for.
+
+    Args:
+        cost: Cost in the endpoint's units (estimated tokens, audio seconds)
+
+    Raises:
+        HTTPException: 429 if the user has exhausted the endpoint's budget
+    """
+    usage = _current_usage.get()
+    if usage is None or usage.endpoint is None:
+        return
+    decision = await usage.limiter.charge(usage.subject, usage.endpoint, cost)
+    if decision is None:
+        return
+    usage.decisions.append(decision)
+    if decision.allowed:
+        usage.charged += cost
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=rate_limit_headers(decision),
+        )
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-user rate limits to authenticated requests.
+
+    The user is identified from the bearer token through the verification
+    cache; requests without a valid token pass through untouched and are
+    rejected by the authentication dependency as before. Costs charged by a
+    request that fails with a 5xx response or an unhandled error are refunded
+    before the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter, endpoints: Dict[str, str]):
+        self.app = app
+        self.limiter = limiter
+        self.endpoints = endpoints
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token_data = authenticated_token(scope)
+        if token_data is None:
+            await self.app(scope, receive, send)
+            return
+        # Tokens issued before the user ID claim fall back to the email until they expire
+        subject = token_data.user_id or token_data.email
+
+        decision = await self.limiter.hit(subject)
+        if not decision.allowed:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers=rate_limit_headers(decision),
+            )
+            await response(scope, receive, send)
+            return
+
+        usage = _RequestUsage(self.limiter, subject, self.endpoints.get(scope["path"]), decision)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if message["status"] >= 500:
+                    await usage.refund()
+                headers = MutableHeaders(scope=message)
+                for name, value in usage.headers().items():
+                    headers[name] = value
+            await send(message)
+
+        token = _current_usage.set(usage)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception:
+            await usage.refund()
+            raise
+        finally:
+            _current_usage.reset(token)
+
+
+def _create_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "database":
+        return DatabaseRateLimitBackend()
+    return InProcessRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+# Create a singleton instance
+rate_limiter = RateLimiter(
+    backend=_create_backend(),
+    user_limit=RateLimit(settings.RATE_LIMIT_USER_BURST, settings.RATE_LIMIT_USER_PER_MINUTE / 60),
+    endpoint_limits={
+        "rewrite": RateLimit(settings.RATE_LIMIT_REWRITE_TOKEN_BURST, settings.RATE_LIMIT_REWRITE_TOKENS_PER_MINUTE / 60),
+        "transcribe": RateLimit(
+            settings.RATE_LIMIT_TRANSCRIBE_AUDIO_SECONDS_BURST,
+            settings.RATE_LIMIT_TRANSCRIBE_AUDIO_SECONDS_PER_MINUTE / 60,
+        ),
+    },
+    enabled=settings.RATE_LIMIT_ENABLED,
+    metrics=registry,
+)
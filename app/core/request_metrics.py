@@ -0,0 +1,57 @@
+"""
+Per-route HTTP request metrics.
+
+Requests are labelled with the matched route template rather than the raw path
+so path parameters and unknown URLs cannot grow the number of series.
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import MetricsRegistry
+
+# Route label for requests that did not match any route
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app: ASGIApp, metrics: MetricsRegistry):
+        self.app = app
+        self._requests = metrics.counter(
+            "http_requests_total", "HTTP requests handled", labelnames=("method", "route", "status")
+        )
+        self._duration = metrics.histogram(
+            "http_request_duration_seconds",
+            "Time from receiving a request until its response completed",
+            labelnames=("method", "route"),
+        )
+        self._in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        self._in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._in_flight.dec()
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            self._duration.labels(method, route_path).observe(elapsed)
+            self._requests.labels(method, route_path, str(status_code)).inc()
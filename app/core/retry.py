@@ -0,0 +1,183 @@
+"""
+Retries with jittered exponential backoff for calls to upstream providers.
+
+Transient failures (timeouts, dropped connections, 408, 409, 429 and 5xx
+responses) are retried with full-jitter exponential backoff, waiting at least
+as long as the upstream's ``Retry-After`` asks. Every attempt's timeout and
+every wait is capped by the request deadline, and a retry that cannot start
+before the deadline is not made.
+"""
+import asyncio
+import random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+from app.core.deadline import DeadlineExceeded, bounded_timeout, remaining
+from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry
+
+# Create logger
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Upstream statuses worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Get the wait an upstream asked for in a failed response.
+
+    Reads ``retry-after-ms`` or ``retry-after`` (seconds or an HTTP date)
+    from the response attached to the error, if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a failed call."""
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay_seconds: float,
+        max_delay_seconds: float,
+        attempt_timeout_seconds: Optional[float] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+        rng: Optional[random.Random] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        Args:
+            max_attempts: Attempts in total, including the first
+            base_delay_seconds: Backoff cap before the first retry, doubled per retry
+            max_delay_seconds: Largest backoff cap
+            attempt_timeout_seconds: Timeout of each attempt, further capped by the deadline
+            retry_on: Exception types that are always transient, besides timeouts and connection errors
+            rng: Random source for the jitter
+            metrics: Registry for retry metrics
+        """
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.attempt_timeout_seconds = attempt_timeout_seconds
+        self.retry_on = retry_on
+        self._random = rng or random.Random()
+
+        self.retries = metrics.counter(
+            "provider_retries_total", "Provider calls retried after a transient failure", labelnames=("operation",)
+        )
+        self.deadline_exceeded = metrics.counter(
+            "provider_deadline_exceeded_total", "Provider calls abandoned at the request deadline", labelnames=("operation",)
+        )
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Check whether a failed attempt is worth retrying."""
+        if isinstance(error, (TimeoutError, ConnectionError) + self.retry_on):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+    def delay(self, retry: int, error: BaseException) -> float:
+        """
+        Time to wait before a retry: full jitter, but never less than Retry-After.
+
+        Args:
+            retry: Retry number, starting at 0
+            error: Error of the failed attempt
+        """
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * 2 ** retry)
+        backoff = self._random.uniform(0, cap)
+        retry_after = retry_after_seconds(error)
+        return backoff if retry_after is None else max(backoff, retry_after)
+
+
+async def call_with_retries(
+    operation: Callable[[Optional[float]], Awaitable[T]],
+    policy: RetryPolicy,
+    name: str,
+) -> T:
+    """
+    Call an operation, retrying transient failures within the request deadline.
+
+    Args:
+        operation: Makes one attempt, given the timeout it must finish within
+        policy: Retry policy
+        name: Operation name for logs and metrics
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before an attempt succeeds
+        Exception: The last attempt's error once retries are exhausted or not worthwhile
+    """
+    retries = policy.retries.labels(name)
+    deadline_exceeded = policy.deadline_exceeded.labels(name)
+
+    attempt = 0
+    while True:
+        # Set when the deadline, rather than the attempt timeout, ends this attempt
+        deadline_timeout = None
+        try:
+            timeout = bounded_timeout(policy.attempt_timeout_seconds)
+            if timeout is None:
+                return await operation(None)
+            scope = asyncio.timeout(timeout)
+            if timeout != policy.attempt_timeout_seconds:
+                deadline_timeout = scope
+            async with scope:
+                return await operation(timeout)
+        except DeadlineExceeded:
+            deadline_exceeded.inc()
+            raise
+        except Exception as e:
+            attempt += 1
+            if remaining() == 0 or (deadline_timeout is not None and deadline_timeout.expired()):
+                deadline_exceeded.inc()
+                raise DeadlineExceeded(f"Request deadline exceeded during {name}") from e
+            if attempt >= policy.max_attempts or not policy.is_retryable(e):
+                raise
+
+            delay = policy.delay(attempt - 1, e)
+            left = remaining()
+            if left is not None and delay >= left:
+                # The retry could not finish in time; fail now rather than at the deadline
+                logger.warning("Not retrying past the request deadline", operation=name, delay=delay, remaining=left)
+                raise
+
+            retries.inc()
+            logger.warning(
+                "Retrying provider call",
+                operation=name,
+                attempt=attempt,
+                delay=round(delay, 3),
+                error=str(e),
+                status_code=getattr(e, "status_code", None),
+            )
+            await asyncio.sleep(delay)
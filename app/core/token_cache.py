@@ -0,0 +1,200 @@
+"""
+Bounded cache of verified access tokens.
+
+Clients reuse the same access token for many requests, so the decoded payload
+is cached on a digest of the token. Entries never outlive the token's ``exp``
+claim nor ``TOKEN_CACHE_TTL_SECONDS``, and can be dropped explicitly when a
+token or subject is revoked. A revoked subject's tokens issued before the
+revocation stay rejected until they would have expired anyway. Revocations are
+published on an invalidation channel, which with ``INVALIDATION_BACKEND=database``
+carries them to every worker, including ones started after the revocation.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Union
+
+from app.core.config import settings
+from app.core.invalidation import InvalidationChannel, create_channel
+from app.core.metrics import MetricsRegistry, registry
+from app.models.api.schemas import TokenData
+
+
+class _Entry(NamedTuple):
+    token_data: TokenData
+    expires_at: float
+
+
+class TokenVerificationCache:
+    """LRU cache of verified token payloads with expiry-aware eviction."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        token_lifetime_seconds: float = 0,
+        channel: Optional[InvalidationChannel] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._token_lifetime_seconds = token_lifetime_seconds
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._revoked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._channel = channel
+        if channel is not None:
+            channel.subscribe(self._on_revocation)
+
+        self._hits = metrics.counter("auth_token_cache_hits_total", "Access token verifications served from cache")
+        self._misses = metrics.counter("auth_token_cache_misses_total", "Access token verifications that required a full decode")
+        self._evictions = metrics.counter("auth_token_cache_evictions_total", "Cached tokens evicted on expiry, capacity or revocation")
+        self._size = metrics.gauge("auth_token_cache_size", "Number of cached access tokens")
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def get(self, token: str) -> Optional[TokenData]:
+        """
+        Get the cached payload for a token.
+
+        Args:
+            token: Encoded JWT
+
+        Returns:
+            The cached token data, or None if the token is not cached or expired
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses.inc()
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                self._evictions.inc()
+                self._size.set(len(self._entries))
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+        self._hits.inc()
+        return entry.token_data
+
+    def put(self, token: str, token_data: TokenData, exp: Optional[Union[int, float]]) -> None:
+        """
+        Cache the payload of a verified token.
+
+        Args:
+            token: Encoded JWT
+            token_data: Decoded token data
+            exp: The token's ``exp`` claim as a Unix timestamp; tokens without
+                one are not cached
+        """
+        if not self.enabled or exp is None:
+            return
+
+        expires_at = min(float(exp), time.time() + self._ttl_seconds)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = _Entry(token_data, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+            self._size.set(len(self._entries))
+
+    def invalidate(self, token: str) -> None:
+        """Drop a single revoked token."""
+        with self._lock:
+            if self._entries.pop(self._key(token), None) is not None:
+                self._evictions.inc()
+                self._size.set(len(self._entries))
+
+    def invalidate_subject(self, email: str) -> None:
+        """
+        Drop every cached token issued to the given subject, on every worker.
+
+        The subject's tokens issued until now are also remembered as revoked,
+        so they are rejected when decoded again; see ``is_revoked``.
+        """
+        revoked_at = time.time()
+        self._revoke(email, revoked_at)
+        if self._channel is not None:
+            self._channel.publish(f"{revoked_at!r} {email}")
+
+    def is_revoked(self, email: str, issued_at: Optional[Union[int, float]]) -> bool:
+        """
+        Check whether a token was issued before its subject was revoked.
+
+        Args:
+            email: Token subject
+            issued_at: The token's ``iat`` claim as a Unix timestamp; tokens
+                without one count as issued before any revocation
+
+        Returns:
+            True if the token must be rejected
+        """
+        with self._lock:
+            revoked_at = self._revoked_at.get(email)
+        if revoked_at is None:
+            return False
+        return issued_at is None or float(issued_at) < revoked_at
+
+    def clear(self) -> None:
+        """Drop every cached token and revocation, e.g. after a signing key rotation."""
+        with self._lock:
+            self._evictions.inc(len(self._entries))
+            self._entries.clear()
+            self._revoked_at.clear()
+            self._size.set(0)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return hit, miss and eviction counts and the hit rate."""
+        hits, misses = self._hits.value, self._misses.value
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": self._evictions.value,
+            "size": len(self._entries),
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def _on_revocation(self, key: str) -> None:
+        revoked_at, _, email = key.partition(" ")
+        self._revoke(email, float(revoked_at))
+
+    def _revoke(self, email: str, revoked_at: float) -> None:
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.token_data.email == email]
+            for key in keys:
+                del self._entries[key]
+            self._evictions.inc(len(keys))
+            self._size.set(len(self._entries))
+            if self._token_lifetime_seconds > 0:
+                # Tokens issued before older revocations have expired by now
+                cutoff = time.time() - self._token_lifetime_seconds
+                for subject in [s for s, at in self._revoked_at.items() if at <= cutoff]:
+                    del self._revoked_at[subject]
+                if revoked_at > cutoff:
+                    self._revoked_at[email] = max(revoked_at, self._revoked_at.get(email, 0.0))
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+# Create a singleton instance
+token_cache = TokenVerificationCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+    token_lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    channel=create_channel("token_revocations", replay_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60),
+    metrics=registry,
+)
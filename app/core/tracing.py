@@ -0,0 +1,346 @@
+"""
+Lightweight request tracing.
+
+Spans are timed blocks linked into a trace through a context variable, so a
+span opened in a dependency, repository, provider or worker thread (via
+``asyncio.to_thread``) becomes a child of the request span automatically.
+Incoming W3C ``traceparent`` headers are continued and the current context is
+injected into outbound calls with ``trace_headers``. Finished spans go to an
+exporter: in memory for tests, or one JSON object per line in a local file,
+written by a background thread so ending a span never waits on disk I/O.
+
+Tracing is off unless ``TRACING_ENABLED`` is set, in which case ``span`` is a
+no-op that costs a single attribute check.
+"""
+import atexit
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import LogWriter
+from app.core.metrics import MetricsRegistry, registry
+
+# traceparent: version-trace_id-parent_id-flags
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id", "flags",
+        "attributes", "status", "start_time", "duration_ms", "_start",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], flags: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.flags = flags
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Record the span's duration and, if it failed, the error."""
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if error is not None:
+            self.status = "error"
+            self.attributes["error.type"] = type(error).__name__
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _RemoteParent:
+    """Span context received from an upstream service."""
+
+    __slots__ = ("trace_id", "span_id", "flags")
+
+    def __init__(self, trace_id: str, span_id: str, flags: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.flags = flags
+
+
+_current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(ABC):
+    """Abstract interface for span exporters."""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """Export a finished span."""
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in memory, for tests and debugging."""
+
+    def __init__(self):
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Keep a finished span."""
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        """Return finished spans in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """Drop every kept span."""
+        with self._lock:
+            self._spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends finished spans to a local file as JSON lines.
+
+    Spans are queued for a LogWriter thread that owns the file; if the queue
+    is full, spans are dropped and counted rather than blocking the caller.
+    The file is opened and the writer started on the first export.
+    """
+
+    def __init__(self, path: str, max_queue: int, metrics: Optional[MetricsRegistry] = None):
+        self._path = path
+        self._max_queue = max_queue
+        self._metrics = metrics if metrics is not None else MetricsRegistry()
+        self._writer: Optional[LogWriter] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span for the writer thread."""
+        writer = self._writer
+        if writer is None:
+            writer = self._start()
+        writer.put(json.dumps(span.to_dict(), default=str))
+
+    def shutdown(self) -> None:
+        """Write every queued span, stop the writer thread and close the file."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                writer.stop()
+                self._file.close()
+                self._file = None
+
+    def _start(self) -> LogWriter:
+        with self._lock:
+            if self._writer is None:
+                self._file = open(self._path, "a", encoding="utf-8")
+                writer = LogWriter(self._file, max_queue=self._max_queue, metrics=self._metrics, name="span")
+                writer.start()
+                self._writer = writer
+            return self._writer
+
+    def _reset_after_fork(self) -> None:
+        # The writer thread does not exist in a forked child; reopen on the next export
+        self._lock = threading.Lock()
+        self._writer = None
+        self._file = None
+
+
+class _NoopScope:
+    """Context manager used while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+class _SpanScope:
+    __slots__ = ("_exporter", "_span", "_token")
+
+    def __init__(self, exporter: SpanExporter, span: Span):
+        self._exporter = exporter
+        self._span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._span.end(exc)
+        _current_span.reset(self._token)
+        self._exporter.export(self._span)
+
+
+class Tracer:
+    """Creates spans and sends them to an exporter."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, parent: Optional[Any] = None, **attributes: Any):
+        """
+        Context manager timing a block as a span.
+
+        Args:
+            name: Span name
+            parent: Parent span context, defaults to the current span
+            **attributes: Span attributes
+
+        Returns:
+            A context manager yielding the Span, or None while tracing is disabled
+        """
+        if self.exporter is None:
+            return _NOOP_SCOPE
+        if parent is None:
+            parent = _current_span.get()
+        if parent is None:
+            span = Span(name, f"{random.getrandbits(128):032x}", None, "01", attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, parent.flags, attributes)
+        return _SpanScope(self.exporter, span)
+
+
+def traced(name: str) -> Callable:
+    """Decorator running an async function inside a span."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    """Get the span of the current context, if any."""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Parse a W3C traceparent header.
+
+    Returns:
+        Tuple of trace id, parent span id and flags, or None if invalid
+    """
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, flags
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers propagating the current trace context to an outbound call."""
+    span = current_span()
+    return {"traceparent": span.traceparent} if span is not None else {}
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request, continuing incoming traces."""
+
+    def __init__(self, app: ASGIApp, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parsed = parse_traceparent(value.decode("latin-1"))
+                if parsed is not None:
+                    parent = _RemoteParent(*parsed)
+                break
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with self.tracer.span(f"{scope['method']} {scope['path']}", parent=parent) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status_code)
+
+
+def _create_exporter() -> Optional[SpanExporter]:
+    if not settings.TRACING_ENABLED:
+        return None
+    if settings.TRACING_EXPORTER == "memory":
+        return InMemorySpanExporter()
+    return FileSpanExporter(settings.TRACING_FILE_PATH, max_queue=settings.TRACING_QUEUE_SIZE, metrics=registry)
+
+
+# Create a singleton instance
+tracer = Tracer(exporter=_create_exporter())
+
+
+def shutdown_tracing() -> None:
+    """Write every queued span and stop the exporter's writer thread."""
+    if isinstance(tracer.exporter, FileSpanExporter):
+        tracer.exporter.shutdown()
+
+
+atexit.register(shutdown_tracing)
+if isinstance(tracer.exporter, FileSpanExporter):
+    os.register_at_fork(after_in_child=tracer.exporter._reset_after_fork)
@@ -0,0 +1,188 @@
+"""
+Per-tier limits on transcription uploads.
+
+Oversized uploads are rejected as early, and so as cheaply, as possible:
+
+1. ``UploadLimitMiddleware`` rejects a request whose ``Content-Length``
+   exceeds the user's byte limit with a 413 before any of the body is read,
+   and cuts off bodies sent without a length once they exceed it.
+2. The transcription handler checks the exact file size, then probes the
+   container header and rejects audio longer than the user's audio seconds
+   limit before it is copied to disk or decoded.
+3. The header is written by the client, so a provider that decodes the audio
+   checks the decoded length against the same limit before transcribing it.
+
+The tier is read from the access token, so the middleware needs no user lookup.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import authenticated_token
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry, registry
+
+# Allowance for the multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD_BYTES = 16384
+
+DEFAULT_TIER = "free"
+
+
+class UploadLimit(NamedTuple):
+    """Upload limits of a tier."""
+    max_bytes: int
+    max_audio_seconds: float
+
+
+class UploadLimits:
+    """Upload limits by tier, with rejection counting."""
+
+    def __init__(
+        self,
+        tiers: Dict[str, UploadLimit],
+        default_tier: str = DEFAULT_TIER,
+        enabled: bool = True,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self.tiers = tiers
+        self.default_tier = default_tier
+        self.enabled = enabled
+
+        self._rejected = metrics.counter(
+            "upload_rejected_total", "Uploads rejected before transcription, by reason", labelnames=("reason",)
+        )
+
+    def for_tier(self, tier: Optional[str]) -> UploadLimit:
+        """Get the limits of a tier; unknown tiers get the default tier's."""
+        return self.tiers.get(tier or self.default_tier) or self.tiers[self.default_tier]
+
+    def check_size(self, tier: Optional[str], size: Optional[int]) -> None:
+        """
+        Check the size of an uploaded file.
+
+        Raises:
+            HTTPException: 413 if the file exceeds the tier's byte limit
+        """
+        limit = self.for_tier(tier)
+        if self.enabled and size is not None and size > limit.max_bytes:
+            raise self.reject("file_size", f"Audio file exceeds the {limit.max_bytes} byte upload limit")
+
+    def check_audio_seconds(self, tier: Optional[str], seconds: float) -> None:
+        """
+        Check the duration of uploaded audio.
+
+        Raises:
+            HTTPException: 413 if the audio exceeds the tier's duration limit
+        """
+        limit = self.for_tier(tier)
+        if self.enabled and seconds > limit.max_audio_seconds:
+            raise self.reject(
+                "audio_seconds", f"Audio is longer than the {limit.max_audio_seconds:g} second upload limit"
+            )
+
+    def max_audio_seconds(self, tier: Optional[str]) -> Optional[float]:
+        """Get the tier's audio duration limit, or None while limits are disabled."""
+        return self.for_tier(tier).max_audio_seconds if self.enabled else None
+
+    def reject(
+        self, reason: str, detail: str, status_code: int = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    ) -> HTTPException:
+        """Count a rejected upload and build the exception to raise for it."""
+        self._rejected.labels(reason).inc()
+        return HTTPException(status_code=status_code, detail=detail)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware enforcing upload byte limits before the body is read.
+
+    Applies to POST requests to the configured paths with a valid bearer
+    token; anything else passes through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, limits: UploadLimits, paths: List[str]):
+        self.app = app
+        self.limits = limits
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.limits.enabled
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        token_data = authenticated_token(scope)
+        if token_data is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.for_tier(token_data.tier)
+        max_body_bytes = limit.max_bytes + MULTIPART_OVERHEAD_BYTES
+        detail = f"Upload exceeds the {limit.max_bytes} byte limit"
+
+        content_length = _content_length(scope)
+        if content_length is not None:
+            if content_length > max_body_bytes:
+                exc = self.limits.reject("content_length", detail)
+                await JSONResponse({"detail": exc.detail}, status_code=exc.status_code)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        # No length up front; count the body as it arrives and stop reading it
+        # once it is too large, replacing whatever the app answers with a 413
+        received = 0
+        exceeded = False
+
+        async def receive_limited() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_exceeded(message: Message) -> None:
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, receive_limited, send_unless_exceeded)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            exc = self.limits.reject("body_size", detail)
+            await JSONResponse({"detail": exc.detail}, status_code=exc.status_code)(scope, receive, send)
+
+
+def _content_length(scope: Scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+# Create a singleton instance
+upload_limits = UploadLimits(
+    tiers={
+        "free": UploadLimit(settings.TRANSCRIBE_FREE_MAX_BYTES, settings.TRANSCRIBE_FREE_MAX_AUDIO_SECONDS),
+        "pro": UploadLimit(settings.TRANSCRIBE_PRO_MAX_BYTES, settings.TRANSCRIBE_PRO_MAX_AUDIO_SECONDS),
+    },
+    enabled=settings.UPLOAD_LIMITS_ENABLED,
+    metrics=registry,
+)
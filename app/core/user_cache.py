@@ -0,0 +1,113 @@
+"""
+Read-through cache of authenticated users.
+
+Every authenticated request resolves the token subject to a user to check
+``is_active``. Users are cached by email for ``USER_CACHE_TTL_SECONDS`` and
+invalidated explicitly whenever the repository updates them. With
+``INVALIDATION_BACKEND=memory`` the invalidation only reaches this worker, so
+other worker processes keep serving their copy for up to
+``USER_CACHE_TTL_SECONDS``; with ``database`` they drop it within
+``INVALIDATION_POLL_SECONDS``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.invalidation import InvalidationChannel, create_channel
+from app.core.metrics import MetricsRegistry, registry
+from app.models.api.schemas import User
+
+
+class _Entry(NamedTuple):
+    user: User
+    expires_at: float
+
+
+class UserCache:
+    """Bounded TTL cache of users keyed by email."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        channel: Optional[InvalidationChannel] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._channel = channel
+        if channel is not None:
+            channel.subscribe(self._drop)
+
+        self._hits = metrics.counter("user_cache_hits_total", "Authenticated user lookups served from cache")
+        self._misses = metrics.counter("user_cache_misses_total", "Authenticated user lookups that required a DB query")
+        self._invalidations = metrics.counter("user_cache_invalidations_total", "Cached users dropped after an update")
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._ttl_seconds > 0
+
+    def get(self, email: str) -> Optional[User]:
+        """
+        Get a cached user.
+
+        Args:
+            email: User email
+
+        Returns:
+            The cached user, or None if not cached or expired
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[email]
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(email)
+        self._hits.inc()
+        return entry.user
+
+    def put(self, user: User) -> None:
+        """Cache a user loaded from the database."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[user.email] = _Entry(user, time.monotonic() + self._ttl_seconds)
+            self._entries.move_to_end(user.email)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        """Drop a user on this worker and publish the invalidation to the others."""
+        self._drop(email)
+        if self._channel is not None:
+            self._channel.publish(email)
+
+    def clear(self) -> None:
+        """Drop every cached user on this worker."""
+        with self._lock:
+            self._entries.clear()
+
+    def _drop(self, email: str) -> None:
+        with self._lock:
+            if self._entries.pop(email, None) is not None:
+                self._invalidations.inc()
+
+
+# Create a singleton instance
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    channel=create_channel("users"),
+    metrics=registry,
+)
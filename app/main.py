@@ -1,37 +1,68 @@
+import time
+
+# Taken before anything else is imported, so the startup report covers every import
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.api import root_router
 from app.core.config import settings
-from app.core.logging import configure_logging
+from app.core.logging import configure_logging, shutdown_logging
 from app.core.database import init_db, close_db
+from app.core.deadline import DeadlineMiddleware
+from app.core.auth import password_hasher
 from app.core.logging import get_logger
+from app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from app.core.invalidation import start_channels, stop_channels
+from app.core.metrics import registry
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.startup import startup_timer
+from app.core.tracing import TracingMiddleware, shutdown_tracing, tracer
+from app.core.upload_limits import UploadLimitMiddleware, upload_limits
 from app.core.test_seeder import seed_db
+from app.services.auth.session_service import session_cleanup
+from app.services.usage.usage_service import usage_recorder
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Configure logging
-    configure_logging()
+    with startup_timer.phase("configure_logging"):
+        configure_logging()
     logger = get_logger(__name__)
     
     # Startup: Initialize connections
     logger.info("Starting application...")
-    await init_db()
+    with startup_timer.phase("init_db"):
+        await init_db()
     logger.info("Database initialized")
+    with startup_timer.phase("start_background_tasks"):
+        session_cleanup.start()
+        usage_recorder.start()
+        start_channels()
 
     # Seed database
     logger.info("Seeding initiated...")
-    await seed_db()
+    with startup_timer.phase("seed_db"):
+        await seed_db()
     logger.info("Seeding completed")
     
-    logger.info("Application started successfully")
+    logger.info("Application started successfully", startup_ms=startup_timer.report())
     
     yield
     
     # Shutdown: Clean up connections
     logger.info("Shutting down application...")
+    await session_cleanup.stop()
+    await usage_recorder.stop()
+    await stop_channels()
     await close_db()
+    password_hasher.shutdown()
+    shutdown_tracing()
+    shutdown_logging()
 
 # Create FastAPI app
 app = FastAPI(
@@ -44,6 +75,43 @@ app = FastAPI(
         }
 )
 
+# Deduplicate retries innermost, so a replayed response is not charged to the
+# user's endpoint budget again
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=idempotency_store,
+    paths=["/api/v1/rewrite", "/api/v1/transcribe"],
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_ttl_seconds=settings.IDEMPOTENCY_LOCK_TTL_SECONDS,
+    wait_timeout_seconds=settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS,
+    max_response_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+    enabled=settings.IDEMPOTENCY_ENABLED,
+    metrics=registry,
+)
+
+# Reject oversized uploads by Content-Length before anything inside reads the body
+app.add_middleware(UploadLimitMiddleware, limits=upload_limits, paths=["/api/v1/transcribe"])
+
+# Rate limit authenticated requests; added before CORS so 429s carry CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    endpoints={
+        "/api/v1/rewrite": "rewrite",
+        "/api/v1/transcribe": "transcribe",
+    },
+)
+
+# Give provider-backed requests a deadline for queueing and provider calls;
+# added before CORS so 400s for a bad X-Request-Timeout carry CORS headers
+app.add_middleware(
+    DeadlineMiddleware,
+    defaults={
+        "/api/v1/rewrite": settings.REWRITE_DEADLINE_SECONDS,
+        "/api/v1/transcribe": settings.TRANSCRIBE_DEADLINE_SECONDS,
+    },
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -60,9 +128,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request metrics outermost so every response, including CORS and
+# rate limit rejections, is counted
+app.add_middleware(RequestMetricsMiddleware, metrics=registry)
+
+# Open the request span outermost so it covers every other middleware
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Include API routes
 app.include_router(root_router, prefix="/api")
 
 @app.get("/", tags=["default"])
 async def root():
     return {"message": "Welcome to SayWrite API"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        """Expose metrics in the Prometheus text format."""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# Everything imported and registered; lifespan steps are timed as they run
+startup_timer.record("import", time.perf_counter() - _import_started)
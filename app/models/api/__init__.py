@@ -1,17 +1,28 @@
-from .schemas import HealthResponse, TranscribeResponse, Glossary, Profile, RewriteOptions, RewriteRequest, UsageMetrics, RewriteResponse, UserCreate, UserLogin, User, Token, TokenRefresh, TokenData
+from .schemas import HealthResponse, TranscribeResponse, TranscribeSegmentEvent, TranscribeFinalEvent, TranscribeErrorEvent, Glossary, Profile, StoredProfile, RewriteOptions, RewriteRequest, UsageMetrics, RewriteResponse, UsageEvent, UsageTotals, EndpointUsage, DailyUsage, UsageSummaryResponse, DailyUsageResponse, UserCreate, UserLogin, User, UserSession, Token, TokenRefresh, TokenData
 
 __all__ = [
     "HealthResponse",
     "TranscribeResponse",
+    "TranscribeSegmentEvent",
+    "TranscribeFinalEvent",
+    "TranscribeErrorEvent",
     "Glossary",
     "Profile",
+    "StoredProfile",
     "RewriteOptions",
     "RewriteRequest",
     "UsageMetrics",
     "RewriteResponse",
+    "UsageEvent",
+    "UsageTotals",
+    "EndpointUsage",
+    "DailyUsage",
+    "UsageSummaryResponse",
+    "DailyUsageResponse",
     "UserCreate",
     "UserLogin",
     "User",
+    "UserSession",
     "Token",
     "TokenRefresh",
     "TokenData",
@@ -1,10 +1,12 @@
+from datetime import datetime
 from typing import Dict, List, Optional, Literal
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, PrivateAttr, model_validator
 
 
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str = "ok"
+    database: str = "ok"
 
 
 class TranscribeResponse(BaseModel):
@@ -12,6 +14,30 @@ class TranscribeResponse(BaseModel):
     text: str
 
 
+class TranscribeSegmentEvent(BaseModel):
+    """Streamed transcription event for a single decoded segment."""
+    event: Literal["segment"] = "segment"
+    text: str
+    start: float
+    end: float
+    avg_logprob: Optional[float] = None
+
+
+class TranscribeFinalEvent(BaseModel):
+    """Final streamed transcription event with the full text and timings."""
+    event: Literal["final"] = "final"
+    text: str
+    stt_ms: int
+    duration: Optional[float] = None
+    language: Optional[str] = None
+
+
+class TranscribeErrorEvent(BaseModel):
+    """Streamed transcription event emitted when decoding fails mid-stream."""
+    event: Literal["error"] = "error"
+    detail: str
+
+
 # Use a type alias instead of subclassing Dict so Pydantic v2 can generate a schema
 Glossary = Dict[str, str]
 
@@ -26,20 +52,44 @@ class Profile(BaseModel):
     audience: Optional[str] = None
     glossary: Optional[Glossary] = None
     max_words: Optional[int] = 350
+    # "rules" rewrites without the LLM unless the request asks for a provider
+    rewrite_mode: Literal["llm", "rules"] = "llm"
+    # Removed by rule-based rewrites, in addition to RULES_FILLER_WORDS
+    filler_words: Optional[List[str]] = None
+    # System prompt compiled when the profile was stored; never serialized
+    _system_prompt: Optional[str] = PrivateAttr(default=None)
+
+
+class StoredProfile(Profile):
+    """Profile stored on the server, referenced by ID from rewrite requests."""
+    version: int
+    etag: str
 
 
 class RewriteOptions(BaseModel):
     """Options for rewrite requests."""
     temperature: float = 0.5
-    provider_hint: Optional[Literal["openai", "local"]] = None
+    provider_hint: Optional[Literal["openai", "local", "rules"]] = None
 
 
 class RewriteRequest(BaseModel):
     """Request model for rewrite endpoint."""
     transcript: str
-    profile: Profile
+    profile: Optional[Profile] = None
+    # Reference to a stored profile instead of sending it inline
+    profile_id: Optional[str] = None
+    profile_version: Optional[int] = None
     options: Optional[RewriteOptions] = Field(default_factory=RewriteOptions)
 
+    @model_validator(mode="after")
+    def check_profile(self) -> "RewriteRequest":
+        """Require exactly one of an inline profile or a stored profile ID."""
+        if (self.profile is None) == (self.profile_id is None):
+            raise ValueError("Send either profile or profile_id")
+        if self.profile_version is not None and self.profile_id is None:
+            raise ValueError("profile_version requires profile_id")
+        return self
+
 
 class UsageMetrics(BaseModel):
     """Usage metrics for API calls."""
@@ -53,6 +103,51 @@ class RewriteResponse(BaseModel):
     usage: UsageMetrics
 
 
+class UsageEvent(BaseModel):
+    """Usage of a single metered request."""
+    user_id: str
+    endpoint: str
+    stt_ms: int = 0
+    llm_ms: int = 0
+    audio_seconds: Optional[float] = None
+    estimated_tokens: Optional[int] = None
+    occurred_at: datetime
+
+
+class UsageTotals(BaseModel):
+    """Aggregated usage over a set of requests."""
+    requests: int = 0
+    stt_ms: int = 0
+    llm_ms: int = 0
+    audio_seconds: float = 0.0
+    estimated_tokens: int = 0
+
+
+class EndpointUsage(UsageTotals):
+    """Aggregated usage of one endpoint."""
+    endpoint: str
+
+
+class DailyUsage(UsageTotals):
+    """Aggregated usage of one day (UTC)."""
+    day: str
+
+
+class UsageSummaryResponse(BaseModel):
+    """Response model for the usage summary endpoint."""
+    start: datetime
+    end: datetime
+    total: UsageTotals
+    endpoints: List[EndpointUsage]
+
+
+class DailyUsageResponse(BaseModel):
+    """Response model for the daily usage endpoint."""
+    start: datetime
+    end: datetime
+    days: List[DailyUsage]
+
+
 # Authentication schemas
 class UserCreate(BaseModel):
     """Schema for user registration."""
@@ -64,6 +159,7 @@ class UserLogin(BaseModel):
     """Schema for user login."""
     email: EmailStr
     password: str
+    device: Optional[str] = Field(None, max_length=255)
 
 
 class User(BaseModel):
@@ -71,8 +167,18 @@ class User(BaseModel):
     id: str
     email: str
     is_active: bool = True
+    tier: str = "free"
     created_at: str
-    refresh_token: Optional[str] = None
+
+
+class UserSession(BaseModel):
+    """Refresh token session for one signed-in device."""
+    id: str
+    user_id: str
+    email: str
+    tier: str = "free"
+    device: Optional[str] = None
+    expires_at: str
 
 
 class Token(BaseModel):
@@ -89,3 +195,5 @@ class TokenRefresh(Token):
 class TokenData(BaseModel):
     """Token payload data."""
     email: Optional[str] = None
+    tier: Optional[str] = None
+    user_id: Optional[str] = None
@@ -1,5 +1,17 @@
 from .user import UserModel
+from .session import UserSessionModel
+from .usage import UsageEventModel
+from .profile import ProfileModel
+from .idempotency import IdempotencyKeyModel
+from .rate_limit import RateLimitBucketModel
+from .invalidation import InvalidationModel
 
 __all__ = [
     "UserModel",
+    "UserSessionModel",
+    "UsageEventModel",
+    "ProfileModel",
+    "IdempotencyKeyModel",
+    "RateLimitBucketModel",
+    "InvalidationModel",
 ]
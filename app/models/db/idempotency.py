@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Float, Integer, JSON, LargeBinary
+
+from app.core.database import BaseModel
+
+class IdempotencyKeyModel(BaseModel):
+    """SQLAlchemy idempotency key model, one row per claimed key shared by every worker."""
+    __tablename__ = "idempotency_keys"
+
+    # "<subject>:<Idempotency-Key>"
+    key = Column(String(512), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    # Response fields; NULL while the first request is still running
+    status = Column(Integer, nullable=True)
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    # Unix time, so expiry is comparable across workers and hosts
+    expires_at = Column(Float, index=True, nullable=False)
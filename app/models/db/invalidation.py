@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Float, Index, Integer, String
+
+from app.core.database import BaseModel
+
+class InvalidationModel(BaseModel):
+    """SQLAlchemy invalidation model, one row per key published to every worker."""
+    __tablename__ = "invalidations"
+    # Workers poll each topic for recently published keys
+    __table_args__ = (
+        Index("ix_invalidations_topic_published_at", "topic", "published_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(String(64), nullable=False)
+    key = Column(String(512), nullable=False)
+    # Unix time, so publications are comparable across workers and hosts
+    published_at = Column(Float, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, JSON, Text, UniqueConstraint, UUID
+import uuid
+
+from app.core.database import BaseModel
+
+class ProfileModel(BaseModel):
+    """SQLAlchemy rewrite profile model, one row per stored profile of a user."""
+    __tablename__ = "profiles"
+    # Profiles are looked up by their owner and the client-chosen ID
+    __table_args__ = (
+        UniqueConstraint("user_id", "profile_id", name="uq_profiles_user_id_profile_id"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    profile_id = Column(String(64), nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    # Hash of the profile content, served as its ETag
+    etag = Column(String(64), nullable=False)
+    # Profile fields as validated when it was stored
+    data = Column(JSON, nullable=False)
+    # System prompt compiled from the profile when it was stored
+    system_prompt = Column(Text, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Float
+
+from app.core.database import BaseModel
+
+class RateLimitBucketModel(BaseModel):
+    """SQLAlchemy token bucket model, one row per user and bucket shared by every worker."""
+    __tablename__ = "rate_limit_buckets"
+
+    # "user:<subject>" or "<endpoint>:<subject>"
+    key = Column(String(320), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Unix time the bucket was last refilled
+    refilled_at = Column(Float, nullable=False)
+    # Unix time the bucket is full again and the row can be dropped
+    expires_at = Column(Float, index=True, nullable=False)
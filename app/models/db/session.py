@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, UUID
+import uuid
+
+from app.core.database import BaseModel
+
+class UserSessionModel(BaseModel):
+    """SQLAlchemy refresh token session model, one row per signed-in device."""
+    __tablename__ = "user_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # SHA-256 of the refresh token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    device = Column(String, nullable=True)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Index, Integer, UUID
+import uuid
+
+from app.core.database import BaseModel
+
+class UsageEventModel(BaseModel):
+    """SQLAlchemy usage event model, one row per metered request."""
+    __tablename__ = "usage_events"
+    # Every aggregate query is per user over a time range
+    __table_args__ = (
+        Index("ix_usage_events_user_id_occurred_at", "user_id", "occurred_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint = Column(String(32), nullable=False)
+    stt_ms = Column(Integer, nullable=False, default=0)
+    llm_ms = Column(Integer, nullable=False, default=0)
+    audio_seconds = Column(Float, nullable=True)
+    estimated_tokens = Column(Integer, nullable=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
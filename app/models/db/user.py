@@ -11,4 +11,5 @@ class UserModel(BaseModel):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
-    refresh_token = Column(String, nullable=True)
+    # Plan the user is on; selects their upload limits
+    tier = Column(String(32), default="free", server_default="free", nullable=False)
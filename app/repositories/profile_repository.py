@@ -0,0 +1,138 @@
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, select, update
+
+from app.models.db import ProfileModel
+from app.models.api.schemas import Profile, StoredProfile
+from app.core.tracing import traced
+
+
+class ProfileRepositoryInterface(ABC):
+    """Abstract interface for stored profile repository."""
+
+    @abstractmethod
+    async def get_profile(self, user_id: str, profile_id: str) -> Optional[StoredProfile]:
+        """Get a user's stored profile by its ID."""
+        pass
+
+    @abstractmethod
+    async def save_profile(
+        self,
+        user_id: str,
+        profile: Profile,
+        etag: str,
+        system_prompt: str,
+        expected_version: Optional[int] = None,
+    ) -> Optional[StoredProfile]:
+        """Create a profile, or replace the given version of it, and return what was stored."""
+        pass
+
+    @abstractmethod
+    async def delete_profile(self, user_id: str, profile_id: str) -> bool:
+        """Delete a user's stored profile."""
+        pass
+
+
+class SQLAlchemyProfileRepository(ProfileRepositoryInterface):
+    """SQLAlchemy implementation of stored profile repository."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @traced("profile_repository.get_profile")
+    async def get_profile(self, user_id: str, profile_id: str) -> Optional[StoredProfile]:
+        """Get a user's stored profile, a single lookup on the (user_id, profile_id) index."""
+        result = await self.db.execute(
+            select(ProfileModel).filter(
+                ProfileModel.user_id == uuid.UUID(str(user_id)),
+                ProfileModel.profile_id == profile_id,
+            )
+        )
+        db_profile = result.scalar_one_or_none()
+        if db_profile:
+            return self._model_to_schema(db_profile)
+        return None
+
+    @traced("profile_repository.save_profile")
+    async def save_profile(
+        self,
+        user_id: str,
+        profile: Profile,
+        etag: str,
+        system_prompt: str,
+        expected_version: Optional[int] = None,
+    ) -> Optional[StoredProfile]:
+        """
+        Create a profile, or replace the given version of it, and return what was stored.
+
+        Args:
+            user_id: Owner of the profile
+            profile: Validated profile
+            etag: Hash of the profile content
+            system_prompt: System prompt compiled from the profile
+            expected_version: Version being replaced, or None to create the profile
+
+        Returns:
+            The stored profile, or None if it was created or changed concurrently
+        """
+        data = profile.model_dump(exclude={"id"})
+        if expected_version is None:
+            db_profile = ProfileModel(
+                user_id=uuid.UUID(str(user_id)),
+                profile_id=profile.id,
+                version=1,
+                etag=etag,
+                data=data,
+                system_prompt=system_prompt,
+            )
+            try:
+                self.db.add(db_profile)
+                await self.db.commit()
+            except IntegrityError:
+                await self.db.rollback()
+                return None
+            return self._model_to_schema(db_profile)
+
+        # Compare-and-set on the version, so concurrent writers cannot both win
+        result = await self.db.execute(
+            update(ProfileModel)
+            .where(
+                ProfileModel.user_id == uuid.UUID(str(user_id)),
+                ProfileModel.profile_id == profile.id,
+                ProfileModel.version == expected_version,
+            )
+            .values(version=expected_version + 1, etag=etag, data=data, system_prompt=system_prompt)
+            .returning(ProfileModel)
+        )
+        db_profile = result.scalar_one_or_none()
+        if db_profile is None:
+            return None
+        await self.db.commit()
+        return self._model_to_schema(db_profile)
+
+    @traced("profile_repository.delete_profile")
+    async def delete_profile(self, user_id: str, profile_id: str) -> bool:
+        """Delete a user's stored profile."""
+        result = await self.db.execute(
+            delete(ProfileModel).where(
+                ProfileModel.user_id == uuid.UUID(str(user_id)),
+                ProfileModel.profile_id == profile_id,
+            )
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+
+    def _model_to_schema(self, db_profile: ProfileModel) -> StoredProfile:
+        """Convert database model to Pydantic schema."""
+        # The data was validated before it was stored, so it is not validated again
+        profile = StoredProfile.model_construct(
+            id=db_profile.profile_id,
+            version=db_profile.version,
+            etag=db_profile.etag,
+            **db_profile.data,
+        )
+        profile._system_prompt = db_profile.system_prompt
+        return profile
@@ -0,0 +1,140 @@
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+
+from app.models.db import UserModel, UserSessionModel
+from app.models.api.schemas import UserSession
+from app.core.auth import hash_refresh_token
+
+
+class SessionRepositoryInterface(ABC):
+    """Abstract interface for refresh token session repository."""
+
+    @abstractmethod
+    async def create_session(self, user_id: str, refresh_token: str, expires_at: datetime, device: Optional[str] = None) -> None:
+        """Create a session for a newly issued refresh token."""
+        pass
+
+    @abstractmethod
+    async def get_active_session(self, refresh_token: str) -> Optional[UserSession]:
+        """Get the unexpired session of an active user for a refresh token."""
+        pass
+
+    @abstractmethod
+    async def rotate_session(self, session_id: str, refresh_token: str, new_refresh_token: str, expires_at: datetime) -> bool:
+        """Replace a session's refresh token, failing if it was already rotated."""
+        pass
+
+    @abstractmethod
+    async def revoke_session(self, refresh_token: str) -> bool:
+        """Revoke the session for a refresh token."""
+        pass
+
+    @abstractmethod
+    async def delete_expired_sessions(self, batch_size: int) -> int:
+        """Delete expired sessions in batches and return how many were deleted."""
+        pass
+
+
+class SQLAlchemySessionRepository(SessionRepositoryInterface):
+    """SQLAlchemy implementation of refresh token session repository."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_session(self, user_id: str, refresh_token: str, expires_at: datetime, device: Optional[str] = None) -> None:
+        """Create a session for a newly issued refresh token."""
+        db_session = UserSessionModel(
+            user_id=uuid.UUID(str(user_id)),
+            token_hash=hash_refresh_token(refresh_token),
+            device=device,
+            expires_at=expires_at,
+        )
+        self.db.add(db_session)
+        await self.db.commit()
+
+    async def get_active_session(self, refresh_token: str) -> Optional[UserSession]:
+        """
+        Get the unexpired session of an active user for a refresh token.
+
+        A single lookup on the unique token hash index, joined to the owner.
+        """
+        result = await self.db.execute(
+            select(UserSessionModel, UserModel.email, UserModel.tier)
+            .join(UserModel, UserModel.id == UserSessionModel.user_id)
+            .filter(
+                UserSessionModel.token_hash == hash_refresh_token(refresh_token),
+                UserSessionModel.expires_at > datetime.now(timezone.utc),
+                UserModel.is_active.is_(True),
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        db_session, email, tier = row
+        return UserSession(
+            id=str(db_session.id),
+            user_id=str(db_session.user_id),
+            email=email,
+            tier=tier,
+            device=db_session.device,
+            expires_at=db_session.expires_at.isoformat(),
+        )
+
+    async def rotate_session(self, session_id: str, refresh_token: str, new_refresh_token: str, expires_at: datetime) -> bool:
+        """
+        Replace a session's refresh token.
+
+        The update is conditional on the current token hash, so two concurrent
+        refreshes with the same token cannot both succeed.
+        """
+        result = await self.db.execute(
+            update(UserSessionModel)
+            .where(
+                UserSessionModel.id == uuid.UUID(str(session_id)),
+                UserSessionModel.token_hash == hash_refresh_token(refresh_token),
+            )
+            .values(token_hash=hash_refresh_token(new_refresh_token), expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def revoke_session(self, refresh_token: str) -> bool:
+        """Revoke the session for a refresh token."""
+        result = await self.db.execute(
+            delete(UserSessionModel)
+            .where(UserSessionModel.token_hash == hash_refresh_token(refresh_token))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def delete_expired_sessions(self, batch_size: int) -> int:
+        """
+        Delete expired sessions in batches and return how many were deleted.
+
+        Each batch is its own short transaction so cleanup never holds locks on
+        a large part of the table.
+        """
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        while True:
+            expired_ids = (
+                select(UserSessionModel.id)
+                .where(UserSessionModel.expires_at <= now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await self.db.execute(
+                delete(UserSessionModel)
+                .where(UserSessionModel.id.in_(expired_ids))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
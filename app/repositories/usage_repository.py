@@ -0,0 +1,115 @@
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, func, insert, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.models.db import UsageEventModel
+from app.models.api.schemas import DailyUsage, EndpointUsage, UsageEvent
+
+
+class UsageRepositoryInterface(ABC):
+    """Abstract interface for usage event repository."""
+
+    @abstractmethod
+    async def insert_events(self, events: Sequence[UsageEvent]) -> None:
+        """Insert a batch of usage events."""
+        pass
+
+    @abstractmethod
+    async def get_usage_by_endpoint(self, user_id: str, start: datetime, end: datetime) -> List[EndpointUsage]:
+        """Get a user's usage per endpoint between start (inclusive) and end (exclusive)."""
+        pass
+
+    @abstractmethod
+    async def get_daily_usage(self, user_id: str, start: datetime, end: datetime) -> List[DailyUsage]:
+        """Get a user's usage per day between start (inclusive) and end (exclusive)."""
+        pass
+
+
+class utc_date(FunctionElement):
+    """Calendar date of a timestamp in UTC, whatever the session's time zone."""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    # SQLite keeps timestamps as the naive UTC strings the application writes
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(utc_date, "postgresql")
+def _compile_utc_date_postgresql(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)} AT TIME ZONE 'UTC')"
+
+
+def _totals():
+    return (
+        func.count().label("requests"),
+        func.coalesce(func.sum(UsageEventModel.stt_ms), 0).label("stt_ms"),
+        func.coalesce(func.sum(UsageEventModel.llm_ms), 0).label("llm_ms"),
+        func.coalesce(func.sum(UsageEventModel.audio_seconds), 0.0).label("audio_seconds"),
+        func.coalesce(func.sum(UsageEventModel.estimated_tokens), 0).label("estimated_tokens"),
+    )
+
+
+class SQLAlchemyUsageRepository(UsageRepositoryInterface):
+    """SQLAlchemy implementation of usage event repository."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def insert_events(self, events: Sequence[UsageEvent]) -> None:
+        """
+        Insert a batch of usage events.
+
+        The batch is sent as a single multi-row INSERT and committed, so it costs
+        one round trip regardless of its size.
+        """
+        rows = [
+            {
+                "user_id": uuid.UUID(event.user_id),
+                "endpoint": event.endpoint,
+                "stt_ms": event.stt_ms,
+                "llm_ms": event.llm_ms,
+                "audio_seconds": event.audio_seconds,
+                "estimated_tokens": event.estimated_tokens,
+                "occurred_at": event.occurred_at,
+            }
+            for event in events
+        ]
+        await self.db.execute(insert(UsageEventModel).values(rows))
+        await self.db.commit()
+
+    async def get_usage_by_endpoint(self, user_id: str, start: datetime, end: datetime) -> List[EndpointUsage]:
+        """Get a user's usage per endpoint, a range scan on (user_id, occurred_at)."""
+        result = await self.db.execute(
+            select(UsageEventModel.endpoint, *_totals())
+            .where(
+                UsageEventModel.user_id == uuid.UUID(user_id),
+                UsageEventModel.occurred_at >= start,
+                UsageEventModel.occurred_at < end,
+            )
+            .group_by(UsageEventModel.endpoint)
+            .order_by(UsageEventModel.endpoint)
+        )
+        return [EndpointUsage(**row._mapping) for row in result]
+
+    async def get_daily_usage(self, user_id: str, start: datetime, end: datetime) -> List[DailyUsage]:
+        """Get a user's usage per day, a range scan on (user_id, occurred_at)."""
+        day = utc_date(UsageEventModel.occurred_at)
+        result = await self.db.execute(
+            select(day.label("day"), *_totals())
+            .where(
+                UsageEventModel.user_id == uuid.UUID(user_id),
+                UsageEventModel.occurred_at >= start,
+                UsageEventModel.occurred_at < end,
+            )
+            .group_by(day)
+            .order_by(day)
+        )
+        return [DailyUsage(**{**row._mapping, "day": str(row.day)}) for row in result]
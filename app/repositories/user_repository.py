@@ -1,12 +1,16 @@
+import uuid
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.models.db import UserModel
 from app.models.api.schemas import User, UserCreate
-from app.core.auth import get_password_hash
+from app.core.auth import hash_password, verify_and_update_password
+from app.core.token_cache import token_cache
+from app.core.tracing import traced
+from app.core.user_cache import user_cache
 
 
 class UserRepositoryInterface(ABC):
@@ -37,17 +41,26 @@ class UserRepositoryInterface(ABC):
         """Update user by ID."""
         pass
 
+    @abstractmethod
+    async def update_user_fields(self, user_id: str, fields: Dict[str, Any]) -> Optional[User]:
+        """Atomically update the given fields of a user and return the updated user."""
+        pass
+
 
 class SQLAlchemyUserRepository(UserRepositoryInterface):
     """SQLAlchemy implementation of user repository."""
     
+    # Fields callers may update
+    MUTABLE_FIELDS = frozenset({"email", "is_active"})
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    @traced("user_repository.create_user")
     async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user."""
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         
         # Create user model
         db_user = UserModel(
@@ -55,16 +68,18 @@ class SQLAlchemyUserRepository(UserRepositoryInterface):
             hashed_password=hashed_password
         )
         
+        # ID and timestamps are generated client-side and kept after commit
+        # (expire_on_commit=False), so no refresh round trip is needed
         try:
             self.db.add(db_user)
             await self.db.commit()
-            await self.db.refresh(db_user)
         except IntegrityError:
             await self.db.rollback()
             raise ValueError("User with this email already exists")
         
         return self._model_to_schema(db_user)
     
+    @traced("user_repository.get_user_by_email")
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
         result = await self.db.execute(select(UserModel).filter(UserModel.email == email))
@@ -73,39 +88,93 @@ class SQLAlchemyUserRepository(UserRepositoryInterface):
             return self._model_to_schema(db_user)
         return None
     
+    @traced("user_repository.get_user_by_id")
     async def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID."""
-        result = await self.db.execute(select(UserModel).filter(UserModel.id == user_id))
+        result = await self.db.execute(select(UserModel).filter(UserModel.id == self._to_uuid(user_id)))
         db_user = result.scalar_one_or_none()
         if db_user:
             return self._model_to_schema(db_user)
         return None
     
+    @traced("user_repository.authenticate_user")
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user by email and password."""
-        from app.core.auth import verify_password
-        
         result = await self.db.execute(select(UserModel).filter(UserModel.email == email))
         db_user = result.scalar_one_or_none()
-        if db_user and verify_password(password, db_user.hashed_password):
-            return self._model_to_schema(db_user)
-        return None
+        if not db_user:
+            return None
+        verified, new_hash = await verify_and_update_password(password, db_user.hashed_password)
+        if not verified:
+            return None
+        if new_hash:
+            # Stored hash uses an outdated cost; upgrade it with the request's commit
+            await self.db.execute(
+                update(UserModel).where(UserModel.id == db_user.id).values(hashed_password=new_hash)
+            )
+        return self._model_to_schema(db_user)
 
+    @traced("user_repository.update_user")
     async def update_user(self, user_id: str, user_data: User) -> Optional[User]:
         """Update user by ID."""
-        result = await self.db.execute(select(UserModel).filter(UserModel.id == user_id))
+        # Only update allowed mutable fields
+        payload = user_data.model_dump(exclude_unset=True)
+        fields = {field: payload[field] for field in self.MUTABLE_FIELDS if field in payload}
+        return await self.update_user_fields(user_id, fields)
+
+    @traced("user_repository.update_user_fields")
+    async def update_user_fields(self, user_id: str, fields: Dict[str, Any]) -> Optional[User]:
+        """
+        Atomically update the given fields of a user and return the updated user.
+        
+        Issues a single UPDATE ... RETURNING followed by the commit, instead of
+        loading the user first and refreshing it afterwards.
+        
+        Args:
+            user_id: User ID
+            fields: Mapping of field names in MUTABLE_FIELDS to new values
+            
+        Returns:
+            The updated user, or None if no user has the given ID
+        """
+        unknown_fields = set(fields) - self.MUTABLE_FIELDS
+        if unknown_fields:
+            raise ValueError(f"Cannot update user fields: {', '.join(sorted(unknown_fields))}")
+        if not fields:
+            return await self.get_user_by_id(user_id)
+        
+        user_uuid = self._to_uuid(user_id)
+        previous_email = None
+        if "email" in fields:
+            # Rare path: the old email is needed to invalidate its cache entry
+            result = await self.db.execute(select(UserModel.email).filter(UserModel.id == user_uuid))
+            previous_email = result.scalar_one_or_none()
+        
+        result = await self.db.execute(
+            update(UserModel)
+            .where(UserModel.id == user_uuid)
+            .values(**fields)
+            .returning(UserModel)
+        )
         db_user = result.scalar_one_or_none()
-        if db_user:
-            # Only update allowed mutable fields
-            payload = user_data.model_dump(exclude_unset=True)
-            allowed_fields = {"email", "is_active", "refresh_token"}
-            for field in allowed_fields:
-                if field in payload:
-                    setattr(db_user, field, payload[field])
-            await self.db.commit()
-            await self.db.refresh(db_user)
-            return self._model_to_schema(db_user)
-        return None
+        if db_user is None:
+            return None
+        await self.db.commit()
+        
+        # Drop stale cached copies; other workers keep theirs until they expire
+        user_cache.invalidate(db_user.email)
+        if previous_email and previous_email != db_user.email:
+            user_cache.invalidate(previous_email)
+            token_cache.invalidate_subject(previous_email)
+        if not db_user.is_active:
+            # Deactivation revokes access tokens already handed out
+            token_cache.invalidate_subject(db_user.email)
+        return self._model_to_schema(db_user)
+    
+    @staticmethod
+    def _to_uuid(user_id: str) -> uuid.UUID:
+        """Coerce an API user ID to the UUID the column binds."""
+        return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
     
     def _model_to_schema(self, db_user: UserModel) -> User:
         """Convert database model to Pydantic schema."""
@@ -113,5 +182,6 @@ class SQLAlchemyUserRepository(UserRepositoryInterface):
             id=str(db_user.id),
             email=db_user.email,
             is_active=db_user.is_active,
+            tier=db_user.tier,
             created_at=db_user.created_at.isoformat()
         )
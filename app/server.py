@@ -0,0 +1,329 @@
+"""
+Pre-fork production server.
+
+The parent process imports the application and every provider library it is
+configured to use, freezes that state out of the garbage collector, binds the
+listening socket and then forks ``WORKERS`` uvicorn workers. Imported code and
+module state are shared copy-on-write between workers instead of being loaded
+once per worker.
+
+CTranslate2 models (faster-whisper and the local LLM) run on worker threads
+created with the model, and threads do not survive ``fork``: a model built in
+the parent hangs on first use in a child. Each worker therefore loads its
+models right after it is forked, before it accepts connections.
+
+In-memory idempotency keys, rate limit buckets and caches are per process.
+Several workers need ``IDEMPOTENCY_BACKEND=database``, otherwise a retry that
+reaches another worker runs again, and ``INVALIDATION_BACKEND=database``,
+otherwise access tokens revoked on one worker are still accepted by the
+others; the server refuses to start without them.
+
+Signals to the parent:
+    SIGTERM, SIGINT  stop every worker gracefully and exit
+    SIGHUP           replace workers one by one, without downtime
+
+Usage:
+    python -m app.server
+"""
+import gc
+import os
+import random
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import configure_logging, get_logger, shutdown_logging
+
+# Create logger
+logger = get_logger(__name__)
+
+# A worker that exits sooner than this after starting is treated as crashing
+MIN_WORKER_UPTIME_SECONDS = 5
+CRASH_BACKOFF_SECONDS = 1
+
+
+def memory_usage(pid: int) -> Dict[str, float]:
+    """
+    Get the memory a process uses, in MiB.
+
+    ``pss`` charges shared pages proportionally to each process sharing them,
+    so summing it across workers gives their real combined footprint.
+
+    Args:
+        pid: Process id
+
+    Returns:
+        Dict with rss, pss, shared and private sizes, or an empty dict where
+        /proc is unavailable
+    """
+    fields: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+    }
+
+
+def preload() -> None:
+    """Import the application and the configured providers' libraries in the parent."""
+    import app.main  # noqa: F401
+    if settings.WHISPER_PROVIDER.lower() == "local":
+        import app.services.stt.faster_whisper  # noqa: F401
+    if settings.LOCAL_LLM_MODEL_PATH:
+        import app.services.llm.ctranslate2_provider  # noqa: F401
+    # Objects the collector never visits are never written to, so their pages stay shared
+    gc.collect()
+    gc.freeze()
+
+
+def check_shared_backends(workers: int) -> None:
+    """
+    Refuse to fork several workers around state that must be shared between them.
+
+    Args:
+        workers: Number of worker processes
+
+    Raises:
+        SystemExit: If there are several workers and idempotency keys or
+            token revocations do not reach every worker
+    """
+    if workers <= 1:
+        return
+    if settings.IDEMPOTENCY_BACKEND != "database":
+        raise SystemExit(
+            f"WORKERS={workers} requires IDEMPOTENCY_BACKEND=database: other idempotency key stores are per "
+            "worker, so retries reaching another worker would run twice"
+        )
+    if settings.INVALIDATION_BACKEND != "database":
+        raise SystemExit(
+            f"WORKERS={workers} requires INVALIDATION_BACKEND=database: other invalidation channels only reach "
+            "the worker revoking an access token, so the others would keep accepting it"
+        )
+    if settings.RATE_LIMIT_BACKEND != "database":
+        logger.warning(
+            "Rate limits are enforced per worker; set RATE_LIMIT_BACKEND=database for limits across workers",
+            workers=workers,
+        )
+
+
+def load_models() -> None:
+    """Load the configured models in a worker, before it serves requests."""
+    if settings.WHISPER_PROVIDER.lower() == "local":
+        from app.services.stt.faster_whisper import faster_whisper_stt
+        faster_whisper_stt.model
+    if settings.LOCAL_LLM_MODEL_PATH:
+        from app.services.llm.ctranslate2_provider import ctranslate2_provider
+        ctranslate2_provider.load()
+
+
+class PreforkServer:
+    """Forks uvicorn workers sharing one listening socket and keeps them running."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout_seconds: int = 30,
+        memory_report_interval_seconds: int = 300,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout_seconds = graceful_timeout_seconds
+        self.memory_report_interval_seconds = memory_report_interval_seconds
+        self._socket: Optional[socket.socket] = None
+        # pid -> start time
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self) -> None:
+        """Preload, fork the workers and supervise them until asked to stop."""
+        configure_logging()
+        check_shared_backends(self.workers)
+        preload()
+        logger.info("Application preloaded", **memory_usage(os.getpid()))
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(2048)
+        self._socket.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        logger.info("Starting workers", workers=self.workers, host=self.host, port=self.port)
+        for _ in range(self.workers):
+            self._spawn()
+
+        next_report = time.monotonic() + min(self.memory_report_interval_seconds or 10, 10)
+        while not self._stopping:
+            self._reap()
+            if self._reload_requested:
+                self._reload_requested = False
+                self._rolling_restart()
+            if self.memory_report_interval_seconds and time.monotonic() >= next_report:
+                self.report_memory()
+                next_report = time.monotonic() + self.memory_report_interval_seconds
+            time.sleep(0.2)
+
+        self._shutdown()
+
+    def report_memory(self) -> None:
+        """Log each worker's memory use and their combined footprint."""
+        total_pss = 0.0
+        for pid in list(self._children):
+            usage = memory_usage(pid)
+            if usage:
+                total_pss += usage["pss_mb"]
+                logger.info("Worker memory", pid=pid, **usage)
+        logger.info("Workers memory total", workers=len(self._children), pss_mb=round(total_pss, 1))
+
+    def _spawn(self) -> int:
+        max_requests = 0
+        if self.max_requests:
+            max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(max_requests)
+        self._children[pid] = time.monotonic()
+        logger.info("Worker started", pid=pid, max_requests=max_requests or None)
+        return pid
+
+    def _run_worker(self, max_requests: int) -> None:
+        """Serve requests in a forked child; never returns."""
+        import uvicorn
+
+        from app.main import app
+
+        exit_code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            load_models()
+            config = uvicorn.Config(
+                app,
+                lifespan="on",
+                limit_max_requests=max_requests or None,
+                timeout_graceful_shutdown=self.graceful_timeout_seconds,
+            )
+            uvicorn.Server(config).run(sockets=[self._socket])
+        except BaseException:
+            logger.exception("Worker failed", pid=os.getpid())
+            exit_code = 1
+        finally:
+            shutdown_logging()
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        """Collect exited workers and replace them unless stopping."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            exit_code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - started
+            if self._stopping:
+                continue
+            if exit_code != 0 and uptime < MIN_WORKER_UPTIME_SECONDS:
+                logger.error("Worker crashed on startup", pid=pid, exit_code=exit_code)
+                time.sleep(CRASH_BACKOFF_SECONDS)
+            else:
+                # Includes workers retiring after WORKER_MAX_REQUESTS
+                logger.info("Worker exited", pid=pid, exit_code=exit_code, uptime_seconds=round(uptime))
+            if len(self._children) < self.workers:
+                self._spawn()
+
+    def _rolling_restart(self) -> None:
+        """Replace workers one at a time; the old one finishes its requests while the new one serves."""
+        logger.info("Restarting workers", workers=len(self._children))
+        for pid in list(self._children):
+            self._spawn()
+            self._children.pop(pid, None)
+            self._terminate(pid)
+
+    def _terminate(self, pid: int) -> None:
+        """Stop a worker gracefully, killing it after the graceful timeout."""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        if not self._wait(pid, self.graceful_timeout_seconds + 5):
+            logger.warning("Worker did not stop in time; killing it", pid=pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def _wait(self, pid: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    return True
+            except ChildProcessError:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _shutdown(self) -> None:
+        logger.info("Stopping workers", workers=len(self._children))
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self._children):
+            if not self._wait(pid, self.graceful_timeout_seconds + 5):
+                logger.warning("Worker did not stop in time; killing it", pid=pid)
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+        self._children.clear()
+        self._socket.close()
+        logger.info("Server stopped")
+        shutdown_logging()
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame) -> None:
+        self._reload_requested = True
+
+
+def main() -> None:
+    PreforkServer(
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        max_requests=settings.WORKER_MAX_REQUESTS,
+        max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+        graceful_timeout_seconds=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+        memory_report_interval_seconds=settings.WORKER_MEMORY_REPORT_INTERVAL_SECONDS,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
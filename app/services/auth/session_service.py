@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.logging import get_logger
+from app.core.token_cache import token_cache
+from app.models.api.schemas import UserSession
+from app.repositories.session_repository import SessionRepositoryInterface, SQLAlchemySessionRepository
+
+# Create logger
+logger = get_logger(__name__)
+
+
+class SessionService:
+    """Service for refresh token sessions with dependency injection."""
+
+    def __init__(self, session_repository: SessionRepositoryInterface):
+        self.session_repository = session_repository
+
+    async def create_session(self, user_id: str, refresh_token: str, expires_at: datetime, device: Optional[str] = None) -> None:
+        """Start a session for a newly issued refresh token."""
+        await self.session_repository.create_session(user_id, refresh_token, expires_at, device)
+
+    async def get_active_session(self, refresh_token: str) -> Optional[UserSession]:
+        """Get the active session for a refresh token."""
+        return await self.session_repository.get_active_session(refresh_token)
+
+    async def rotate_session(self, session_id: str, refresh_token: str, new_refresh_token: str, expires_at: datetime) -> bool:
+        """Replace a session's refresh token."""
+        return await self.session_repository.rotate_session(session_id, refresh_token, new_refresh_token, expires_at)
+
+    async def revoke_session(self, refresh_token: str) -> bool:
+        """
+        Revoke the session for a refresh token.
+
+        Access tokens are not bound to a session, so every access token of the
+        session's user issued so far is revoked with it; other devices keep
+        their sessions and get a new access token on their next refresh.
+        """
+        session = await self.session_repository.get_active_session(refresh_token)
+        revoked = await self.session_repository.revoke_session(refresh_token)
+        if revoked and session is not None:
+            token_cache.invalidate_subject(session.email)
+        return revoked
+
+    async def delete_expired_sessions(self, batch_size: int) -> int:
+        """Delete expired sessions in batches."""
+        return await self.session_repository.delete_expired_sessions(batch_size)
+
+
+class SessionCleanupTask:
+    """Background task that periodically deletes expired sessions."""
+
+    def __init__(self, interval_seconds: float, batch_size: int):
+        self._interval_seconds = interval_seconds
+        self._batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Delete expired sessions and return how many were deleted."""
+        async with async_session() as db:
+            deleted = await SessionService(SQLAlchemySessionRepository(db)).delete_expired_sessions(self._batch_size)
+        if deleted:
+            logger.info("Deleted expired sessions", deleted=deleted)
+        return deleted
+
+    def start(self) -> None:
+        """Start the periodic cleanup."""
+        if self._task is None and self._interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic cleanup."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Expired session cleanup failed", error=str(e))
+            await asyncio.sleep(self._interval_seconds)
+
+
+# Create a singleton instance
+session_cleanup = SessionCleanupTask(
+    interval_seconds=settings.SESSION_CLEANUP_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_CLEANUP_BATCH_SIZE,
+)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 from app.models.api.schemas import User, UserCreate
 from app.repositories.user_repository import UserRepositoryInterface
 
@@ -28,3 +28,7 @@ class UserService:
     async def update_user(self, user_id: str, user_data: User) -> Optional[User]:
         """Update user by ID."""
         return await self.user_repository.update_user(user_id, user_data)
+
+    async def update_user_fields(self, user_id: str, fields: Dict[str, Any]) -> Optional[User]:
+        """Atomically update the given fields of a user."""
+        return await self.user_repository.update_user_fields(user_id, fields)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.metrics import MetricsRegistry
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Batch sizes are small integers; one bucket per power of two
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Dynamic micro-batcher for a blocking batch function.
+
+    Concurrent ``submit`` calls are collected into one call of ``process_batch``,
+    which runs in a worker thread. A batch is dispatched once it holds
+    ``max_batch_size`` items or its oldest item has waited ``max_wait_seconds``.
+    Only one batch runs at a time, so requests arriving while a batch runs
+    form the next one and batch sizes grow with load; an idle batcher adds at
+    most ``max_wait_seconds`` to a lone request. At most ``max_pending`` items
+    wait for a batch; further submits are rejected with a 429.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+        max_pending: int = 0,
+        name: str = "batch",
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._process_batch = process_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+        self._max_pending = max_pending
+        self._pending: List[Tuple[T, asyncio.Future, float]] = []
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self._batch_size = metrics.histogram(
+            "batch_size", "Items per dispatched batch", labelnames=("batcher",), buckets=BATCH_SIZE_BUCKETS
+        ).labels(name)
+        self._queue_wait = metrics.histogram(
+            "batch_queue_wait_seconds", "Time items waited for their batch to be dispatched", labelnames=("batcher",)
+        ).labels(name)
+        self._rejected = metrics.counter(
+            "batch_rejected_total", "Items rejected because too many were waiting for a batch", labelnames=("batcher",)
+        ).labels(name)
+
+    async def submit(self, item: T) -> R:
+        """
+        Process an item as part of a batch.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            The result ``process_batch`` returned for the item
+
+        Raises:
+            HTTPException: 429 if ``max_pending`` items are already waiting
+        """
+        if self._max_pending > 0:
+            # Callers that gave up no longer hold a place
+            self._pending = [entry for entry in self._pending if not entry[1].cancelled()]
+            if len(self._pending) >= self._max_pending:
+                self._rejected.inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests waiting. Please try again later.",
+                    headers={"Retry-After": "1"},
+                )
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if self._task is None or self._task.done():
+            # Fresh per run, so the batcher is not tied to one event loop
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        elif len(self._pending) >= self._max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while self._pending:
+            if len(self._pending) < self._max_batch_size:
+                # Items that arrived while the previous batch ran have already waited
+                remaining = self._pending[0][2] + self._max_wait_seconds - time.perf_counter()
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            self._full.clear()
+
+            batch = self._pending[:self._max_batch_size]
+            del self._pending[:len(batch)]
+            # Callers that gave up are not worth generating for
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+
+            dispatched = time.perf_counter()
+            for _, _, enqueued in batch:
+                self._queue_wait.observe(dispatched - enqueued)
+            self._batch_size.observe(len(batch))
+
+            try:
+                results = await asyncio.to_thread(self._process_batch, [item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
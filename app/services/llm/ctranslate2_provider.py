@@ -0,0 +1,170 @@
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import ctranslate2
+from tokenizers import Tokenizer
+
+from app.core.config import settings
+from app.core.deadline import within_deadline
+from app.core.logging import get_logger
+from app.core.metrics import SLOW_BUCKETS, registry
+from app.core.tracing import traced, tracer
+from app.models.api.schemas import Profile, RewriteOptions, User
+from app.services.llm.batching import MicroBatcher
+from app.services.llm.prompts import build_system_prompt, build_user_prompt
+
+# Create logger
+logger = get_logger(__name__)
+
+# Generation time of whole batches, shared by every request in the batch
+llm_call_duration = registry.histogram(
+    "llm_call_duration_seconds", "Time spent waiting for the LLM", labelnames=("provider",), buckets=SLOW_BUCKETS
+).labels("local")
+
+# ChatML, the chat format of the small instruction-tuned models this targets
+# (Qwen2.5 and SmolLM2 instruct)
+END_OF_TURN = "<|im_end|>"
+CHAT_TEMPLATE = (
+    "<|im_start|>system\n{system}<|im_end|>\n"
+    "<|im_start|>user\n{user}<|im_end|>\n"
+    "<|im_start|>assistant\n"
+)
+
+# Candidates sampled from per step when temperature is above zero
+SAMPLING_TOP_K = 40
+
+
+class CTranslate2Provider:
+    """Local LLM provider running a CTranslate2 model on CPU."""
+
+    def __init__(self):
+        """Initialize the provider; the model is loaded on first use."""
+        self._generator = None
+        self._tokenizer = None
+        self._model_path = settings.LOCAL_LLM_MODEL_PATH
+        self._batchers: Dict[float, MicroBatcher] = {}
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """Load the model and tokenizer, if not loaded yet."""
+        with self._load_lock:
+            if self._generator is None:
+                self._load()
+
+    def _load(self) -> None:
+        """Load the model and tokenizer from LOCAL_LLM_MODEL_PATH."""
+        if not self._model_path:
+            raise ValueError("LOCAL_LLM_MODEL_PATH is not set")
+
+        logger.info("Loading local LLM", model_path=self._model_path)
+        with tracer.span("llm.model_load", model_path=self._model_path):
+            self._tokenizer = Tokenizer.from_file(str(Path(self._model_path) / "tokenizer.json"))
+            self._generator = ctranslate2.Generator(
+                self._model_path,
+                device="cpu",
+                compute_type=settings.LOCAL_LLM_COMPUTE_TYPE,
+                intra_threads=settings.LOCAL_LLM_THREADS,
+            )
+        logger.info("Local LLM loaded")
+
+    def _batcher(self, temperature: float) -> MicroBatcher:
+        """
+        Get the batcher for a sampling temperature.
+
+        A generation call samples every sequence in it the same way, so
+        requests are only batched with others at the same temperature.
+        """
+        temperature = round(temperature, 2)
+        batcher = self._batchers.get(temperature)
+        if batcher is None:
+            batcher = MicroBatcher(
+                lambda prompts: self._generate(prompts, temperature),
+                max_batch_size=settings.LOCAL_LLM_MAX_BATCH_SIZE,
+                max_wait_seconds=settings.LOCAL_LLM_BATCH_WAIT_MS / 1000,
+                max_pending=settings.LOCAL_LLM_MAX_PENDING,
+                name="local_llm",
+                metrics=registry,
+            )
+            self._batchers[temperature] = batcher
+        return batcher
+
+    def _generate(self, prompts: List[str], temperature: float) -> List[str]:
+        """
+        Generate completions for a batch of prompts in one call.
+
+        Runs in a worker thread.
+
+        Args:
+            prompts: Formatted chat prompts
+            temperature: Sampling temperature, 0 for greedy decoding
+
+        Returns:
+            List of completions, in prompt order
+        """
+        self.load()
+
+        tokens = [encoding.tokens for encoding in self._tokenizer.encode_batch(prompts)]
+        with llm_call_duration.time():
+            results = self._generator.generate_batch(
+                tokens,
+                max_length=settings.LOCAL_LLM_MAX_NEW_TOKENS,
+                sampling_temperature=temperature or 1,
+                sampling_topk=SAMPLING_TOP_K if temperature > 0 else 1,
+                include_prompt_in_result=False,
+                end_token=END_OF_TURN,
+            )
+        return self._tokenizer.decode_batch([result.sequences_ids[0] for result in results])
+
+    @traced("llm.rewrite")
+    async def rewrite(
+        self,
+        transcript: str,
+        profile: Profile,
+        options: Optional[RewriteOptions] = None,
+        user: Optional[User] = None
+    ) -> tuple[str, int]:
+        """
+        Rewrite text with the local model.
+
+        Args:
+            transcript: Text to rewrite
+            profile: User profile for rewriting
+            options: Optional parameters for the request
+            user: User the request is made for; unused, batching serves everyone alike
+
+        Returns:
+            Tuple containing rewritten text and processing time in milliseconds
+        """
+        if options is None:
+            options = RewriteOptions()
+
+        start_time = time.time()
+
+        prompt = CHAT_TEMPLATE.format(
+            system=build_system_prompt(profile),
+            user=build_user_prompt(transcript),
+        )
+
+        logger.info(
+            "Sending rewrite request to local LLM",
+            temperature=options.temperature,
+            profile_id=profile.id,
+            profile_name=profile.name,
+        )
+
+        with tracer.span("llm.generate", provider="local"):
+            # A request given up at its deadline is dropped from its batch if not yet dispatched
+            async with within_deadline():
+                rewritten_text = await self._batcher(options.temperature).submit(prompt)
+
+        processing_time_ms = int((time.time() - start_time) * 1000)
+
+        logger.info("Local rewrite completed", processing_time_ms=processing_time_ms)
+
+        return rewritten_text.strip(), processing_time_ms
+
+
+# Create a singleton instance
+ctranslate2_provider = CTranslate2Provider()
@@ -1,16 +1,41 @@
-from app.core.logging import get_logger
-from app.services.llm.openai_provider import openai_provider
+from typing import Optional
+
+from app.core.logging import event_sampler, get_logger
 
 # Create logger
 logger = get_logger(__name__)
 
+# Logged on every request; keep at most one a minute
+event_sampler.configure("Using OpenAI LLM provider", max_per_second=1 / 60)
+event_sampler.configure("Using local CTranslate2 LLM provider", max_per_second=1 / 60)
+event_sampler.configure("Using rule-based rewrite provider", max_per_second=1 / 60)
+
 
-def get_llm_provider():
+def get_llm_provider(provider_hint: Optional[str] = None, rewrite_mode: str = "llm"):
     """
-    Get the OpenAI LLM provider.
+    Get the LLM provider for a request.
+    
+    Providers, and with them the OpenAI client library or CTranslate2, are
+    imported on first use rather than at application import.
+    
+    Args:
+        provider_hint: "local" for the local CTranslate2 model, "rules" for
+            rule-based rewriting, otherwise OpenAI
+        rewrite_mode: The profile's rewrite mode, used when there is no hint
     
     Returns:
-        The OpenAI LLM provider instance.
+        The LLM provider instance.
     """
+    if provider_hint == "rules" or (provider_hint is None and rewrite_mode == "rules"):
+        logger.info("Using rule-based rewrite provider")
+        from app.services.llm.rules_provider import rules_provider
+        return rules_provider
+    
+    if provider_hint == "local":
+        logger.info("Using local CTranslate2 LLM provider")
+        from app.services.llm.ctranslate2_provider import ctranslate2_provider
+        return ctranslate2_provider
+    
     logger.info("Using OpenAI LLM provider")
+    from app.services.llm.openai_provider import openai_provider
     return openai_provider
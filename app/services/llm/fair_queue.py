@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.metrics import MetricsRegistry
+
+
+class _Flow:
+    """Requests of one user waiting for a slot."""
+
+    __slots__ = ("weight", "deficit", "waiting")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.deficit = 0.0
+        self.waiting: Deque[Tuple[asyncio.Future, float, float]] = deque()
+
+
+class FairQueue:
+    """
+    Weighted fair queuing of requests for a fixed number of concurrent slots.
+
+    Each flow (a user) has its own bounded queue, and free slots are handed
+    out by deficit round robin: flows with waiting requests take turns, each
+    turn adds ``quantum * weight`` to the flow's deficit, and the flow is
+    served while its deficit covers the cost of its next request. Under
+    contention every flow gets a share of slots proportional to its weight,
+    however many requests it queues; an idle flow keeps no credit.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        max_queue_per_flow: int,
+        quantum: float = 1.0,
+        name: str = "fair_queue",
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._free = concurrency
+        self._max_queue_per_flow = max_queue_per_flow
+        self._quantum = quantum
+        self._flows: Dict[str, _Flow] = {}
+        # Flows with waiting requests, in round-robin order; the first one has the turn
+        self._active: Deque[str] = deque()
+        self._in_turn = False
+
+        self._queue_wait = metrics.histogram(
+            "queue_wait_seconds", "Time spent waiting for a worker or resource", labelnames=("queue",)
+        ).labels(name)
+        self._queued = metrics.gauge(
+            "fair_queue_waiting", "Requests waiting in a fair queue", labelnames=("queue",)
+        ).labels(name)
+        self._rejected = metrics.counter(
+            "fair_queue_rejected_total", "Requests rejected because their flow's queue was full", labelnames=("queue",)
+        ).labels(name)
+
+    @asynccontextmanager
+    async def slot(self, flow_id: str, weight: float = 1.0, cost: float = 1.0) -> AsyncIterator[None]:
+        """
+        Hold a slot for a request, waiting for the flow's fair turn.
+
+        Args:
+            flow_id: Flow the request belongs to, e.g. the user ID
+            weight: Relative share of the flow; takes effect when it next becomes active
+            cost: Cost of the request in quantum units
+
+        Raises:
+            HTTPException: 429 if the flow already has ``max_queue_per_flow`` requests waiting
+        """
+        await self._acquire(flow_id, weight, cost)
+        try:
+            yield
+        finally:
+            self._free += 1
+            self._dispatch()
+
+    async def _acquire(self, flow_id: str, weight: float, cost: float) -> None:
+        if self._free > 0 and not self._active:
+            self._free -= 1
+            self._queue_wait.observe(0)
+            return
+
+        flow = self._flows.get(flow_id)
+        if flow is None:
+            flow = self._flows[flow_id] = _Flow(weight)
+            self._active.append(flow_id)
+        if len(flow.waiting) >= self._max_queue_per_flow:
+            self._rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests waiting. Please try again later.",
+                headers={"Retry-After": "1"},
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        flow.waiting.append((future, cost, time.perf_counter()))
+        self._queued.inc()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up; pass the slot on
+                self._free += 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        while self._free > 0 and self._active:
+            flow_id = self._active[0]
+            flow = self._flows[flow_id]
+
+            # Requests whose callers gave up take no turn
+            while flow.waiting and flow.waiting[0][0].done():
+                flow.waiting.popleft()
+                self._queued.dec()
+            if not flow.waiting:
+                self._end_turn(flow_id, idle=True)
+                continue
+
+            if not self._in_turn:
+                flow.deficit += self._quantum * flow.weight
+                self._in_turn = True
+
+            future, cost, enqueued = flow.waiting[0]
+            if cost > flow.deficit:
+                self._end_turn(flow_id, idle=False)
+                continue
+
+            flow.waiting.popleft()
+            self._queued.dec()
+            flow.deficit -= cost
+            self._free -= 1
+            self._queue_wait.observe(time.perf_counter() - enqueued)
+            future.set_result(None)
+            if not flow.waiting:
+                self._end_turn(flow_id, idle=True)
+
+    def _end_turn(self, flow_id: str, idle: bool) -> None:
+        """Pass the turn on; a flow with nothing waiting leaves the rotation and its deficit."""
+        self._in_turn = False
+        self._active.popleft()
+        if idle:
+            del self._flows[flow_id]
+        else:
+            self._active.append(flow_id)
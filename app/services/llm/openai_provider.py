@@ -1,15 +1,29 @@
 import time
 from typing import Optional
 
-from openai import OpenAI, APIError
+from openai import AsyncOpenAI, APIConnectionError, APIError
 
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, deadline_headers, within_deadline
 from app.core.logging import get_logger
-from app.models.api.schemas import Profile, RewriteOptions
+from app.core.metrics import SLOW_BUCKETS, registry
+from app.core.retry import RetryPolicy, call_with_retries
+from app.core.tracing import trace_headers, traced, tracer
+from app.models.api.schemas import Profile, RewriteOptions, User
+from app.services.llm.fair_queue import FairQueue
+from app.services.llm.prompts import build_system_prompt, build_user_prompt
 
 # Create logger
 logger = get_logger(__name__)
 
+# Chat completion call time
+llm_call_duration = registry.histogram(
+    "llm_call_duration_seconds", "Time spent waiting for the LLM", labelnames=("provider",), buckets=SLOW_BUCKETS
+).labels("openai")
+
+# Share of outbound concurrency per user, by tier
+TIER_WEIGHTS = {"free": settings.OPENAI_WEIGHT_FREE, "pro": settings.OPENAI_WEIGHT_PRO}
+
 
 class OpenAIProvider:
     """OpenAI provider for LLM services."""
@@ -18,140 +32,138 @@ class OpenAIProvider:
         """Initialize the OpenAI client."""
         self._client = None
         self._model = settings.OPENAI_MODEL
+        # Caps calls in flight and shares them fairly between users
+        self._queue = FairQueue(
+            concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            max_queue_per_flow=settings.OPENAI_MAX_QUEUED_PER_USER,
+            name="openai",
+            metrics=registry,
+        )
+        self._retry_policy = RetryPolicy(
+            max_attempts=settings.PROVIDER_MAX_ATTEMPTS,
+            base_delay_seconds=settings.PROVIDER_BACKOFF_BASE_SECONDS,
+            max_delay_seconds=settings.PROVIDER_BACKOFF_MAX_SECONDS,
+            attempt_timeout_seconds=settings.OPENAI_TIMEOUT_SECONDS,
+            retry_on=(APIConnectionError,),
+            metrics=registry,
+        )
         logger.info("Initializing OpenAI provider", model=self._model)
     
     @property
-    def client(self) -> OpenAI:
+    def client(self) -> AsyncOpenAI:
         """
         Lazy-load the OpenAI client when first needed.
         
         Returns:
-            OpenAI: The OpenAI client.
+            AsyncOpenAI: The OpenAI client.
         """
         if self._client is None:
             if not settings.OPENAI_API_KEY:
                 raise ValueError("OPENAI_API_KEY is not set")
             
-            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            # Retries are made by call_with_retries, within the request deadline
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, max_retries=0
+            )
             logger.info("OpenAI client initialized")
         
         return self._client
     
-    def _build_system_prompt(self, profile: Profile) -> str:
-        """
-        Build a system prompt from the user profile.
-        
-        Args:
-            profile: User profile containing tone, constraints, etc.
-            
-        Returns:
-            str: System prompt for the LLM.
-        """
-        # Start with basic instruction
-        prompt = [
-            f"You are an expert writer who rewrites text in the tone of {profile.name}.",
-            f"Tone: {profile.tone}"
-        ]
-        
-        # Add constraints
-        if profile.constraints:
-            prompt.append("Constraints:")
-            for constraint in profile.constraints:
-                prompt.append(f"- {constraint}")
-        
-        # Add format if specified
-        if profile.format:
-            prompt.append(f"Format: {profile.format}")
-        
-        # Add audience if specified
-        if profile.audience:
-            prompt.append(f"Target audience: {profile.audience}")
-        
-        # Add glossary if specified
-        if profile.glossary:
-            prompt.append("Glossary terms to include:")
-            for term, definition in profile.glossary.items():
-                prompt.append(f"- {term}: {definition}")
-        
-        # Add word limit if specified
-        if profile.max_words:
-            prompt.append(f"Keep the response under {profile.max_words} words.")
-        
-        return "\n".join(prompt)
-    
+    @traced("llm.rewrite")
     async def rewrite(
         self, 
         transcript: str, 
         profile: Profile, 
-        options: Optional[RewriteOptions] = None
+        options: Optional[RewriteOptions] = None,
+        user: Optional[User] = None
     ) -> tuple[str, int]:
         """
         Rewrite text using OpenAI.
         
+        Calls beyond OPENAI_MAX_CONCURRENCY wait in a per-user queue and are
+        sent in weighted fair order between users. Transient API failures are
+        retried with backoff; waiting and retrying stop at the request deadline.
+        
         Args:
             transcript: Text to rewrite
             profile: User profile for rewriting
             options: Optional parameters for the request
+            user: User the request is made for; anonymous calls share one queue
             
         Returns:
             Tuple containing rewritten text and processing time in milliseconds
+            
+        Raises:
+            DeadlineExceeded: If the request deadline passes first
         """
         if options is None:
             options = RewriteOptions()
         
         start_time = time.time()
         
-        system_prompt = self._build_system_prompt(profile)
+        system_prompt = build_system_prompt(profile)
+        user_prompt = build_user_prompt(transcript)
         
-        user_prompt = (
-            f"Please rewrite the following transcript in the specified tone and style:\n\n"
-            f"{transcript}"
-        )
-        
-        try:
-            logger.info(
-                "Sending rewrite request to OpenAI",
-                model=self._model,
-                temperature=options.temperature,
-                profile_id=profile.id,
-                profile_name=profile.name,
-            )
-            
-            response = self.client.chat.completions.create(
-                model=self._model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=options.temperature,
-                max_tokens=1024,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0,
-            )
-            
-            rewritten_text = response.choices[0].message.content.strip()
-            processing_time_ms = int((time.time() - start_time) * 1000)
-            
-            logger.info(
-                "Rewrite completed",
-                processing_time_ms=processing_time_ms,
-                model=self._model,
-                tokens_used=response.usage.total_tokens
-            )
-            
-            return rewritten_text, processing_time_ms
-            
-        except APIError as e:
-            logger.exception(
-                "OpenAI API error",
-                error=str(e),
-                status_code=e.status_code if hasattr(e, 'status_code') else None
-            )
-            raise
-        except Exception as e:
-            logger.exception("Error in OpenAI rewrite", error=str(e))
-            raise
+        # Wait for a slot outside the error handling; a full queue is not an API error
+        flow_id = user.id if user is not None else "anonymous"
+        weight = TIER_WEIGHTS.get(user.tier, 1) if user is not None else 1
+        async with within_deadline(), self._queue.slot(flow_id, weight):
+            try:
+                logger.info(
+                    "Sending rewrite request to OpenAI",
+                    model=self._model,
+                    temperature=options.temperature,
+                    profile_id=profile.id,
+                    profile_name=profile.name,
+                )
+                
+                with llm_call_duration.time(), tracer.span("llm.chat_completion", provider="openai", model=self._model) as span:
+                    async def attempt(timeout: Optional[float]):
+                        # The outbound request carries this span as its parent and the time left
+                        return await self.client.chat.completions.create(
+                            model=self._model,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": user_prompt}
+                            ],
+                            temperature=options.temperature,
+                            max_tokens=1024,
+                            top_p=1,
+                            frequency_penalty=0,
+                            presence_penalty=0,
+                            timeout=timeout,
+                            extra_headers={**trace_headers(), **deadline_headers()},
+                        )
+                    
+                    response = await call_with_retries(attempt, self._retry_policy, "openai.chat_completion")
+                    if span is not None and response.usage is not None:
+                        span.set_attribute("llm.total_tokens", response.usage.total_tokens)
+                
+                rewritten_text = response.choices[0].message.content.strip()
+                processing_time_ms = int((time.time() - start_time) * 1000)
+                
+                logger.info(
+                    "Rewrite completed",
+                    processing_time_ms=processing_time_ms,
+                    model=self._model,
+                    tokens_used=response.usage.total_tokens
+                )
+                
+                return rewritten_text, processing_time_ms
+                
+            except DeadlineExceeded:
+                logger.warning("OpenAI rewrite abandoned at the request deadline", model=self._model)
+                raise
+            except APIError as e:
+                logger.exception(
+                    "OpenAI API error",
+                    error=str(e),
+                    status_code=e.status_code if hasattr(e, 'status_code') else None
+                )
+                raise
+            except Exception as e:
+                logger.exception("Error in OpenAI rewrite", error=str(e))
+                raise
 
 
 # Create a singleton instance
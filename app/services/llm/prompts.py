@@ -0,0 +1,64 @@
+from app.models.api.schemas import Profile
+
+
+def build_system_prompt(profile: Profile) -> str:
+    """
+    Build a system prompt from the user profile.
+    
+    Args:
+        profile: User profile containing tone, constraints, etc.
+        
+    Returns:
+        str: System prompt for the LLM.
+    """
+    # Stored profiles carry the prompt compiled when they were saved
+    if profile._system_prompt is not None:
+        return profile._system_prompt
+    
+    # Start with basic instruction
+    prompt = [
+        f"You are an expert writer who rewrites text in the tone of {profile.name}.",
+        f"Tone: {profile.tone}"
+    ]
+    
+    # Add constraints
+    if profile.constraints:
+        prompt.append("Constraints:")
+        for constraint in profile.constraints:
+            prompt.append(f"- {constraint}")
+    
+    # Add format if specified
+    if profile.format:
+        prompt.append(f"Format: {profile.format}")
+    
+    # Add audience if specified
+    if profile.audience:
+        prompt.append(f"Target audience: {profile.audience}")
+    
+    # Add glossary if specified
+    if profile.glossary:
+        prompt.append("Glossary terms to include:")
+        for term, definition in profile.glossary.items():
+            prompt.append(f"- {term}: {definition}")
+    
+    # Add word limit if specified
+    if profile.max_words:
+        prompt.append(f"Keep the response under {profile.max_words} words.")
+    
+    return "\n".join(prompt)
+
+
+def build_user_prompt(transcript: str) -> str:
+    """
+    Build the user message asking for a transcript to be rewritten.
+    
+    Args:
+        transcript: Text to rewrite
+        
+    Returns:
+        str: User prompt for the LLM.
+    """
+    return (
+        f"Please rewrite the following transcript in the specified tone and style:\n\n"
+        f"{transcript}"
+    )
@@ -0,0 +1,206 @@
+"""
+Deterministic rule-based rewriting.
+
+Removes filler words, writes glossary terms the way the glossary spells them
+and fixes basic sentence casing and punctuation, without a model. Filler and
+glossary phrases are compiled into one Aho-Corasick automaton over word tokens,
+so a transcript is scanned once however many phrases there are.
+"""
+import re
+from collections import deque
+from typing import Dict, Generic, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# Words, with inner apostrophes and hyphens, and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+(?:['’-]\w+)*|[^\w\s]")
+
+SENTENCE_END = frozenset(".!?")
+# Punctuation written directly after the preceding word
+NO_SPACE_BEFORE = frozenset(",.!?;:%)]}")
+
+
+def tokenize(text: str) -> Tuple[List[str], List[bool]]:
+    """
+    Split text into word and punctuation tokens.
+
+    Returns:
+        The tokens, and for each whether whitespace precedes it
+    """
+    tokens: List[str] = []
+    spaced: List[bool] = []
+    # Most whitespace-separated chunks are plain words and need no regex
+    for chunk in text.split():
+        if chunk.isalnum():
+            tokens.append(chunk)
+            spaced.append(True)
+        else:
+            parts = TOKEN_PATTERN.findall(chunk)
+            tokens.extend(parts)
+            spaced.append(True)
+            spaced.extend([False] * (len(parts) - 1))
+    return tokens, spaced
+
+
+def phrase_key(phrase: str) -> Tuple[str, ...]:
+    """Lowercased tokens of a phrase, as matched against transcripts."""
+    return tuple(token.lower() for token in TOKEN_PATTERN.findall(phrase))
+
+
+class PhraseMatcher(Generic[V]):
+    """Aho-Corasick automaton matching phrases over sequences of tokens."""
+
+    def __init__(self, phrases: Mapping[Tuple[str, ...], V]):
+        """
+        Compile the automaton.
+
+        Args:
+            phrases: Value of each phrase, keyed by its tokens
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        # (length, value) of every phrase ending in each state, longest first
+        self._output: List[List[Tuple[int, V]]] = [[]]
+        for tokens, value in phrases.items():
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = self._goto[state][token] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((len(tokens), value))
+
+        # Failure links, breadth first, so a state's link is final before its children's
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = sorted(
+                    self._output[child] + self._output[self._fail[child]], key=lambda match: -match[0]
+                )
+
+    def find(self, tokens: Sequence[str]) -> List[Tuple[int, int, V]]:
+        """
+        Find non-overlapping phrases, leftmost first and longest at each start.
+
+        Args:
+            tokens: Lowercased tokens to scan
+
+        Returns:
+            (start, end, value) of each match, in order
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        candidates = []
+        state = 0
+        for index, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, value in output[state]:
+                candidates.append((index + 1 - length, index + 1, value))
+
+        candidates.sort(key=lambda match: (match[0], match[0] - match[1]))
+        matches = []
+        position = 0
+        for start, end, value in candidates:
+            if start >= position:
+                matches.append((start, end, value))
+                position = end
+        return matches
+
+
+class RuleRewriter:
+    """Rule-based rewriter for one glossary and filler word list."""
+
+    def __init__(self, glossary: Optional[Mapping[str, str]], filler_words: Iterable[str]):
+        """
+        Compile the rewriter.
+
+        Args:
+            glossary: Terms to write as spelled here, matched case-insensitively
+            filler_words: Words and phrases to remove
+        """
+        phrases: Dict[Tuple[str, ...], Optional[str]] = {phrase_key(phrase): None for phrase in filler_words}
+        # A glossary term is kept even if it is also listed as a filler
+        phrases.update((phrase_key(term), term) for term in glossary or {})
+        self._matcher: PhraseMatcher[Optional[str]] = PhraseMatcher(phrases)
+
+    def rewrite(self, text: str) -> str:
+        """
+        Rewrite a transcript.
+
+        Args:
+            text: Transcript to rewrite
+
+        Returns:
+            str: The transcript without fillers, with glossary spellings,
+            capitalized sentences and closing punctuation
+        """
+        tokens, spaced = tokenize(text)
+        matches = iter(self._matcher.find([token.lower() for token in tokens]))
+        next_match = next(matches, None)
+
+        # [text, preceded by a space, keeps its spelling]
+        out: List[list] = []
+        index = 0
+        while index < len(tokens):
+            if next_match is None or next_match[0] != index:
+                out.append([tokens[index], spaced[index], False])
+                index += 1
+                continue
+
+            start, end, term = next_match
+            next_match = next(matches, None)
+            index = end
+            if term is not None:
+                out.append([term, spaced[start], True])
+            elif index < len(tokens) and tokens[index] == ",":
+                # A filler set off by commas takes them with it
+                index += 1
+                if out and out[-1][0] == ",":
+                    out.pop()
+
+        return self._punctuate(out)
+
+    @staticmethod
+    def _punctuate(out: List[list]) -> str:
+        """Fix commas, casing and closing punctuation, and join the tokens."""
+        parts: List[str] = []
+        sentence_start = True
+        for index, (token, space, keep) in enumerate(out):
+            following = out[index + 1][0] if index + 1 < len(out) else None
+            if token == ",":
+                # No comma opening a sentence or doubling other punctuation
+                if sentence_start or following is None or following == "," or following in SENTENCE_END:
+                    continue
+            elif token in SENTENCE_END:
+                # The dots of abbreviations such as "e.g." do not end the sentence
+                abbreviation = (
+                    token == "." and len(parts) >= 3 and len(parts[-1]) == 1 and parts[-1].isalpha()
+                    and parts[-2] == "." and not out[index - 1][1]
+                )
+                sentence_start = sentence_start or not abbreviation
+            elif token[0].isalnum():
+                if not keep:
+                    if token == "i" or token[:2] in ("i'", "i’"):
+                        token = "I" + token[1:]
+                    if sentence_start and (space or not parts):
+                        token = token[0].upper() + token[1:]
+                sentence_start = False
+
+            if parts and space and token not in NO_SPACE_BEFORE:
+                parts.append(" ")
+            parts.append(token)
+
+        if parts and parts[-1] not in SENTENCE_END:
+            parts.append(".")
+        return "".join(parts)
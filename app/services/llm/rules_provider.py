@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry, registry
+from app.core.tracing import tracer
+from app.models.api.schemas import Profile, RewriteOptions, User
+from app.services.llm.rules import RuleRewriter
+
+# Create logger
+logger = get_logger(__name__)
+
+# Rewriters compiled for the most recently used glossaries
+MAX_CACHED_REWRITERS = 256
+
+
+class RulesProvider:
+    """
+    Deterministic rewrite provider that needs no model.
+
+    Removes filler words, writes glossary terms as the profile spells them and
+    fixes sentence casing and punctuation. It cannot shorten text, so a
+    rewrite still over the profile's ``max_words`` is sent to the fallback
+    LLM provider instead.
+    """
+
+    def __init__(
+        self,
+        filler_words: Sequence[str],
+        fallback_provider: str = "openai",
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._filler_words = tuple(filler_words)
+        self._fallback_provider = fallback_provider
+        self._rewriters: "OrderedDict[Tuple, RuleRewriter]" = OrderedDict()
+
+        self._duration = metrics.histogram(
+            "rules_rewrite_duration_seconds",
+            "Time to rewrite a transcript with rules",
+            buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+        )
+        self._fallbacks = metrics.counter(
+            "rules_rewrite_fallbacks_total", "Rule-based rewrites handed to the LLM because they were over max_words"
+        )
+
+    def _rewriter(self, profile: Profile) -> RuleRewriter:
+        """Get the compiled rewriter for a profile's glossary and filler words."""
+        key = (
+            tuple(profile.glossary.items()) if profile.glossary else (),
+            tuple(profile.filler_words) if profile.filler_words else (),
+        )
+        rewriter = self._rewriters.get(key)
+        if rewriter is None:
+            rewriter = RuleRewriter(profile.glossary, self._filler_words + key[1])
+            self._rewriters[key] = rewriter
+            while len(self._rewriters) > MAX_CACHED_REWRITERS:
+                self._rewriters.popitem(last=False)
+        else:
+            self._rewriters.move_to_end(key)
+        return rewriter
+
+    async def rewrite(
+        self,
+        transcript: str,
+        profile: Profile,
+        options: Optional[RewriteOptions] = None,
+        user: Optional[User] = None
+    ) -> tuple[str, int]:
+        """
+        Rewrite text with rules, or with the fallback LLM if the profile needs it.
+
+        Args:
+            transcript: Text to rewrite
+            profile: User profile for rewriting
+            options: Optional parameters, passed on to the fallback
+            user: User the request is made for, passed on to the fallback
+
+        Returns:
+            Tuple containing rewritten text and processing time in milliseconds
+        """
+        start_time = time.perf_counter()
+        with tracer.span("llm.rules_rewrite", profile_id=profile.id):
+            text = self._rewriter(profile).rewrite(transcript)
+        elapsed = time.perf_counter() - start_time
+        self._duration.observe(elapsed)
+
+        if profile.max_words and len(text.split()) > profile.max_words:
+            self._fallbacks.inc()
+            logger.info(
+                "Rule-based rewrite over max_words, using the LLM",
+                profile_id=profile.id,
+                max_words=profile.max_words,
+                fallback_provider=self._fallback_provider,
+            )
+            from app.services.llm.factory import get_llm_provider
+            return await get_llm_provider(self._fallback_provider).rewrite(transcript, profile, options, user)
+
+        return text, int(elapsed * 1000)
+
+
+# Create a singleton instance
+rules_provider = RulesProvider(
+    filler_words=[word.strip() for word in settings.RULES_FILLER_WORDS.split(",") if word.strip()],
+    fallback_provider=settings.RULES_FALLBACK_PROVIDER,
+    metrics=registry,
+)
@@ -0,0 +1 @@
+# Stored rewrite profile services module
@@ -0,0 +1,127 @@
+import hashlib
+from typing import Optional, Tuple
+
+from app.core.logging import get_logger
+from app.core.profile_cache import profile_cache
+from app.models.api.schemas import Profile, StoredProfile
+from app.repositories.profile_repository import ProfileRepositoryInterface
+from app.services.llm.prompts import build_system_prompt
+
+# Create logger
+logger = get_logger(__name__)
+
+
+class ProfileConflictError(ValueError):
+    """Raised when a profile write does not apply to the profile's current version."""
+
+
+def profile_etag(profile: Profile) -> str:
+    """Strong ETag of a profile's content."""
+    digest = hashlib.sha256(profile.model_dump_json().encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(header: Optional[str], profile: Optional[StoredProfile]) -> bool:
+    """
+    Check an If-Match or If-None-Match header against a stored profile.
+
+    Args:
+        header: Header value, ``*`` or a comma-separated list of ETags
+        profile: Current profile, or None if there is none
+
+    Returns:
+        True if the profile exists and the header names it
+    """
+    if header is None or profile is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or profile.etag in tags
+
+
+class ProfileService:
+    """Service for stored rewrite profiles with dependency injection."""
+
+    def __init__(self, profile_repository: ProfileRepositoryInterface):
+        self.profile_repository = profile_repository
+
+    async def get_profile(self, user_id: str, profile_id: str, version: Optional[int] = None) -> Optional[StoredProfile]:
+        """
+        Get a user's stored profile, from the cache when possible.
+
+        Invalidations only reach this worker's cache, so a cached copy at
+        another version than the caller expects may be stale; the database
+        decides before a mismatch is reported.
+
+        Args:
+            user_id: Owner of the profile
+            profile_id: Profile ID
+            version: Version the caller expects, if any
+
+        Returns:
+            The current profile, or None if there is none
+        """
+        profile = profile_cache.get(user_id, profile_id)
+        if profile is None or (version is not None and version != profile.version):
+            profile = await self.profile_repository.get_profile(user_id, profile_id)
+            if profile is not None:
+                profile_cache.put(user_id, profile)
+        return profile
+
+    async def put_profile(
+        self, user_id: str, profile: Profile, if_match: Optional[str] = None
+    ) -> Tuple[StoredProfile, bool]:
+        """
+        Store a profile, compiling its system prompt once.
+
+        Storing unchanged content keeps the current version.
+
+        Args:
+            user_id: Owner of the profile
+            profile: Validated profile
+            if_match: Optional If-Match header the current version must satisfy
+
+        Returns:
+            The stored profile and whether it was created
+
+        Raises:
+            ProfileConflictError: If If-Match does not match, or the profile changed concurrently
+        """
+        # Writes check the database, not a possibly stale cached copy
+        current = await self.profile_repository.get_profile(user_id, profile.id)
+        if if_match is not None and not etag_matches(if_match, current):
+            raise ProfileConflictError("Profile does not match If-Match")
+
+        etag = profile_etag(profile)
+        if current is not None and current.etag == etag:
+            return current, False
+
+        stored = await self.profile_repository.save_profile(
+            user_id,
+            profile,
+            etag=etag,
+            system_prompt=build_system_prompt(profile),
+            expected_version=current.version if current is not None else None,
+        )
+        if stored is None:
+            raise ProfileConflictError("Profile was changed by another request")
+
+        profile_cache.invalidate(user_id, profile.id)
+        profile_cache.put(user_id, stored)
+        logger.info("Profile stored", user_id=user_id, profile_id=profile.id, version=stored.version)
+        return stored, current is None
+
+    async def delete_profile(self, user_id: str, profile_id: str, if_match: Optional[str] = None) -> bool:
+        """
+        Delete a user's stored profile.
+
+        Raises:
+            ProfileConflictError: If If-Match does not match the current version
+        """
+        if if_match is not None:
+            current = await self.profile_repository.get_profile(user_id, profile_id)
+            if not etag_matches(if_match, current):
+                raise ProfileConflictError("Profile does not match If-Match")
+
+        deleted = await self.profile_repository.delete_profile(user_id, profile_id)
+        profile_cache.invalidate(user_id, profile_id)
+        return deleted
@@ -1,7 +1,16 @@
 """Speech-to-text services package."""
 
-from app.services.stt.whisper_provider import whisper_stt
-from app.services.stt.faster_whisper import faster_whisper_stt
 from app.services.stt.factory import get_stt_provider
 
 __all__ = ["whisper_stt", "faster_whisper_stt", "get_stt_provider"]
+
+
+def __getattr__(name: str):
+    # Provider singletons are imported on first access, see get_stt_provider
+    if name == "whisper_stt":
+        from app.services.stt.whisper_provider import whisper_stt
+        return whisper_stt
+    if name == "faster_whisper_stt":
+        from app.services.stt.faster_whisper import faster_whisper_stt
+        return faster_whisper_stt
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
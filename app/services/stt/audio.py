@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+# Used when the container has no duration: 32 kbit/s is below what speech
+# codecs are normally encoded at, so the estimate errs on the long side
+FALLBACK_BYTES_PER_SECOND = 4000
+
+# Densest format speech is normally uploaded in: 16-bit stereo PCM at 48 kHz.
+# Any file is at least size / this long, whatever its header claims
+MAX_BYTES_PER_SECOND = 192000
+
+# Bytes FFmpeg may read to identify the format and its streams; enough for the
+# header of any container speech is uploaded in
+PROBE_BYTES = 32768
+
+
+class AudioInfo(NamedTuple):
+    """Audio properties read from a container header."""
+    duration_seconds: Optional[float]
+    codec: str
+    sample_rate: int
+    channels: int
+
+
+class AudioProbeError(ValueError):
+    """Raised when a file is not audio FFmpeg can decode."""
+    pass
+
+
+class AudioTooLongError(ValueError):
+    """Raised when decoded audio is longer than the caller allows."""
+
+    def __init__(self, seconds: float, max_seconds: float):
+        super().__init__(f"Audio is {seconds:.1f} seconds long, over the {max_seconds:g} second limit")
+        self.seconds = seconds
+        self.max_seconds = max_seconds
+
+
+def probe_audio(source: Union[Path, BinaryIO]) -> AudioInfo:
+    """
+    Read the duration, codec and sample rate of audio from its container header.
+
+    At most ``PROBE_BYTES`` are read to find the streams and nothing is
+    decoded, so this is cheap enough to run on every upload before it is
+    accepted.
+
+    Args:
+        source: Path to, or seekable file object of, the audio
+
+    Returns:
+        AudioInfo: Properties of the first audio stream; the duration is None
+        when the container does not record it
+
+    Raises:
+        AudioProbeError: If the file is not a container FFmpeg can read or
+            holds no decodable audio stream
+    """
+    # Imported here so PyAV is only loaded once audio is handled
+    import av
+
+    try:
+        with av.open(str(source) if isinstance(source, Path) else source, mode="r", options={"probesize": str(PROBE_BYTES)}) as container:
+            if not container.streams.audio:
+                raise AudioProbeError("No audio stream")
+            stream = container.streams.audio[0]
+            codec = stream.codec_context
+            if not codec.name or not codec.sample_rate:
+                raise AudioProbeError("Unknown audio codec")
+
+            duration = None
+            if container.duration is not None:
+                duration = container.duration / av.time_base
+            elif stream.duration is not None and stream.time_base is not None:
+                duration = float(stream.duration * stream.time_base)
+            return AudioInfo(duration, codec.name, codec.sample_rate, codec.channels)
+    except av.FFmpegError as e:
+        raise AudioProbeError(str(e)) from e
+
+
+def estimated_duration_seconds(info: Optional[AudioInfo], size: int) -> float:
+    """
+    Get the duration of audio, estimating it from its size when the header has none.
+
+    The header is written by the client, so its duration is never taken to be
+    shorter than the file size allows at ``MAX_BYTES_PER_SECOND``.
+
+    Args:
+        info: Probed audio properties, if any
+        size: File size in bytes
+
+    Returns:
+        float: Duration in seconds
+    """
+    if info is not None and info.duration_seconds is not None:
+        return max(info.duration_seconds, size / MAX_BYTES_PER_SECOND)
+    return size / FALLBACK_BYTES_PER_SECOND
+
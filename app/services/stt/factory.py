@@ -1,16 +1,22 @@
 from app.core.config import settings
-from app.core.logging import get_logger
-from app.services.stt.whisper_provider import whisper_stt
-from app.services.stt.faster_whisper import faster_whisper_stt
+from app.core.logging import event_sampler, get_logger
 
 # Create logger
 logger = get_logger(__name__)
 
+# Logged on every request; keep at most one a minute
+event_sampler.configure("Using local faster-whisper STT provider", max_per_second=1 / 60)
+event_sampler.configure("Using OpenAI Whisper API STT provider", max_per_second=1 / 60)
+
 
 def get_stt_provider():
     """
     Get the appropriate STT provider based on configuration.
     
+    Providers are imported on first use, so only the configured one's
+    dependencies (faster-whisper and CTranslate2, or the OpenAI client) are
+    ever loaded.
+    
     Returns:
         The STT provider instance (either OpenAI Whisper API or faster-whisper).
     """
@@ -18,7 +24,9 @@ def get_stt_provider():
     
     if provider == "local":
         logger.info("Using local faster-whisper STT provider")
+        from app.services.stt.faster_whisper import faster_whisper_stt
         return faster_whisper_stt
     else:
         logger.info("Using OpenAI Whisper API STT provider")
+        from app.services.stt.whisper_provider import whisper_stt
         return whisper_stt
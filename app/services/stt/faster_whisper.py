@@ -1,17 +1,43 @@
+import asyncio
 import os
+import threading
 import time
 import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Optional, Tuple, Union
 
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
 
 from app.core.config import settings
+from app.core.deadline import within_deadline
 from app.core.logging import get_logger
+from app.core.metrics import SLOW_BUCKETS, registry
+from app.core.tracing import tracer
+from app.models.api.schemas import TranscribeSegmentEvent, TranscribeFinalEvent
+from app.services.stt.audio import AudioProbeError, AudioTooLongError, estimated_duration_seconds, probe_audio
+from app.services.stt.scheduler import SttJob, stt_scheduler
 
 # Create logger
 logger = get_logger(__name__)
 
+# Stage metrics
+audio_decode_duration = registry.histogram(
+    "audio_decode_duration_seconds", "Time spent decoding and resampling uploaded audio", buckets=SLOW_BUCKETS
+)
+inference_duration = registry.histogram(
+    "stt_inference_duration_seconds", "Time spent transcribing audio", labelnames=("provider",), buckets=SLOW_BUCKETS
+).labels("faster_whisper")
+model_loading = registry.gauge("stt_model_loading", "1 while the local STT model is being loaded")
+model_loaded = registry.gauge("stt_model_loaded", "1 once the local STT model is loaded")
+model_load_duration = registry.gauge("stt_model_load_duration_seconds", "Time the local STT model took to load")
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Call a function, returning its result and how long it took in seconds."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
 
 class FasterWhisperSTT:
     """Speech-to-text service using faster-whisper."""
@@ -19,6 +45,7 @@ class FasterWhisperSTT:
     def __init__(self):
         """Initialize the faster-whisper model."""
         self._model = None
+        self._load_lock = threading.Lock()
         self._model_name = settings.WHISPER_MODEL
         self._compute_type = settings.WHISPER_COMPUTE_TYPE
         logger.info(
@@ -32,23 +59,41 @@ class FasterWhisperSTT:
         """
         Lazy-load the model when first needed.
         
+        Concurrent first uses from worker threads wait for a single load.
+        
         Returns:
             WhisperModel: The loaded faster-whisper model.
         """
         if self._model is None:
-            logger.info("Loading faster-whisper model", model=self._model_name)
-            self._model = WhisperModel(
-                model_size_or_path=self._model_name,
-                device="cpu",
-                compute_type=self._compute_type,
-            )
-            logger.info("Model loaded successfully")
+            with self._load_lock:
+                if self._model is None:
+                    self._load()
         return self._model
     
+    def _load(self) -> None:
+        """Load the model configured by WHISPER_MODEL and WHISPER_COMPUTE_TYPE."""
+        logger.info("Loading faster-whisper model", model=self._model_name)
+        model_loading.set(1)
+        start = time.perf_counter()
+        try:
+            with tracer.span("stt.model_load", model=self._model_name):
+                self._model = WhisperModel(
+                    model_size_or_path=self._model_name,
+                    device="cpu",
+                    compute_type=self._compute_type,
+                )
+        finally:
+            model_loading.set(0)
+        model_load_duration.set(time.perf_counter() - start)
+        model_loaded.set(1)
+        logger.info("Model loaded successfully")
+    
     async def transcribe(
         self, 
         audio_file: Path, 
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        max_audio_seconds: Optional[float] = None
     ) -> Tuple[str, int]:
         """
         Transcribe audio file to text.
@@ -56,9 +101,14 @@ class FasterWhisperSTT:
         Args:
             audio_file: Path to audio file
             language: Optional language hint
+            audio_seconds: Probed audio duration, used to schedule the work
+            max_audio_seconds: Longest decoded audio to transcribe, if limited
             
         Returns:
             Tuple containing transcribed text and processing time in milliseconds
+            
+        Raises:
+            AudioTooLongError: If the decoded audio exceeds max_audio_seconds
         """
         start_time = time.time()
         
@@ -68,19 +118,19 @@ class FasterWhisperSTT:
             language=language
         )
         
-        # Run transcription with VAD (voice activity detection)
-        segments, info = self.model.transcribe(
-            str(audio_file),
-            language=language,
-            beam_size=5,
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500),
-        )
-        
-        # Collect all segments
-        text_parts = []
-        for segment in segments:
-            text_parts.append(segment.text)
+        with tracer.span("stt.transcribe", provider="faster_whisper") as span:
+            steps = self._scheduled_transcription(audio_file, language, audio_seconds, max_audio_seconds)
+            info = await anext(steps)
+            
+            # Collect all segments
+            text_parts = []
+            with tracer.span("stt.decode_segments"):
+                async for segment in steps:
+                    text_parts.append(segment.text)
+            
+            if span is not None:
+                span.set_attribute("audio.duration_seconds", info.duration)
+                span.set_attribute("stt.segments", len(text_parts))
         
         # Join all segments
         full_text = " ".join(text_parts).strip()
@@ -96,6 +146,169 @@ class FasterWhisperSTT:
         )
         
         return full_text, processing_time_ms
+    
+    async def transcribe_stream(
+        self, 
+        audio_file: Path, 
+        language: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        max_audio_seconds: Optional[float] = None
+    ) -> AsyncIterator[Union[TranscribeSegmentEvent, TranscribeFinalEvent]]:
+        """
+        Transcribe audio file to text, yielding segments as they are decoded.
+        
+        The faster-whisper segment generator is lazy, so each segment is pulled
+        in a worker thread and yielded as soon as it is decoded instead of
+        waiting for the whole file.
+        
+        Args:
+            audio_file: Path to audio file
+            language: Optional language hint
+            audio_seconds: Probed audio duration, used to schedule the work
+            max_audio_seconds: Longest decoded audio to transcribe, if limited
+            
+        Yields:
+            A TranscribeSegmentEvent per decoded segment, followed by a single
+            TranscribeFinalEvent holding the full text and timings
+            
+        Raises:
+            AudioTooLongError: If the decoded audio exceeds max_audio_seconds
+        """
+        start_time = time.time()
+        
+        logger.info(
+            "Streaming transcription of audio file", 
+            file=str(audio_file),
+            language=language
+        )
+        
+        steps = self._scheduled_transcription(audio_file, language, audio_seconds, max_audio_seconds)
+        info = await anext(steps)
+        
+        text_parts = []
+        async for segment in steps:
+            text_parts.append(segment.text)
+            yield TranscribeSegmentEvent(
+                text=segment.text.strip(),
+                start=segment.start,
+                end=segment.end,
+                avg_logprob=segment.avg_logprob,
+            )
+        
+        processing_time_ms = int((time.time() - start_time) * 1000)
+        
+        logger.info(
+            "Streaming transcription completed",
+            processing_time_ms=processing_time_ms,
+            segments=len(text_parts),
+            language_detected=info.language,
+            language_probability=round(info.language_probability, 2)
+        )
+        
+        yield TranscribeFinalEvent(
+            text=" ".join(text_parts).strip(),
+            stt_ms=processing_time_ms,
+            duration=info.duration,
+            language=info.language,
+        )
+    
+    async def _scheduled_transcription(
+        self,
+        audio_file: Path,
+        language: Optional[str],
+        audio_seconds: Optional[float],
+        max_audio_seconds: Optional[float] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Decode and transcribe audio as scheduler steps, yielding each segment.
+        
+        Decoding, language detection with VAD and every segment each run in a
+        worker thread while holding a model slot, and the slot is given up
+        between segments so shorter transcriptions can run in between. Only
+        time spent in the model counts as inference, not time waiting for a
+        slot or for the consumer. The decoded length, not the header's, is
+        checked against ``max_audio_seconds`` before any inference runs. Each
+        step, including its wait for a slot, gives up at the request deadline.
+        
+        Yields:
+            The transcription info once language detection has run, then each
+            decoded segment
+        """
+        if audio_seconds is None:
+            audio_seconds = await asyncio.to_thread(self._audio_seconds, audio_file)
+        job = stt_scheduler.job(audio_seconds)
+        
+        audio = await self._step(job, self._decode, audio_file)
+        decoded_seconds = len(audio) / self.model.feature_extractor.sampling_rate
+        if max_audio_seconds is not None and decoded_seconds > max_audio_seconds:
+            raise AudioTooLongError(decoded_seconds, max_audio_seconds)
+        
+        (segments, info), inference_seconds = await self._step(
+            job, _timed, self._start_transcription, audio, language
+        )
+        segments = iter(segments)
+        yield info
+        
+        while True:
+            segment, step_seconds = await self._step(job, _timed, next, segments, None)
+            inference_seconds += step_seconds
+            if segment is None:
+                inference_duration.observe(inference_seconds)
+                return
+            job.progress(segment.end)
+            yield segment
+    
+    async def _step(self, job: SttJob, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a step on the scheduler within the request deadline.
+        
+        Raises:
+            DeadlineExceeded: If the deadline passes while the step waits or runs
+        """
+        async with within_deadline():
+            return await stt_scheduler.run(job, fn, *args)
+    
+    def _audio_seconds(self, audio_file: Path) -> float:
+        """Get the duration of an audio file from its header, or estimate it from its size."""
+        info = None
+        try:
+            info = probe_audio(audio_file)
+        except AudioProbeError:
+            pass
+        return estimated_duration_seconds(info, audio_file.stat().st_size)
+    
+    def _decode(self, audio_file: Path):
+        """
+        Decode an audio file to mono samples at the model's sampling rate.
+        
+        Returns:
+            numpy.ndarray: The decoded audio
+        """
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        with tracer.span("stt.decode_audio"), audio_decode_duration.time():
+            return decode_audio(str(audio_file), sampling_rate=sampling_rate)
+    
+    def _start_transcription(self, audio, language: Optional[str]):
+        """
+        Start a faster-whisper transcription with VAD (voice activity detection).
+        
+        Args:
+            audio: Decoded audio samples
+            language: Optional language hint
+            
+        Returns:
+            Tuple of the lazy segment generator and the transcription info
+        """
+        model = self.model
+        # Runs VAD and language detection; segments are decoded lazily
+        with tracer.span("stt.vad_language_detection"):
+            return model.transcribe(
+                audio,
+                language=language,
+                beam_size=5,
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500),
+            )
 
 
 # Create a singleton instance
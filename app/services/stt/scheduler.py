@@ -0,0 +1,203 @@
+"""
+Duration-aware scheduling of local transcription work.
+
+Local transcriptions share a fixed number of model slots. Each one is split
+into steps (decoding the audio, voice activity and language detection, then
+one step per decoded segment) and every step waits for a slot, so a long
+transcription gives its slot up at each segment boundary and a voice note
+arriving behind it runs next instead of waiting for the whole file.
+
+Jobs are classified by their probed audio duration: up to
+``interactive_max_seconds`` is interactive, anything longer bulk. Waiting
+steps are dispatched interactive first and, within a class, shortest remaining
+audio first. A waiting step's priority improves by ``aging_rate`` seconds of
+audio for every second it waits, and a bulk step that has waited
+``bulk_max_wait_seconds`` goes ahead of interactive ones, so neither long
+jobs nor jobs in a busy class starve.
+
+Steps run in worker threads, which cannot be interrupted: a step whose caller
+is cancelled keeps its slot until its thread has finished.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry, registry
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+T = TypeVar("T")
+
+
+class SttJob:
+    """A transcription whose steps are scheduled together."""
+
+    __slots__ = ("job_class", "audio_seconds", "remaining_seconds", "enqueued_at", "started")
+
+    def __init__(self, job_class: str, audio_seconds: float):
+        self.job_class = job_class
+        self.audio_seconds = audio_seconds
+        self.remaining_seconds = audio_seconds
+        self.enqueued_at = 0.0
+        # Whether a step has run, so waiting again means being preempted
+        self.started = False
+
+    def progress(self, position_seconds: float) -> None:
+        """Record how far into the audio the transcription has got."""
+        self.remaining_seconds = max(self.audio_seconds - position_seconds, 0.0)
+
+
+class SttScheduler:
+    """Shares model slots between transcriptions, shortest and interactive first."""
+
+    def __init__(
+        self,
+        slots: int = 1,
+        interactive_max_seconds: float = 30,
+        bulk_max_wait_seconds: float = 10,
+        aging_rate: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self.interactive_max_seconds = interactive_max_seconds
+        self.bulk_max_wait_seconds = bulk_max_wait_seconds
+        self.aging_rate = aging_rate
+        self._clock = clock
+        self._free = slots
+        self._waiting: List[Tuple[SttJob, asyncio.Future]] = []
+
+        self._queue_wait = metrics.histogram(
+            "stt_queue_wait_seconds", "Time transcription steps waited for a model slot", labelnames=("class",)
+        )
+        self._queue_depth = metrics.gauge(
+            "stt_queue_depth", "Transcription steps waiting for a model slot", labelnames=("class",)
+        )
+        self._jobs = metrics.counter("stt_jobs_total", "Transcriptions scheduled", labelnames=("class",))
+        self._preemptions = metrics.counter(
+            "stt_preemptions_total", "Times a started transcription had to wait for a slot between steps", labelnames=("class",)
+        )
+
+    def job(self, audio_seconds: float) -> SttJob:
+        """Create a job for a transcription of ``audio_seconds`` of audio."""
+        job_class = INTERACTIVE if audio_seconds <= self.interactive_max_seconds else BULK
+        self._jobs.labels(job_class).inc()
+        return SttJob(job_class, audio_seconds)
+
+    @asynccontextmanager
+    async def slot(self, job: SttJob) -> AsyncIterator[None]:
+        """Hold a model slot for one step of a job, waiting for its turn."""
+        await self._acquire(job)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, job: SttJob, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run one step of a job in a worker thread while holding a model slot.
+
+        If the caller is cancelled, the thread still runs to completion and the
+        slot is only released once it has, so the slot count never exceeds the
+        threads actually using the model.
+
+        Args:
+            job: Job the step belongs to
+            fn: Blocking function to run
+            *args: Arguments for ``fn``
+
+        Returns:
+            What ``fn`` returned
+        """
+        await self._acquire(job)
+        future = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._release()
+            else:
+                future.add_done_callback(self._release_after)
+
+    def _release_after(self, future: asyncio.Future) -> None:
+        if not future.cancelled():
+            # Nobody awaits the abandoned step; retrieve its error so it is not reported as unhandled
+            future.exception()
+        self._release()
+
+    async def _acquire(self, job: SttJob) -> None:
+        job.enqueued_at = self._clock()
+        if self._free > 0 and not self._waiting:
+            self._free -= 1
+            self._granted(job)
+            return
+
+        if job.started:
+            self._preemptions.labels(job.job_class).inc()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((job, future))
+        self._queue_depth.labels(job.job_class).inc()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up; pass the slot on
+                self._release()
+            else:
+                self._remove(future)
+            raise
+
+    def _release(self) -> None:
+        self._free += 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._free > 0 and self._waiting:
+            job, future = self._waiting.pop(self._select())
+            self._queue_depth.labels(job.job_class).dec()
+            if future.done():
+                continue
+            self._free -= 1
+            self._granted(job)
+            future.set_result(None)
+
+    def _granted(self, job: SttJob) -> None:
+        self._queue_wait.labels(job.job_class).observe(self._clock() - job.enqueued_at)
+        job.started = True
+
+    def _select(self) -> int:
+        """Index of the waiting step to run next."""
+        now = self._clock()
+        overdue = [
+            i for i, (job, _) in enumerate(self._waiting)
+            if job.job_class == BULK and now - job.enqueued_at >= self.bulk_max_wait_seconds
+        ]
+        if overdue:
+            return min(overdue, key=lambda i: self._waiting[i][0].enqueued_at)
+
+        interactive = [i for i, (job, _) in enumerate(self._waiting) if job.job_class == INTERACTIVE]
+        candidates = interactive or range(len(self._waiting))
+        return min(candidates, key=lambda i: self._priority(self._waiting[i][0], now))
+
+    def _priority(self, job: SttJob, now: float) -> Tuple[float, float]:
+        """Remaining audio less the aging credit; lower runs first, ties by arrival."""
+        return job.remaining_seconds - self.aging_rate * (now - job.enqueued_at), job.enqueued_at
+
+    def _remove(self, future: asyncio.Future) -> None:
+        for i, (job, waiting) in enumerate(self._waiting):
+            if waiting is future:
+                del self._waiting[i]
+                self._queue_depth.labels(job.job_class).dec()
+                return
+
+
+# Create a singleton instance
+stt_scheduler = SttScheduler(
+    slots=settings.STT_SCHEDULER_SLOTS,
+    interactive_max_seconds=settings.STT_INTERACTIVE_MAX_SECONDS,
+    bulk_max_wait_seconds=settings.STT_BULK_MAX_WAIT_SECONDS,
+    metrics=registry,
+)
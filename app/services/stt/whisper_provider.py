@@ -1,16 +1,26 @@
 import os
 import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, AsyncIterator, Optional, Tuple, Union
 
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError
 
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, deadline_headers
 from app.core.logging import get_logger
+from app.core.metrics import SLOW_BUCKETS, registry
+from app.core.retry import RetryPolicy, call_with_retries
+from app.core.tracing import trace_headers, tracer
+from app.models.api.schemas import TranscribeSegmentEvent, TranscribeFinalEvent
 
 # Create logger
 logger = get_logger(__name__)
 
+# Whisper API call time, which covers upload, decoding and inference
+inference_duration = registry.histogram(
+    "stt_inference_duration_seconds", "Time spent transcribing audio", labelnames=("provider",), buckets=SLOW_BUCKETS
+).labels("openai")
+
 
 class WhisperSTT:
     """Speech-to-text service using OpenAI Whisper API."""
@@ -19,15 +29,23 @@ class WhisperSTT:
         """Initialize the Whisper API client."""
         self._client = None
         self._model = settings.WHISPER_MODEL
+        self._retry_policy = RetryPolicy(
+            max_attempts=settings.PROVIDER_MAX_ATTEMPTS,
+            base_delay_seconds=settings.PROVIDER_BACKOFF_BASE_SECONDS,
+            max_delay_seconds=settings.PROVIDER_BACKOFF_MAX_SECONDS,
+            attempt_timeout_seconds=settings.WHISPER_TIMEOUT_SECONDS,
+            retry_on=(APIConnectionError,),
+            metrics=registry,
+        )
         logger.info("Initializing Whisper STT service", model=self._model)
     
     @property
-    def client(self) -> OpenAI:
+    def client(self) -> AsyncOpenAI:
         """
         Lazy-load the OpenAI client when first needed.
         
         Returns:
-            OpenAI: The OpenAI client.
+            AsyncOpenAI: The OpenAI client.
         """
         if self._client is None:
             if not settings.WHISPER_API_KEY:
@@ -38,15 +56,46 @@ class WhisperSTT:
             else:
                 api_key = settings.WHISPER_API_KEY
             
-            self._client = OpenAI(api_key=api_key)
+            # Retries are made by call_with_retries, within the request deadline
+            self._client = AsyncOpenAI(
+                api_key=api_key, base_url=settings.WHISPER_BASE_URL or settings.OPENAI_BASE_URL, max_retries=0
+            )
             logger.info("Whisper API client initialized")
         
         return self._client
     
+    async def _create_transcription(self, audio_file: Path, language: Optional[str], **kwargs: Any) -> Any:
+        """
+        Call the transcription API, retrying transient failures within the request deadline.
+        
+        Args:
+            audio_file: Path to audio file, reopened for every attempt
+            language: Optional language hint
+            **kwargs: Further arguments for the API call
+            
+        Returns:
+            The API response
+        """
+        async def attempt(timeout: Optional[float]):
+            with open(audio_file, "rb") as audio:
+                return await self.client.audio.transcriptions.create(
+                    model=self._model,
+                    file=audio,
+                    language=language,
+                    timeout=timeout,
+                    extra_headers={**trace_headers(), **deadline_headers()},
+                    **kwargs,
+                )
+        
+        with inference_duration.time(), tracer.span("stt.transcribe", provider="openai"):
+            return await call_with_retries(attempt, self._retry_policy, "openai.transcription")
+    
     async def transcribe(
         self, 
         audio_file: Path, 
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        max_audio_seconds: Optional[float] = None
     ) -> Tuple[str, int]:
         """
         Transcribe audio file to text using OpenAI Whisper API.
@@ -54,9 +103,15 @@ class WhisperSTT:
         Args:
             audio_file: Path to audio file
             language: Optional language hint
+            audio_seconds: Probed audio duration; unused, the API schedules its own work
+            max_audio_seconds: Unused; the API decodes the audio, so only the
+                probed duration is checked against the limit
             
         Returns:
             Tuple containing transcribed text and processing time in milliseconds
+            
+        Raises:
+            DeadlineExceeded: If the request deadline passes first
         """
         start_time = time.time()
         
@@ -67,13 +122,8 @@ class WhisperSTT:
         )
         
         try:
-            with open(audio_file, "rb") as audio:
-                # Call Whisper API
-                response = self.client.audio.transcriptions.create(
-                    model=self._model,
-                    file=audio,
-                    language=language
-                )
+            # Call Whisper API
+            response = await self._create_transcription(audio_file, language)
             
             # Extract transcribed text
             transcribed_text = response.text
@@ -88,9 +138,75 @@ class WhisperSTT:
             
             return transcribed_text, processing_time_ms
             
+        except DeadlineExceeded:
+            logger.warning("Transcription abandoned at the request deadline", file=str(audio_file))
+            raise
         except Exception as e:
             logger.exception("Error transcribing audio", error=str(e))
             raise
+    
+    async def transcribe_stream(
+        self, 
+        audio_file: Path, 
+        language: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        max_audio_seconds: Optional[float] = None
+    ) -> AsyncIterator[Union[TranscribeSegmentEvent, TranscribeFinalEvent]]:
+        """
+        Transcribe audio file with the Whisper API, yielding segment events.
+        
+        The Whisper API returns all segments at once, so the events are emitted
+        after the request completes, using the same shape as the local provider.
+        
+        Args:
+            audio_file: Path to audio file
+            language: Optional language hint
+            audio_seconds: Probed audio duration; unused, the API schedules its own work
+            max_audio_seconds: Unused; the API decodes the audio, so only the
+                probed duration is checked against the limit
+            
+        Yields:
+            A TranscribeSegmentEvent per segment, followed by a single
+            TranscribeFinalEvent holding the full text and timings
+        """
+        start_time = time.time()
+        
+        logger.info(
+            "Streaming transcription with Whisper API", 
+            file=str(audio_file),
+            language=language
+        )
+        
+        try:
+            response = await self._create_transcription(audio_file, language, response_format="verbose_json")
+        except DeadlineExceeded:
+            logger.warning("Transcription abandoned at the request deadline", file=str(audio_file))
+            raise
+        except Exception as e:
+            logger.exception("Error transcribing audio", error=str(e))
+            raise
+        
+        for segment in response.segments or []:
+            yield TranscribeSegmentEvent(
+                text=segment.text.strip(),
+                start=segment.start,
+                end=segment.end,
+                avg_logprob=segment.avg_logprob,
+            )
+        
+        processing_time_ms = int((time.time() - start_time) * 1000)
+        
+        logger.info(
+            "Streaming transcription completed",
+            processing_time_ms=processing_time_ms
+        )
+        
+        yield TranscribeFinalEvent(
+            text=response.text,
+            stt_ms=processing_time_ms,
+            duration=response.duration,
+            language=response.language,
+        )
 
 
 # Create a singleton instance
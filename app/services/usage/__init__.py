@@ -0,0 +1 @@
+# Usage metering services module
@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.logging import get_logger
+from app.core.metrics import MetricsRegistry, registry
+from app.models.api.schemas import DailyUsage, EndpointUsage, UsageEvent
+from app.repositories.usage_repository import UsageRepositoryInterface, SQLAlchemyUsageRepository
+
+# Create logger
+logger = get_logger(__name__)
+
+
+class UsageService:
+    """Service for usage queries with dependency injection."""
+
+    def __init__(self, usage_repository: UsageRepositoryInterface):
+        self.usage_repository = usage_repository
+
+    async def get_usage_by_endpoint(self, user_id: str, start: datetime, end: datetime) -> List[EndpointUsage]:
+        """Get a user's usage per endpoint."""
+        return await self.usage_repository.get_usage_by_endpoint(user_id, start, end)
+
+    async def get_daily_usage(self, user_id: str, start: datetime, end: datetime) -> List[DailyUsage]:
+        """Get a user's usage per day."""
+        return await self.usage_repository.get_daily_usage(user_id, start, end)
+
+
+class UsageRecorder:
+    """
+    Write-behind buffer of usage events.
+
+    Recording an event only appends it to memory; events are written in
+    multi-row batches every ``flush_interval_seconds`` or as soon as
+    ``batch_size`` events are waiting, and once more on shutdown. Batches that
+    fail to write are kept for the next flush, up to ``max_buffered`` events,
+    after which the oldest are dropped. Events still buffered when the process
+    dies are lost.
+    """
+
+    def __init__(
+        self,
+        flush_interval_seconds: float,
+        batch_size: int,
+        max_buffered: int,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        metrics = metrics if metrics is not None else MetricsRegistry()
+        self._flush_interval_seconds = flush_interval_seconds
+        self._batch_size = batch_size
+        self._max_buffered = max_buffered
+        self._buffer: List[UsageEvent] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending_flushes: Set[asyncio.Task] = set()
+
+        self._buffered = metrics.gauge("usage_events_buffered", "Usage events waiting to be written")
+        self._written = metrics.counter("usage_events_written_total", "Usage events written to the database")
+        self._dropped = metrics.counter("usage_events_dropped_total", "Usage events dropped because the buffer was full")
+        self._flush_failures = metrics.counter("usage_flush_failures_total", "Usage event batches that failed to write")
+
+    def record(self, event: UsageEvent) -> None:
+        """Buffer a usage event, scheduling a flush once a full batch is waiting."""
+        self._buffer.append(event)
+        self._trim()
+        if len(self._buffer) >= self._batch_size and not self._pending_flushes:
+            task = asyncio.create_task(self._flush_quietly())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+
+    async def flush(self) -> int:
+        """
+        Write every buffered event in batches.
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self._batch_size]
+                del self._buffer[:len(batch)]
+                try:
+                    async with async_session() as db:
+                        await SQLAlchemyUsageRepository(db).insert_events(batch)
+                except Exception:
+                    # Put the batch back in front of anything recorded meanwhile
+                    self._buffer[:0] = batch
+                    self._trim()
+                    self._flush_failures.inc()
+                    raise
+                written += len(batch)
+                self._written.inc(len(batch))
+                self._buffered.set(len(self._buffer))
+        return written
+
+    def start(self) -> None:
+        """Start the periodic flush."""
+        if self._task is None and self._flush_interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes)
+        await self._flush_quietly()
+
+    def _trim(self) -> None:
+        overflow = len(self._buffer) - self._max_buffered
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self._dropped.inc(overflow)
+        self._buffered.set(len(self._buffer))
+
+    async def _flush_quietly(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Usage event flush failed", error=str(e), buffered=len(self._buffer))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval_seconds)
+            await self._flush_quietly()
+
+
+# Create a singleton instance
+usage_recorder = UsageRecorder(
+    flush_interval_seconds=settings.USAGE_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.USAGE_FLUSH_BATCH_SIZE,
+    max_buffered=settings.USAGE_MAX_BUFFERED_EVENTS,
+    metrics=registry,
+)
@@ -0,0 +1,47 @@
+"""
+Per-request access token verification overhead with and without the cache.
+
+Usage:
+    python -m benchmarks.auth_token_cache [--iterations N]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from fastapi import HTTPException
+
+from app.core import auth
+from app.core.auth import create_access_token, verify_token
+from app.core.token_cache import TokenVerificationCache
+
+
+def _time_per_call_us(token: str, iterations: int) -> float:
+    credentials_exception = HTTPException(status_code=401)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token, credentials_exception)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "bench@example.com"}, expires_delta=timedelta(minutes=30))
+
+    auth.token_cache = TokenVerificationCache(max_entries=0, ttl_seconds=0)
+    uncached_us = _time_per_call_us(token, args.iterations)
+
+    auth.token_cache = TokenVerificationCache(max_entries=10_000, ttl_seconds=300)
+    cached_us = _time_per_call_us(token, args.iterations)
+
+    print(f"iterations:        {args.iterations}")
+    print(f"uncached verify:   {uncached_us:8.2f} us/request")
+    print(f"cached verify:     {cached_us:8.2f} us/request")
+    print(f"speedup:           {uncached_us / cached_us:8.1f}x")
+    print(f"cache stats:       {auth.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Cold start report.
+
+Imports the application in a fresh interpreter with ``-X importtime`` and lists
+the top-level packages that cost the most, then runs the lifespan startup and
+prints the time each step took.
+
+Usage:
+    python -m benchmarks.cold_start [--top N]
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def _import_times() -> dict:
+    """Self import time in microseconds per top-level package."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    totals: dict = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return totals
+
+
+async def _run_lifespan() -> None:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals = _import_times()
+    print(f"Importing app.main: {sum(totals.values()) / 1000:.0f} ms (with -X importtime overhead)")
+    for name, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<28} {us / 1000:7.1f} ms")
+
+    asyncio.run(_run_lifespan())
+    from app.core.startup import startup_timer
+
+    print("Startup phases:")
+    for phase, ms in startup_timer.report().items():
+        print(f"  {phase:<28} {ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test of the authenticated user lookup path against the database pool.
+
+Runs the get_db dependency plus SQLAlchemyUserRepository.get_user_by_email at
+increasing concurrency and reports throughput, latency, checkout wait and pool
+timeouts, then the concurrency level at which throughput stops scaling. Uses a
+local SQLite stand-in unless DATABASE_URL points at a Postgres instance.
+
+Usage:
+    python -m benchmarks.db_pool_saturation [--pool-size N] [--max-overflow N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128])
+    parser.add_argument("--requests-per-worker", type=int, default=50)
+    return parser.parse_args()
+
+
+async def _lookup(get_db, repository_cls, email: str) -> None:
+    generator = get_db()
+    session = await generator.__anext__()
+    await repository_cls(session).get_user_by_email(email)
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        pass
+
+
+async def _worker(get_db, repository_cls, email: str, count: int, latencies: List[float], errors: List[Exception]) -> None:
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            await _lookup(get_db, repository_cls, email)
+        except Exception as e:
+            errors.append(e)
+        else:
+            latencies.append(time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from app.core import database
+    from app.core.database import BaseModel, engine, get_db
+    from app.models.api.schemas import UserCreate
+    from app.repositories.user_repository import SQLAlchemyUserRepository
+
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+    email = "bench@example.com"
+    async with database.async_session() as session:
+        repository = SQLAlchemyUserRepository(session)
+        if await repository.get_user_by_email(email) is None:
+            await repository.create_user(UserCreate(email=email, password="benchmark-password"))
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"pool: size={args.pool_size} max_overflow={args.max_overflow} timeout={args.pool_timeout}s")
+    print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'wait ms':>8} {'errors':>7}")
+
+    results = []
+    for concurrency in args.concurrency:
+        latencies: List[float] = []
+        errors: List[Exception] = []
+        wait_before = database.pool_checkout_wait_total.value
+        checkouts_before = database.pool_checkouts.value
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(get_db, SQLAlchemyUserRepository, email, args.requests_per_worker, latencies, errors)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+        throughput = len(latencies) / elapsed
+        checkouts = database.pool_checkouts.value - checkouts_before
+        avg_wait_ms = (database.pool_checkout_wait_total.value - wait_before) / checkouts * 1000 if checkouts else 0.0
+        p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+        p95 = statistics.quantiles(latencies, n=20)[18] * 1000 if len(latencies) >= 20 else 0.0
+        print(f"{concurrency:>11} {throughput:>9.0f} {p50:>8.2f} {p95:>8.2f} {avg_wait_ms:>8.2f} {len(errors):>7}")
+        results.append((concurrency, throughput, len(errors)))
+
+    # Saturated at the lowest concurrency that already reaches ~peak throughput
+    peak = max(throughput for _, throughput, _ in results)
+    saturation = next(concurrency for concurrency, throughput, _ in results if throughput >= peak * 0.9)
+    print(f"saturation point: concurrency {saturation} ({peak:.0f} req/s peak)")
+    failing = next((concurrency for concurrency, _, errors in results if errors), None)
+    if failing is not None:
+        print(f"pool timeouts from concurrency {failing}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    os.environ["DB_POOL_TIMEOUT_SECONDS"] = str(args.pool_timeout)
+    os.environ["DB_HEALTH_CHECK_INTERVAL_SECONDS"] = "0"
+    asyncio.run(main(args))
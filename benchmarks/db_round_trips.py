@@ -0,0 +1,134 @@
+"""
+Database round trips per request for the get_db dependency.
+
+Compares the previous get_db, which probed every session with SELECT 1 on an
+engine without pre-ping, with the lazy session dependency on the application's
+engine, for a handler that never touches the database (e.g. an authenticated
+request served from the user cache) and one that runs a query.
+
+Round trips are statements plus the liveness pings ``pool_pre_ping`` sends when
+a connection is checked out (``DB_POOL_PRE_PING``). The lazy session only
+checks a connection out when a statement runs, so a query request still pays
+one ping unless pre-ping is disabled.
+
+Usage:
+    python -m benchmarks.db_round_trips [--requests N]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_path}")
+
+from sqlalchemy import event, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.database import BaseModel, engine, get_db  # noqa: E402
+from app.models.db import UserModel  # noqa: E402
+
+# The engine as it was before lazy sessions: no pre-ping
+previous_engine = create_async_engine(os.environ["DATABASE_URL"])
+previous_session = sessionmaker(previous_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+class RoundTripCounter:
+    """Counts statements, pre-ping pings and pool checkouts issued against the engines."""
+
+    def __init__(self, *engines):
+        self.statements = 0
+        self.pings = 0
+        self.checkouts = 0
+        for async_engine in engines:
+            event.listen(async_engine.sync_engine, "before_cursor_execute", self._on_execute)
+            event.listen(async_engine.sync_engine.pool, "checkout", self._on_checkout)
+            self._count_pings(async_engine.dialect)
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.pings = 0
+        self.checkouts = 0
+
+    @property
+    def round_trips(self) -> int:
+        return self.statements + self.pings
+
+    def _count_pings(self, dialect) -> None:
+        # Pre-ping goes straight to the DBAPI connection, so no engine event sees it
+        do_ping = dialect.do_ping
+
+        def counting_ping(dbapi_connection):
+            self.pings += 1
+            return do_ping(dbapi_connection)
+
+        dialect.do_ping = counting_ping
+
+    def _on_execute(self, *args) -> None:
+        self.statements += 1
+
+    def _on_checkout(self, *args) -> None:
+        self.checkouts += 1
+
+
+async def probing_get_db():
+    """The previous get_db, which ran SELECT 1 before yielding the session."""
+    async with previous_session() as session:
+        await session.execute(text("SELECT 1"))
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def no_db_handler(session) -> None:
+    pass
+
+
+async def query_handler(session) -> None:
+    await session.execute(select(UserModel).filter(UserModel.email == "bench@example.com"))
+
+
+async def _run_request(dependency, handler) -> None:
+    generator = dependency()
+    session = await generator.__anext__()
+    await handler(session)
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        pass
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+
+    counter = RoundTripCounter(previous_engine, engine)
+    print(
+        f"{'dependency':<10} {'handler':<10} {'statements/req':>15} {'pings/req':>10} "
+        f"{'round trips/req':>16} {'checkouts/req':>14}"
+    )
+    for handler_name, handler in (("no-db", no_db_handler), ("query", query_handler)):
+        for dependency_name, dependency in (("probing", probing_get_db), ("lazy", get_db)):
+            counter.reset()
+            for _ in range(args.requests):
+                await _run_request(dependency, handler)
+            print(
+                f"{dependency_name:<10} {handler_name:<10} "
+                f"{counter.statements / args.requests:>15.2f} {counter.pings / args.requests:>10.2f} "
+                f"{counter.round_trips / args.requests:>16.2f} {counter.checkouts / args.requests:>14.2f}"
+            )
+
+    await previous_engine.dispose()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,242 @@
+"""
+Local stand-in for the OpenAI chat completions and Whisper transcription APIs.
+
+Responses follow the shape the OpenAI client expects, after a configurable
+latency with jitter. A fraction of requests can be failed with a chosen status
+(429s carry Retry-After) to see how the service behaves when its upstream
+degrades, and the first requests can be scripted to fail or hang so retries
+and deadlines can be tested deterministically.
+
+Usage:
+    python -m benchmarks.fake_openai [--port N] [--chat-latency-ms N] [--error-rate F]
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class FakeOpenAIConfig:
+    """Latency and failure behavior of the fake API."""
+
+    def __init__(
+        self,
+        chat_latency_ms: float = 300,
+        transcription_latency_ms: float = 800,
+        jitter_ms: float = 50,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        fail_first: int = 0,
+        hang_first: int = 0,
+        retry_after_seconds: Optional[float] = 1,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            chat_latency_ms: Mean chat completion latency
+            transcription_latency_ms: Mean transcription latency
+            jitter_ms: Uniform jitter added to each latency
+            error_rate: Fraction of requests failed with error_status
+            error_status: Status of injected failures
+            fail_first: Number of first requests always failed with error_status
+            hang_first: Number of first requests, after the failed ones, that never answer
+            retry_after_seconds: Retry-After sent with 429s, or None to send none
+            seed: Seed for the latency and failure randomness
+        """
+        self.chat_latency_ms = chat_latency_ms
+        self.transcription_latency_ms = transcription_latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.hang_first = hang_first
+        self.retry_after_seconds = retry_after_seconds
+        self.random = random.Random(seed)
+
+
+class FakeOpenAIStats:
+    """Requests the fake API served, by outcome."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.hangs = 0
+        # X-Request-Timeout of each request, None where it was not sent
+        self.request_timeouts: List[Optional[float]] = []
+
+
+def create_fake_openai_app(config: FakeOpenAIConfig, stats: Optional[FakeOpenAIStats] = None) -> Starlette:
+    """
+    Create the fake API application.
+
+    Args:
+        config: Latency and failure behavior
+        stats: Optional counters updated per request
+
+    Returns:
+        Starlette: ASGI app serving /v1/chat/completions and /v1/audio/transcriptions
+    """
+    stats = stats if stats is not None else FakeOpenAIStats()
+
+    async def _delay_or_fail(request: Request, latency_ms: float) -> Optional[JSONResponse]:
+        stats.requests += 1
+        request_number = stats.requests
+        timeout = request.headers.get("x-request-timeout")
+        stats.request_timeouts.append(float(timeout) if timeout is not None else None)
+
+        if config.fail_first < request_number <= config.fail_first + config.hang_first:
+            # Never answer; stop once the client gives up so shutdown is not held
+            stats.hangs += 1
+            while not await request.is_disconnected():
+                await asyncio.sleep(0.01)
+            return JSONResponse({}, status_code=499)
+
+        jitter = config.random.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(0.0, latency_ms + jitter) / 1000)
+        if request_number <= config.fail_first or config.random.random() < config.error_rate:
+            stats.errors += 1
+            headers = None
+            if config.error_status == 429 and config.retry_after_seconds is not None:
+                headers = {"Retry-After": f"{config.retry_after_seconds:g}"}
+            body = {"error": {"message": "Injected failure", "type": "server_error", "code": None}}
+            return JSONResponse(body, status_code=config.error_status, headers=headers)
+        return None
+
+    async def chat_completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        error = await _delay_or_fail(request, config.chat_latency_ms)
+        if error is not None:
+            return error
+        prompt = body["messages"][-1]["content"]
+        transcript = prompt.split("\n\n", 1)[-1]
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        completion_tokens = len(transcript) // 4
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": transcript},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    async def transcriptions(request: Request) -> JSONResponse:
+        form = await request.form()
+        audio = await form["file"].read()
+        error = await _delay_or_fail(request, config.transcription_latency_ms)
+        if error is not None:
+            return error
+        text = "This is a synthetic transcription of the uploaded audio."
+        if form.get("response_format") != "verbose_json":
+            return JSONResponse({"text": text})
+        # 16 kHz 16-bit mono, the format the synthetic audio generator writes
+        duration = len(audio) / 32000
+        return JSONResponse({
+            "task": "transcribe",
+            "language": form.get("language") or "english",
+            "duration": duration,
+            "text": text,
+            "segments": [{
+                "id": 0, "seek": 0, "start": 0.0, "end": duration, "text": text, "tokens": [],
+                "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.0, "no_speech_prob": 0.01,
+            }],
+        })
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/audio/transcriptions", transcriptions, methods=["POST"]),
+    ])
+
+
+class FakeOpenAIServer:
+    """Runs the fake API on a free local port in a background thread."""
+
+    def __init__(self, config: FakeOpenAIConfig, port: int = 0):
+        self.stats = FakeOpenAIStats()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", port))
+        self.port = self._socket.getsockname()[1]
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_fake_openai_app(config, self.stats), log_level="warning", lifespan="off",
+        ))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> None:
+        """Start serving and wait until the server accepts connections."""
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Fake OpenAI server failed to start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join()
+        self._socket.close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--chat-latency-ms", type=float, default=300)
+    parser.add_argument("--transcription-latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        transcription_latency_ms=args.transcription_latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    server = FakeOpenAIServer(config, port=args.port)
+    print(f"Serving a fake OpenAI API at {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+End-to-end load test.
+
+Starts the service with uvicorn against a local fake OpenAI API (see
+benchmarks.fake_openai) and a SQLite database, then drives /auth/login,
+/rewrite and /transcribe at each concurrency level and reports throughput and
+p50/p95/p99 latency. Results are compared with a stored baseline and the run
+fails if any p95 is slower, or any throughput lower, than the baseline allows.
+
+With --stt local, /transcribe runs faster-whisper on synthetic audio (see
+benchmarks.synthetic_audio) instead of calling the fake Whisper API; the model
+named by --whisper-model must be downloadable or cached.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,8,32] [--requests N]
+        [--chat-latency-ms N] [--error-rate F] [--stt openai|local]
+        [--baseline PATH] [--update-baseline] [--tolerance F]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from benchmarks.synthetic_audio import write_speech_like_wav
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load_test.json"
+EMAIL = "test@example.com"
+PASSWORD = "password"
+PROFILE = {
+    "id": "email",
+    "name": "Email",
+    "tone": "friendly and concise",
+    "constraints": ["Keep names as spoken", "No bullet points"],
+    "glossary": {"SayWrite": "The product name"},
+}
+TRANSCRIPT = (
+    "so um I wanted to follow up on the meeting from yesterday, basically we agreed to move the launch "
+    "to next Thursday and uh Sarah will send the updated timeline to everyone by end of day"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of pre-sorted values."""
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _create_database(database_url: str) -> None:
+    """Create the schema in a fresh interpreter configured for the benchmark database."""
+    script = (
+        "import asyncio\n"
+        "from app.core.database import BaseModel, engine\n"
+        "import app.models.db\n"
+        "async def main():\n"
+        "    async with engine.begin() as connection:\n"
+        "        await connection.run_sync(BaseModel.metadata.create_all)\n"
+        "    await engine.dispose()\n"
+        "asyncio.run(main())\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, env={**os.environ, "DATABASE_URL": database_url})
+
+
+def _start_app(env: Dict[str, str], port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The service exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/health").status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The service did not become healthy within 60s")
+
+
+async def _drive(send, requests: int, concurrency: int) -> Tuple[List[float], int, float]:
+    """
+    Send requests with at most ``concurrency`` in flight.
+
+    Returns:
+        Tuple of sorted latencies in milliseconds, failed request count and elapsed seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await send()
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return sorted(latencies), failures, time.perf_counter() - start
+
+
+async def _run_scenarios(base_url: str, audio: bytes, levels: List[int], requests: int) -> Dict[str, Dict[str, float]]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        scenarios = {
+            "login": lambda: client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD}),
+            "rewrite": lambda: client.post(
+                "/api/v1/rewrite", headers=headers, json={"transcript": TRANSCRIPT, "profile": PROFILE}
+            ),
+            "transcribe": lambda: client.post(
+                "/api/v1/transcribe", headers=headers, files={"audio": ("speech.wav", audio, "audio/wav")}
+            ),
+        }
+
+        results = {}
+        print(f"{'scenario':<16} {'req':>5} {'fail':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, send in scenarios.items():
+            for concurrency in levels:
+                latencies, failures, elapsed = await _drive(send, requests, concurrency)
+                result = {
+                    "throughput": round(requests / elapsed, 2),
+                    "failures": failures,
+                    "p50_ms": round(_percentile(latencies, 50), 1),
+                    "p95_ms": round(_percentile(latencies, 95), 1),
+                    "p99_ms": round(_percentile(latencies, 99), 1),
+                }
+                key = f"{name}@{concurrency}"
+                results[key] = result
+                print(
+                    f"{key:<16} {requests:>5} {failures:>5} {result['throughput']:>8.2f} "
+                    f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+                )
+        return results
+
+
+def _compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """List every scenario slower or lower in throughput than the baseline allows."""
+    regressions = []
+    for key, base in baseline.items():
+        result = results.get(key)
+        if result is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: {result['throughput']:.2f} req/s vs baseline {base['throughput']:.2f} req/s")
+        if result["failures"] > base["failures"]:
+            regressions.append(f"{key}: {result['failures']} failures vs baseline {base['failures']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario and level")
+    parser.add_argument("--chat-latency-ms", type=float, default=300)
+    parser.add_argument("--transcription-latency-ms", type=float, default=800)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--audio-seconds", type=float, default=5)
+    parser.add_argument("--stt", choices=("openai", "local"), default="openai")
+    parser.add_argument("--whisper-model", default="tiny", help="faster-whisper model for --stt local")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    # Everything that changes the numbers; a baseline only applies to runs with the same setup
+    run_config = {
+        "concurrency": levels,
+        "requests": args.requests,
+        "chat_latency_ms": args.chat_latency_ms,
+        "transcription_latency_ms": args.transcription_latency_ms,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "audio_seconds": args.audio_seconds,
+        "stt": args.stt,
+    }
+
+    workdir = Path(tempfile.mkdtemp(prefix="saywrite-load-"))
+    database_url = f"sqlite+aiosqlite:///{workdir / 'load.db'}"
+    audio = write_speech_like_wav(workdir / "speech.wav", args.audio_seconds).read_bytes()
+    _create_database(database_url)
+
+    fake_config = FakeOpenAIConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        transcription_latency_ms=args.transcription_latency_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=0,
+    )
+    with FakeOpenAIServer(fake_config) as fake:
+        port = _free_port()
+        app = _start_app({
+            "DATABASE_URL": database_url,
+            "OPENAI_API_KEY": "fake-key",
+            "OPENAI_BASE_URL": fake.base_url,
+            "WHISPER_PROVIDER": args.stt,
+            "WHISPER_MODEL": args.whisper_model if args.stt == "local" else "whisper-1",
+            "RATE_LIMIT_ENABLED": "false",
+            # Every request comes from one user; let them queue as many rewrites
+            # as the highest level sends at once instead of hitting the per-user cap
+            "OPENAI_MAX_QUEUED_PER_USER": str(max(levels)),
+            "LOG_LEVEL": "WARNING",
+            "DB_HEALTH_CHECK_INTERVAL_SECONDS": "0",
+        }, port)
+        try:
+            results = asyncio.run(_run_scenarios(f"http://127.0.0.1:{port}", audio, levels, args.requests))
+        finally:
+            app.terminate()
+            app.wait()
+        print(f"Fake API served {fake.stats.requests} requests, {fake.stats.errors} injected failures")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"config": run_config, "results": results}, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["config"] != run_config:
+        print("Baseline was recorded with different settings; not comparing")
+        return 0
+
+    regressions = _compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%} of the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"Within {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Local LLM rewrite throughput and latency with and without micro-batching.
+
+Builds a tiny random-weight CTranslate2 model (see benchmarks.tiny_llm), so it
+runs offline, and sends concurrent rewrites through the local provider once
+with batching disabled (batch size 1) and once with the configured batch size
+and window. Real instruction-tuned models spend far longer per token, but the
+ratio between the two modes carries over.
+
+Usage:
+    python -m benchmarks.local_llm_batching [--requests N] [--concurrency 1,4,16]
+        [--max-batch-size N] [--batch-wait-ms N] [--d-model N] [--max-new-tokens N]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.core.config import settings  # noqa: E402
+from app.core.logging import configure_logging  # noqa: E402
+from app.models.api.schemas import Profile, RewriteOptions  # noqa: E402
+from app.services.llm.ctranslate2_provider import CTranslate2Provider  # noqa: E402
+from benchmarks.tiny_llm import build_tiny_model  # noqa: E402
+
+PROFILE = Profile(id="email", name="Email", tone="friendly and concise", constraints=["Keep names as spoken"])
+TRANSCRIPT = "so um we agreed to move the launch to next thursday and uh send the timeline to everyone"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+async def _run(provider: CTranslate2Provider, requests: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    options = RewriteOptions(temperature=0.5, provider_hint="local")
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await provider.rewrite(TRANSCRIPT, PROFILE, options)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start), sorted(latencies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--max-batch-size", type=int, default=settings.LOCAL_LLM_MAX_BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=float, default=settings.LOCAL_LLM_BATCH_WAIT_MS)
+    parser.add_argument("--d-model", type=int, default=256)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    configure_logging()
+    model_dir = build_tiny_model(Path(tempfile.mkdtemp()) / "tiny", d_model=args.d_model, num_layers=4)
+
+    print(f"{'mode':<10} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode, batch_size in (("unbatched", 1), ("batched", args.max_batch_size)):
+        with patch.multiple(
+            settings,
+            LOCAL_LLM_MODEL_PATH=str(model_dir),
+            LOCAL_LLM_COMPUTE_TYPE="float32",
+            LOCAL_LLM_MAX_NEW_TOKENS=args.max_new_tokens,
+            LOCAL_LLM_MAX_BATCH_SIZE=batch_size,
+            LOCAL_LLM_BATCH_WAIT_MS=args.batch_wait_ms if batch_size > 1 else 0,
+        ):
+            provider = CTranslate2Provider()
+            # Load the model before timing
+            await provider.rewrite(TRANSCRIPT, PROFILE)
+            for concurrency in (int(level) for level in args.concurrency.split(",")):
+                throughput, latencies = await _run(provider, args.requests, concurrency)
+                print(
+                    f"{mode:<10} {concurrency:>5} {throughput:>8.1f} "
+                    f"{_percentile(latencies, 50):>9.1f} {_percentile(latencies, 95):>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Per-call cost of logging.
+
+Times a structlog call through the previous pipeline (stdlib logger, stdlib
+JSON renderer, synchronous write) against the queued pipeline (orjson renderer,
+background writer thread), plus an event dropped by the sampler and a call
+below the configured level. Output goes to a temporary file.
+
+Usage:
+    python -m benchmarks.logging_overhead [--iterations N]
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+import structlog
+
+from app.core.logging import EventSampler, LogWriter, QueueLoggerFactory, render_json
+
+
+def _processors(sampler, renderer):
+    return [
+        sampler,
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.processors.TimeStamper(fmt="iso"),
+        renderer,
+    ]
+
+
+def _time_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    sampler = EventSampler()
+    sampler.configure("sampled", one_in=1_000_000)
+
+    with tempfile.TemporaryFile("w") as out:
+        handler = logging.StreamHandler(out)
+        stdlib_logger = logging.getLogger("benchmark")
+        stdlib_logger.addHandler(handler)
+        stdlib_logger.setLevel(logging.INFO)
+        stdlib_logger.propagate = False
+        old = structlog.wrap_logger(
+            stdlib_logger,
+            processors=_processors(sampler, structlog.processors.JSONRenderer()),
+            wrapper_class=structlog.stdlib.BoundLogger,
+        ).bind()
+
+        writer = LogWriter(out, max_queue=0)
+        writer.start()
+        new = structlog.wrap_logger(
+            QueueLoggerFactory(writer)(),
+            processors=_processors(sampler, render_json),
+            wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        ).bind()
+
+        fields = dict(user_id="7f1c0e6a-3d52-4a8e-9b1e-2f4a6c8d0e12", endpoint="/api/v1/rewrite", llm_ms=412)
+        results = [
+            ("stdlib + JSONRenderer, synchronous", _time_us(lambda: old.info("Rewrite completed", **fields), args.iterations)),
+            ("queue + orjson", _time_us(lambda: new.info("Rewrite completed", **fields), args.iterations)),
+            ("sampled out", _time_us(lambda: new.info("sampled", **fields), args.iterations)),
+            ("below level (debug)", _time_us(lambda: new.debug("Rewrite completed", **fields), args.iterations)),
+        ]
+        flush_start = time.perf_counter()
+        writer.stop()
+        drain_ms = (time.perf_counter() - flush_start) * 1000
+
+    print(f"{args.iterations} calls each")
+    for name, us in results:
+        print(f"  {name:<36} {us:7.2f} us/call")
+    print(f"  writer drained its backlog in {drain_ms:.1f} ms on stop")
+
+
+if __name__ == "__main__":
+    main()
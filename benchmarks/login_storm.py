@@ -0,0 +1,116 @@
+"""
+Login throughput and event loop responsiveness during a login storm.
+
+Fires concurrent /auth/login requests while probing /health, once with bcrypt
+running inline on the event loop (the previous behavior) and once on the
+bounded password hash executor, and reports login throughput alongside the
+health check latency other endpoints see meanwhile. On a single core login
+throughput is CPU bound either way; the difference is in health latency.
+
+Usage:
+    python -m benchmarks.login_storm [--logins N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("DB_HEALTH_CHECK_INTERVAL_SECONDS", "0")
+
+import httpx  # noqa: E402
+
+from app.core.auth import password_hasher, pwd_context  # noqa: E402
+from app.core.database import BaseModel, async_session, engine  # noqa: E402
+from app.core.logging import configure_logging  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.api.schemas import UserCreate  # noqa: E402
+from app.repositories.user_repository import SQLAlchemyUserRepository  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def inline_verify_and_update_password(plain_password: str, hashed_password: str):
+    """The previous behavior: bcrypt runs on the event loop."""
+    return pwd_context.verify(plain_password, hashed_password), None
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]) -> None:
+    # Latency is measured from when the probe was due, so a blocked event loop
+    # shows up as delay instead of as missing samples
+    due = time.perf_counter()
+    while not stop.is_set():
+        await client.get("/api/v1/health")
+        now = time.perf_counter()
+        latencies.append(now - due)
+        due = now + 0.01
+        await asyncio.sleep(0.01)
+
+
+async def _storm(client: httpx.AsyncClient, logins: int, concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = 0
+
+    async def login() -> None:
+        nonlocal succeeded
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            if response.status_code == 200:
+                succeeded += 1
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return succeeded
+
+
+async def _run(mode: str, logins: int, concurrency: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        latencies: List[float] = []
+        prober = asyncio.create_task(_probe(client, stop, latencies))
+
+        start = time.perf_counter()
+        succeeded = await _storm(client, logins, concurrency)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await prober
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))]
+    print(
+        f"{mode:<9} {succeeded / elapsed:>9.1f} {len(latencies_ms):>8} "
+        f"{statistics.median(latencies_ms):>10.2f} {p99:>10.2f} {latencies_ms[-1]:>10.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=12)
+    args = parser.parse_args()
+
+    configure_logging()
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+    async with async_session() as session:
+        await SQLAlchemyUserRepository(session).create_user(UserCreate(email=EMAIL, password=PASSWORD))
+
+    print(f"{'mode':<9} {'logins/s':>9} {'probes':>8} {'health p50':>10} {'health p99':>10} {'health max':>10}")
+    try:
+        with patch("app.repositories.user_repository.verify_and_update_password", inline_verify_and_update_password):
+            await _run("inline", args.logins, args.concurrency)
+        await _run("executor", args.logins, args.concurrency)
+    finally:
+        await engine.dispose()
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Hot path cost of recording metrics.
+
+Times the metric primitives used per request (counter increment, histogram
+observation, labelled child lookup) and the per-request overhead the request
+metrics middleware adds around a trivial ASGI app.
+
+Usage:
+    python -m benchmarks.metrics_overhead [--iterations N]
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.metrics import MetricsRegistry
+from app.core.request_metrics import RequestMetricsMiddleware
+
+
+class _Route:
+    path = "/api/v1/rewrite"
+
+
+async def _app(scope, receive, send) -> None:
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message) -> None:
+    pass
+
+
+def _time_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def _time_app_us(app, iterations: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/rewrite", "headers": []}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), _receive, _send)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "Counter")
+    histogram = registry.histogram("bench_seconds", "Histogram")
+    family = registry.histogram("bench_labelled_seconds", "Labelled histogram", labelnames=("method", "route"))
+
+    def timed_block() -> None:
+        with histogram.time():
+            pass
+
+    print(f"{'operation':<28} {'us/op':>8}")
+    print(f"{'counter.inc':<28} {_time_us(counter.inc, args.iterations):>8.3f}")
+    print(f"{'histogram.observe':<28} {_time_us(lambda: histogram.observe(0.042), args.iterations):>8.3f}")
+    print(f"{'labels().observe':<28} {_time_us(lambda: family.labels('POST', '/api/v1/rewrite').observe(0.042), args.iterations):>8.3f}")
+    print(f"{'histogram.time() block':<28} {_time_us(timed_block, args.iterations):>8.3f}")
+
+    iterations = args.iterations // 10
+    bare_us = asyncio.run(_time_app_us(_app, iterations))
+    instrumented_us = asyncio.run(_time_app_us(RequestMetricsMiddleware(_app, metrics=registry), iterations))
+    print(f"{'request middleware':<28} {instrumented_us - bare_us:>8.3f}")
+    print(f"\n{len(registry.render())} bytes rendered for {len(registry.snapshot())} metrics")
+
+
+if __name__ == "__main__":
+    main()
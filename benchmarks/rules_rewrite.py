@@ -0,0 +1,81 @@
+"""
+Rule-based rewrite latency by transcript length and glossary size.
+
+Compares the compiled phrase matcher used by the rules provider with applying
+one case-insensitive regex substitution per filler and glossary term, the
+straightforward alternative whose cost grows with the number of terms.
+
+Usage:
+    python -m benchmarks.rules_rewrite [--words 50,200,1000] [--glossary 0,100,1000] [--iterations N]
+"""
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from app.services.llm.rules import RuleRewriter
+
+FILLERS = ["um", "uh", "erm", "you know"]
+SENTENCE = "so um we agreed to move the launch to next thursday and uh send the timeline to acme corp you know"
+
+
+def _transcript(words: int) -> str:
+    sentence = SENTENCE.split()
+    return " ".join(sentence[i % len(sentence)] for i in range(words))
+
+
+def _glossary(size: int) -> Dict[str, str]:
+    rng = random.Random(0)
+    glossary = {"Acme Corp": "customer"}
+    while len(glossary) < size:
+        glossary[f"Term{rng.randrange(10 ** 6)}"] = "definition"
+    return glossary
+
+
+def _regex_rewrite(glossary: Dict[str, str]) -> Callable[[str], str]:
+    """One substitution pass per phrase, recompiled per call as a glossary from a request would be."""
+    def rewrite(text: str) -> str:
+        for filler in FILLERS:
+            text = re.sub(rf"\b{re.escape(filler)}\b,?\s*", "", text, flags=re.IGNORECASE)
+        for term in glossary:
+            text = re.sub(rf"\b{re.escape(term)}\b", term, text, flags=re.IGNORECASE)
+        return text
+
+    return rewrite
+
+
+def _time_us(rewrite: Callable[[str], str], text: str, iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rewrite(text)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", default="50,200,1000")
+    parser.add_argument("--glossary", default="0,100,1000")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'words':>6} {'terms':>6} {'compile us':>11} {'rules p50 us':>13} {'rules p99 us':>13} {'regex p50 us':>13}")
+    for size in (int(value) for value in args.glossary.split(",")):
+        glossary = _glossary(size)
+        start = time.perf_counter()
+        rewriter = RuleRewriter(glossary, FILLERS)
+        compile_us = (time.perf_counter() - start) * 1e6
+        for words in (int(value) for value in args.words.split(",")):
+            text = _transcript(words)
+            rules = _time_us(rewriter.rewrite, text, args.iterations)
+            regex = _time_us(_regex_rewrite(glossary), text, max(1, args.iterations // 10))
+            print(
+                f"{words:>6} {size:>6} {compile_us:>11.0f} {rules[len(rules) // 2]:>13.0f} "
+                f"{rules[int(len(rules) * 0.99)]:>13.0f} {regex[len(regex) // 2]:>13.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
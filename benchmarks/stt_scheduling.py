@@ -0,0 +1,109 @@
+"""
+Interactive transcription latency under mixed load, with and without the STT scheduler.
+
+Simulates the local model with worker threads that sleep in proportion to the
+audio they transcribe, in 30 second segments, so it runs without a model and
+isolates scheduling. A few long bulk jobs start first and short voice notes
+keep arriving behind them. Each scenario runs twice:
+
+- shared: every transcription holds the model for its whole length, first
+  come first served, as one shared path without a scheduler does
+- scheduled: every segment is a step through ``SttScheduler``
+
+Usage:
+    python -m benchmarks.stt_scheduling [--bulk-jobs N] [--bulk-seconds S]
+        [--notes N] [--note-seconds S] [--note-interval-ms MS] [--speed X]
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
+
+from app.core.metrics import MetricsRegistry
+from app.services.stt.scheduler import SttScheduler
+
+SEGMENT_SECONDS = 30
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+async def _transcribe_segments(audio_seconds: float, speed: float, step) -> None:
+    """Run one simulated segment per step; ``step`` wraps each in whatever holds the model."""
+    for index in range(math.ceil(audio_seconds / SEGMENT_SECONDS)):
+        segment = min(SEGMENT_SECONDS, audio_seconds - index * SEGMENT_SECONDS)
+        async with step():
+            await asyncio.to_thread(time.sleep, segment / speed)
+
+
+async def _run(mode: str, args: argparse.Namespace) -> Tuple[Dict[str, List[float]], Dict[str, float]]:
+    metrics = MetricsRegistry()
+    scheduler = SttScheduler(slots=1, metrics=metrics)
+    model_lock = asyncio.Lock()
+    latencies: Dict[str, List[float]] = {"interactive": [], "bulk": []}
+
+    async def transcribe(audio_seconds: float, job_class: str) -> None:
+        start = time.perf_counter()
+        if mode == "shared":
+            async with model_lock:
+                await _transcribe_segments(audio_seconds, args.speed, nullcontext)
+        else:
+            job = scheduler.job(audio_seconds)
+
+            def step():
+                return scheduler.slot(job)
+
+            await _transcribe_segments(audio_seconds, args.speed, step)
+        latencies[job_class].append((time.perf_counter() - start) * 1000)
+
+    rng = random.Random(0)
+    tasks = [asyncio.create_task(transcribe(args.bulk_seconds, "bulk")) for _ in range(args.bulk_jobs)]
+    for _ in range(args.notes):
+        await asyncio.sleep(rng.expovariate(1000 / args.note_interval_ms))
+        tasks.append(asyncio.create_task(transcribe(args.note_seconds, "interactive")))
+    await asyncio.gather(*tasks)
+
+    # Mean wait for the model per step, from the scheduler's own metrics
+    queue_wait = {}
+    for (job_class,), histogram in metrics.histogram("stt_queue_wait_seconds", labelnames=("class",)).children():
+        queue_wait[job_class] = histogram.sum / histogram.count * 1000 if histogram.count else 0.0
+    return latencies, queue_wait
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bulk-jobs", type=int, default=2)
+    parser.add_argument("--bulk-seconds", type=float, default=1800)
+    parser.add_argument("--notes", type=int, default=40)
+    parser.add_argument("--note-seconds", type=float, default=5)
+    parser.add_argument("--note-interval-ms", type=float, default=100)
+    parser.add_argument("--speed", type=float, default=300, help="Audio seconds transcribed per second")
+    args = parser.parse_args()
+
+    print(
+        f"{args.bulk_jobs} x {args.bulk_seconds:g}s bulk, {args.notes} x {args.note_seconds:g}s notes "
+        f"every ~{args.note_interval_ms:g} ms, {args.speed:g}x real time"
+    )
+    print(
+        f"{'mode':>10} {'note p50 ms':>12} {'note p99 ms':>12} {'bulk max ms':>12} "
+        f"{'note wait ms':>13} {'bulk wait ms':>13}"
+    )
+    for mode in ("shared", "scheduled"):
+        latencies, queue_wait = await _run(mode, args)
+        notes = sorted(latencies["interactive"])
+        waits = (
+            f"{queue_wait.get('interactive', 0):>13.1f} {queue_wait.get('bulk', 0):>13.1f}"
+            if mode == "scheduled" else f"{'-':>13} {'-':>13}"
+        )
+        print(
+            f"{mode:>10} {_percentile(notes, 50):>12.0f} {_percentile(notes, 99):>12.0f} "
+            f"{max(latencies['bulk']):>12.0f} {waits}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
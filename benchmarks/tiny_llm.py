@@ -0,0 +1,108 @@
+"""
+Tiny random-weight CTranslate2 chat model for offline benchmarks and tests.
+
+Builds a two-layer Llama-style decoder with random weights and a word-level
+tokenizer that understands the ChatML markers the local rewrite provider
+uses. Its output is meaningless, but generation runs through the same
+CTranslate2 code paths and batching as a real instruction-tuned model, with
+no download.
+
+Usage:
+    python -m benchmarks.tiny_llm OUTPUT_DIR
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+from ctranslate2 import specs
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+
+SPECIAL_TOKENS = ["<unk>", "<s>", "</s>", "<|im_start|>", "<|im_end|>"]
+
+_WORDS = """
+a about after again all also am an and any are as at back be because been before being but by can could day
+did do does done down each even every few for from get go going good got had has have he her here him his how
+i if in into is it its just know last let like make me meeting more most move much my need new next no not
+now of off on one only or other our out over people please really right said same say see send she should so
+some still such take team than thank that the their them then there these they thing think this those through
+time to today tomorrow too two up update us very want was we week well were what when where which while who
+will with would yes yesterday you your rewrite transcript tone style following specified expert writer text
+constraints format audience glossary terms include keep response under words target email friendly concise
+formal basically um uh launch thursday timeline everyone end follow agreed names spoken bullet points product
+name system user assistant
+"""
+
+
+def _vocabulary() -> list:
+    words = sorted(set(_WORDS.split()))
+    punctuation = [".", ",", ":", "-", "!", "?", "'", "(", ")", "/"]
+    digits = [str(i) for i in range(10)]
+    capitalized = [word.capitalize() for word in words]
+    return SPECIAL_TOKENS + words + capitalized + punctuation + digits
+
+
+def build_tiny_model(output_dir: Path, d_model: int = 64, num_layers: int = 2, num_heads: int = 4, seed: int = 0) -> Path:
+    """
+    Write a tiny CTranslate2 decoder model and its tokenizer.json.
+
+    Args:
+        output_dir: Directory to write the model to
+        d_model: Hidden size
+        num_layers: Decoder layers
+        num_heads: Attention heads
+        seed: Seed for the random weights
+
+    Returns:
+        Path: The model directory
+    """
+    output_dir = Path(output_dir)
+    vocabulary = _vocabulary()
+    rng = np.random.default_rng(seed)
+    ffn = d_model * 2
+
+    def weight(*shape: int) -> np.ndarray:
+        return (rng.standard_normal(shape) * 0.1).astype(np.float32)
+
+    spec = specs.TransformerDecoderModelSpec.from_config(
+        num_layers, num_heads, rms_norm=True, ffn_glu=True, activation=specs.Activation.SWISH, rotary_dim=0,
+    )
+    decoder = spec.decoder
+    decoder.embeddings.weight = weight(len(vocabulary), d_model)
+    decoder.layer_norm.gamma = np.ones(d_model, dtype=np.float32)
+    decoder.projection.weight = weight(len(vocabulary), d_model)
+    for layer in decoder.layer:
+        layer.self_attention.layer_norm.gamma = np.ones(d_model, dtype=np.float32)
+        layer.self_attention.linear[0].weight = weight(3 * d_model, d_model)
+        layer.self_attention.linear[1].weight = weight(d_model, d_model)
+        layer.ffn.layer_norm.gamma = np.ones(d_model, dtype=np.float32)
+        layer.ffn.linear_0.weight = weight(ffn, d_model)
+        layer.ffn.linear_0_noact.weight = weight(ffn, d_model)
+        layer.ffn.linear_1.weight = weight(d_model, ffn)
+    spec.register_vocabulary(vocabulary)
+    spec.config.bos_token = "<s>"
+    spec.config.eos_token = "<|im_end|>"
+    spec.config.unk_token = "<unk>"
+    spec.validate()
+    spec.optimize(quantization="float32")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    spec.save(str(output_dir))
+
+    tokenizer = Tokenizer(models.WordLevel({token: i for i, token in enumerate(vocabulary)}, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.decoder = decoders.WordPiece(prefix="##")
+    tokenizer.add_special_tokens(SPECIAL_TOKENS)
+    tokenizer.save(str(output_dir / "tokenizer.json"))
+    return output_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args()
+
+    build_tiny_model(args.output)
+    print(f"Wrote a tiny model to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import os
+import tempfile
+
+# Run database-backed tests against a local SQLite stand-in with cheap hashing;
+# must be set before app modules create the engine and password context
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("DB_HEALTH_CHECK_INTERVAL_SECONDS", "0")
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.database import BaseModel, engine
+from app.core.profile_cache import profile_cache
+from app.core.token_cache import token_cache
+from app.core.user_cache import user_cache
+from app.main import app
+from app.models.api.schemas import User, UserCreate
+from app.repositories.user_repository import UserRepositoryInterface
+
+CREDENTIALS = {"email": "test@example.com", "password": "password123"}
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLLMProvider:
+    """LLM provider stub that needs no network access."""
+
+    async def rewrite(self, transcript, profile, options=None, user=None):
+        return transcript, 0
+
+
+class RoundTripCounter:
+    """Counts statements and commits issued against the engine."""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.remove(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split()[0].upper())
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+
+class MockUserRepository(UserRepositoryInterface):
+    """Mock repository for testing."""
+
+    def __init__(self):
+        self.users = {}
+        self.next_id = 1
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        if any(user.email == user_data.email for user in self.users.values()):
+            raise ValueError("User with this email already exists")
+
+        user_id = str(self.next_id)
+        self.next_id += 1
+
+        user = User(
+            id=user_id,
+            email=user_data.email,
+            is_active=True,
+            created_at="2023-01-01T00:00:00"
+        )
+        self.users[user_id] = user
+        return user
+
+    async def get_user_by_email(self, email: str) -> User | None:
+        for user in self.users.values():
+            if user.email == email:
+                return user
+        return None
+
+    async def get_user_by_id(self, user_id: str) -> User | None:
+        return self.users.get(user_id)
+
+    async def authenticate_user(self, email: str, password: str) -> User | None:
+        # Simple mock authentication
+        user = await self.get_user_by_email(email)
+        if user and password == "correct_password":
+            return user
+        return None
+
+    async def update_user(self, user_id: str, user_data: User) -> User | None:
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        return await self.update_user_fields(user_id, user_data.model_dump(exclude_unset=True))
+
+    async def update_user_fields(self, user_id: str, fields: dict) -> User | None:
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        updated = user.model_copy(update=fields)
+        self.users[user_id] = updated
+        return updated
+
+
+def _run_with_database(fn):
+    """Run the coroutine function ``fn()`` against a fresh database and return its result."""
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(BaseModel.metadata.drop_all)
+            await connection.run_sync(BaseModel.metadata.create_all)
+        try:
+            return await fn()
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def _run_app_scenario(scenario):
+    """Run a scenario against the app with a fresh database and empty caches."""
+    user_cache.clear()
+    token_cache.clear()
+    profile_cache.clear()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+
+    return _run_with_database(run)
+
+
+@pytest.fixture
+def credentials() -> Dict[str, str]:
+    """Email and password of the test user."""
+    return dict(CREDENTIALS)
+
+
+@pytest.fixture
+def run_app() -> Callable:
+    """Run ``scenario(client)`` against the app with a fresh database and empty caches; return its result."""
+    return _run_app_scenario
+
+
+@pytest.fixture
+def run_with_database() -> Callable:
+    """Run the coroutine function ``fn()`` against a fresh database; return its result."""
+    return _run_with_database
+
+
+@pytest.fixture
+def auth_headers(credentials) -> Callable[..., Awaitable[Dict[str, str]]]:
+    """Register and log in a user through ``client``, returning their Authorization header."""
+    async def login(client: httpx.AsyncClient, user: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        user = user or credentials
+        await client.post("/api/v1/auth/register", json=user)
+        response = await client.post("/api/v1/auth/login", json=user)
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
+
+
+@pytest.fixture
+def count_round_trips() -> Callable[[], RoundTripCounter]:
+    """Context manager factory counting database statements and commits."""
+    return RoundTripCounter
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    """Manually advanced clock, starting at 1000."""
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_llm_provider() -> FakeLLMProvider:
+    """LLM provider echoing the transcript."""
+    return FakeLLMProvider()
+
+
+@pytest.fixture
+def user_repository() -> MockUserRepository:
+    """In-memory user repository."""
+    return MockUserRepository()
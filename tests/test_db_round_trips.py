@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+
+class TestEndpointRoundTrips:
+    """Database round trips per endpoint."""
+
+    def test_register(self, run_app, credentials, count_round_trips):
+        """Test registration is a single INSERT and commit."""
+        async def scenario(client):
+            with count_round_trips() as counter:
+                response = await client.post("/api/v1/auth/register", json=credentials)
+            assert response.status_code == 200
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == ["INSERT"]
+        assert counter.commits == 1
+
+    def test_login(self, run_app, credentials, count_round_trips):
+        """Test login is one lookup plus one session INSERT and commit."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            with count_round_trips() as counter:
+                response = await client.post("/api/v1/auth/login", json=credentials)
+            assert response.status_code == 200
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == ["SELECT", "INSERT"]
+        assert counter.commits == 1
+
+    def test_token(self, run_app, credentials, count_round_trips):
+        """Test the OAuth2 token endpoint is a single lookup."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            with count_round_trips() as counter:
+                response = await client.post(
+                    "/api/v1/auth/token",
+                    data={"username": credentials["email"], "password": credentials["password"]},
+                )
+            assert response.status_code == 200
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == ["SELECT"]
+        assert counter.commits == 1
+
+    def test_refresh_token(self, run_app, credentials, count_round_trips):
+        """Test refresh is one indexed session lookup plus one rotating UPDATE and commit."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            login = await client.post("/api/v1/auth/login", json=credentials)
+            with count_round_trips() as counter:
+                response = await client.post(
+                    "/api/v1/auth/refresh_token", params={"refresh_token": login.json()["refresh_token"]}
+                )
+            assert response.status_code == 200
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == ["SELECT", "UPDATE"]
+        assert counter.commits == 1
+
+    def test_authenticated_request_with_cached_user(self, run_app, auth_headers, count_round_trips, fake_llm_provider):
+        """Test authenticated requests need no database round trips once the user is cached."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            body = {
+                "transcript": "hello",
+                "profile": {"id": "p", "name": "Plain", "tone": "neutral", "constraints": []},
+            }
+            with patch("app.api.v1.routes.get_llm_provider", return_value=fake_llm_provider):
+                await client.post("/api/v1/rewrite", json=body, headers=headers)
+                with count_round_trips() as counter:
+                    response = await client.post("/api/v1/rewrite", json=body, headers=headers)
+            assert response.status_code == 200
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == []
+        assert counter.commits == 0
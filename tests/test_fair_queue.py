@@ -0,0 +1,133 @@
+import asyncio
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.api.schemas import Profile, User
+from app.services.llm.fair_queue import FairQueue
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+
+PROFILE = Profile(id="p", name="Plain", tone="neutral", constraints=[])
+
+
+async def _served_order(queue, submissions, service_seconds=0.002):
+    """Submit every (flow, weight, count) at once and return flows in the order they got a slot."""
+    order = []
+
+    async def one(flow, weight):
+        async with queue.slot(flow, weight):
+            order.append(flow)
+            await asyncio.sleep(service_seconds)
+
+    await asyncio.gather(*(
+        one(flow, weight) for flow, weight, count in submissions for _ in range(count)
+    ))
+    return order
+
+
+class TestFairQueue:
+    """Test cases for weighted fair queuing."""
+
+    def test_heavy_user_gets_equal_share(self):
+        """Test a user queueing far more requests gets no more than an equal share while others wait."""
+        queue = FairQueue(concurrency=2, max_queue_per_flow=100)
+
+        order = asyncio.run(_served_order(queue, [("heavy", 1, 60), ("a", 1, 10), ("b", 1, 10)]))
+
+        # While all three are backlogged, every user gets a third of the slots
+        shares = Counter(order[:30])
+        assert all(8 <= shares[user] <= 12 for user in ("heavy", "a", "b"))
+        # The light users are done long before the heavy one
+        assert max(i for i, user in enumerate(order) if user != "heavy") < 35
+
+    def test_shares_follow_weights(self):
+        """Test backlogged users are served in proportion to their weights."""
+        queue = FairQueue(concurrency=1, max_queue_per_flow=100)
+
+        order = asyncio.run(_served_order(queue, [("pro", 4, 50), ("free", 1, 50)]))
+
+        shares = Counter(order[:50])
+        assert 38 <= shares["pro"] <= 42
+
+    def test_bounded_per_user_queue(self):
+        """Test a user with a full queue is rejected without affecting others."""
+        queue = FairQueue(concurrency=1, max_queue_per_flow=2)
+
+        async def run():
+            async def hold():
+                async with queue.slot("heavy"):
+                    await asyncio.sleep(0.05)
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiting = [asyncio.create_task(_served_order(queue, [("heavy", 1, 1)])) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            with pytest.raises(HTTPException) as exc_info:
+                async with queue.slot("heavy"):
+                    pass
+            other = await _served_order(queue, [("light", 1, 1)])
+            await asyncio.gather(holder, *waiting)
+            return exc_info.value, other
+
+        error, other = asyncio.run(run())
+
+        assert error.status_code == 429
+        assert other == ["light"]
+
+    def test_cancelled_request_frees_its_place(self):
+        """Test a request cancelled while waiting does not take a slot."""
+        queue = FairQueue(concurrency=1, max_queue_per_flow=10)
+        served = []
+
+        async def run():
+            async def one(flow):
+                async with queue.slot(flow):
+                    served.append(flow)
+
+            async with queue.slot("holder"):
+                cancelled = asyncio.create_task(one("cancelled"))
+                waiting = asyncio.create_task(one("waiting"))
+                await asyncio.sleep(0)
+                cancelled.cancel()
+                await asyncio.sleep(0)
+            await waiting
+
+        asyncio.run(run())
+
+        assert served == ["waiting"]
+
+
+class TestOpenAIProviderFairness:
+    """Test cases for fair queuing of OpenAI calls."""
+
+    def test_light_user_not_starved_by_heavy_user(self):
+        """Test a light user's rewrites overtake a heavy user's backlog against a live API."""
+        from app.services.llm.openai_provider import OpenAIProvider
+
+        heavy = User(id="heavy", email="heavy@example.com", created_at="")
+        light = User(id="light", email="light@example.com", created_at="")
+        finished = []
+
+        async def rewrite(provider, user):
+            await provider.rewrite("hello there", PROFILE, user=user)
+            finished.append(user.id)
+
+        async def run(provider):
+            heavy_calls = [asyncio.create_task(rewrite(provider, heavy)) for _ in range(8)]
+            await asyncio.sleep(0.01)
+            await asyncio.gather(*heavy_calls, *(rewrite(provider, light) for _ in range(2)))
+
+        with FakeOpenAIServer(FakeOpenAIConfig(chat_latency_ms=30, jitter_ms=0)) as server, \
+                patch.object(settings, "OPENAI_API_KEY", "test"), \
+                patch.object(settings, "OPENAI_BASE_URL", server.base_url), \
+                patch.object(settings, "OPENAI_MAX_CONCURRENCY", 2), \
+                patch.object(settings, "OPENAI_MAX_QUEUED_PER_USER", 10):
+            asyncio.run(run(OpenAIProvider()))
+
+        # Both light rewrites finish in the first rounds instead of behind all eight heavy ones
+        assert set(finished[:6]) == {"heavy", "light"}
+        assert finished.count("light") == 2
+        assert max(i for i, user in enumerate(finished) if user == "light") < 6
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import tempfile
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyRecord,
+    InProcessIdempotencyStore,
+    StoredResponse,
+)
+from app.models.api.schemas import TranscribeSegmentEvent
+from benchmarks.synthetic_audio import write_speech_like_wav
+
+REWRITE_BODY = {
+    "transcript": "hello world",
+    "profile": {"id": "p", "name": "Plain", "tone": "neutral", "constraints": []},
+}
+
+
+class CountingLLMProvider:
+    """LLM provider stub counting its calls, optionally taking a while to answer."""
+
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+
+    async def rewrite(self, transcript, profile, options=None, user=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return transcript.upper(), 0
+
+
+class CountingSTTProvider:
+    """STT provider stub counting its calls, whose streams fail after the first segment."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def transcribe(self, audio_file, language=None, audio_seconds=None, max_audio_seconds=None):
+        self.calls += 1
+        return "hello", 0
+
+    async def transcribe_stream(self, audio_file, language=None, audio_seconds=None, max_audio_seconds=None):
+        self.calls += 1
+        yield TranscribeSegmentEvent(text="hello", start=0.0, end=1.0, avg_logprob=-0.1)
+        raise RuntimeError("decoder crashed")
+
+
+def speech_wav(seconds: float, seed: int = 0) -> bytes:
+    """Build a speech-like WAV file of the given length."""
+    with tempfile.TemporaryDirectory() as directory:
+        return write_speech_like_wav(Path(directory) / "audio.wav", seconds, seed=seed).read_bytes()
+
+
+class TestIdempotencyStores:
+    """Test cases for the idempotency key stores."""
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, run_with_database):
+        """Set up test fixtures."""
+        self.run_with_database = run_with_database
+
+    def test_claim_complete_and_expire(self, fake_clock):
+        """Test a key is claimed once, holds its response for the TTL, then expires."""
+        response = StoredResponse(200, [(b"content-type", b"application/json")], b"{}")
+        clock = fake_clock
+        for store in (InProcessIdempotencyStore(max_keys=10, clock=clock), DatabaseIdempotencyStore(clock=clock)):
+            async def run():
+                assert await store.reserve("u:k", "f", lock_ttl=5) is None
+                assert (await store.reserve("u:k", "f", lock_ttl=5)).response is None
+                await store.complete("u:k", IdempotencyRecord("f", response), ttl=60)
+                assert (await store.reserve("u:k", "f", lock_ttl=5)).response == response
+                clock.now += 61
+                return await store.reserve("u:k", "f", lock_ttl=5)
+
+            assert self.run_with_database(run) is None
+
+    def test_released_and_lapsed_claims_free_the_key(self, fake_clock):
+        """Test a released claim, or one whose holder never finished, can be claimed again."""
+        clock = fake_clock
+        for store in (InProcessIdempotencyStore(max_keys=10, clock=clock), DatabaseIdempotencyStore(clock=clock)):
+            async def run():
+                await store.reserve("u:a", "f", lock_ttl=5)
+                await store.release("u:a")
+                await store.reserve("u:b", "f", lock_ttl=5)
+                clock.now += 6
+                return [await store.reserve("u:a", "f", lock_ttl=5), await store.reserve("u:b", "f", lock_ttl=5)]
+
+            assert self.run_with_database(run) == [None, None]
+
+    def test_wait_returns_when_completed(self):
+        """Test waiters are released once the key is completed."""
+        for store in (InProcessIdempotencyStore(max_keys=10), DatabaseIdempotencyStore(poll_interval=0.01)):
+            async def run():
+                await store.reserve("u:k", "f", lock_ttl=5)
+
+                async def finish():
+                    await asyncio.sleep(0.05)
+                    await store.complete("u:k", IdempotencyRecord("f", StoredResponse(200, [], b"")), ttl=60)
+
+                task = asyncio.create_task(finish())
+                await store.wait("u:k", timeout=5)
+                assert task.done()
+
+            self.run_with_database(run)
+
+    def test_database_store_shared_between_instances(self):
+        """Test a key claimed through one database store instance, as in another worker, is seen by the others."""
+        first, second = DatabaseIdempotencyStore(), DatabaseIdempotencyStore()
+        response = StoredResponse(200, [], b"{}")
+
+        async def run():
+            assert await first.reserve("u:k", "f", lock_ttl=5) is None
+            assert (await second.reserve("u:k", "f", lock_ttl=5)).response is None
+            await first.complete("u:k", IdempotencyRecord("f", response), ttl=60)
+            return await second.reserve("u:k", "f", lock_ttl=5)
+
+        assert self.run_with_database(run).response == response
+
+
+class TestIdempotencyMiddleware:
+    """Test cases for idempotency keys through the API."""
+
+    @pytest.fixture(autouse=True)
+    def setup_app(self, run_app, auth_headers):
+        """Set up test fixtures."""
+        self.run_app = run_app
+        self.auth_headers = auth_headers
+
+    def _rewrites(self, provider, requests):
+        """Send batches of rewrite requests; each batch is a list of (key, body) sent concurrently."""
+        async def scenario(client):
+            auth = await self.auth_headers(client)
+
+            async def post(key, body):
+                headers = {**auth, "Idempotency-Key": key}
+                return await client.post("/api/v1/rewrite", json=body, headers=headers)
+
+            with patch("app.api.v1.routes.get_llm_provider", return_value=provider):
+                responses = []
+                for batch in requests:
+                    responses.extend(await asyncio.gather(*(post(key, body) for key, body in batch)))
+                return responses
+
+        return self.run_app(scenario)
+
+    def test_retry_replays_stored_response(self):
+        """Test a retry gets the first response back without calling the LLM again."""
+        provider = CountingLLMProvider()
+        key = str(uuid.uuid4())
+
+        first, retry = self._rewrites(provider, [[(key, REWRITE_BODY)], [(key, REWRITE_BODY)]])
+
+        assert provider.calls == 1
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotency-Replayed"] == "true"
+        assert "Idempotency-Replayed" not in first.headers
+
+    def test_concurrent_duplicate_waits_for_first(self):
+        """Test a duplicate arriving while the first request runs gets its response."""
+        provider = CountingLLMProvider(delay=0.2)
+        key = str(uuid.uuid4())
+
+        responses = self._rewrites(provider, [[(key, REWRITE_BODY), (key, REWRITE_BODY)]])
+
+        assert provider.calls == 1
+        assert [r.status_code for r in responses] == [200, 200]
+        assert responses[0].json() == responses[1].json()
+
+    def test_key_reused_for_different_request(self):
+        """Test reusing a key with a different body is rejected."""
+        provider = CountingLLMProvider()
+        key = str(uuid.uuid4())
+        other_body = dict(REWRITE_BODY, transcript="something else")
+
+        first, reused = self._rewrites(provider, [[(key, REWRITE_BODY)], [(key, other_body)]])
+
+        assert first.status_code == 200
+        assert reused.status_code == 422
+        assert provider.calls == 1
+
+    def test_different_keys_run_separately(self):
+        """Test requests with different keys are not deduplicated."""
+        provider = CountingLLMProvider()
+
+        self._rewrites(provider, [[(str(uuid.uuid4()), REWRITE_BODY)], [(str(uuid.uuid4()), REWRITE_BODY)]])
+
+        assert provider.calls == 2
+
+    def _transcribes(self, provider, requests):
+        """Send transcription requests one after another; each is (key, audio bytes, form fields)."""
+        async def scenario(client):
+            auth = await self.auth_headers(client)
+            with patch("app.api.v1.routes.get_stt_provider", return_value=provider):
+                return [
+                    await client.post(
+                        "/api/v1/transcribe",
+                        files={"audio": ("a.wav", audio, "audio/wav")},
+                        data=data,
+                        headers={**auth, "Idempotency-Key": key},
+                    )
+                    for key, audio, data in requests
+                ]
+
+        return self.run_app(scenario)
+
+    def test_transcribe_retry_with_rebuilt_form(self):
+        """Test a retried upload matches despite a new multipart boundary, unless the audio differs."""
+        provider = CountingSTTProvider()
+        key = str(uuid.uuid4())
+        audio = speech_wav(1)
+
+        first, retry, other_audio = self._transcribes(provider, [
+            (key, audio, {"language": "en"}),
+            (key, audio, {"language": "en"}),
+            (key, speech_wav(1, seed=1), {"language": "en"}),
+        ])
+
+        assert first.request.headers["Content-Type"] != retry.request.headers["Content-Type"]
+        assert retry.status_code == 200
+        assert retry.headers["Idempotency-Replayed"] == "true"
+        assert retry.json() == first.json()
+        assert other_audio.status_code == 422
+        assert provider.calls == 1
+
+    def test_streamed_response_not_stored(self):
+        """Test a streamed transcription that failed partway is run again on retry, not replayed."""
+        provider = CountingSTTProvider()
+        key = str(uuid.uuid4())
+        audio = speech_wav(1)
+
+        responses = self._transcribes(provider, [(key, audio, {"stream": "true"})] * 2)
+
+        for response in responses:
+            events = [json.loads(line) for line in response.text.splitlines()]
+            assert response.status_code == 200
+            assert events[-1]["event"] == "error"
+            assert "Idempotency-Replayed" not in response.headers
+        assert provider.calls == 2
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, deadline_scope
+from app.core.metrics import MetricsRegistry
+from app.models.api.schemas import Profile, RewriteOptions
+from app.services.llm.batching import MicroBatcher
+from app.services.llm.ctranslate2_provider import CTranslate2Provider
+from app.services.llm.factory import get_llm_provider
+from benchmarks.tiny_llm import build_tiny_model
+
+PROFILE = Profile(id="p", name="Plain", tone="neutral", constraints=[])
+
+
+class TestMicroBatcher:
+    """Test cases for MicroBatcher."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.batches = []
+
+    def _process(self, items):
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+    def test_concurrent_submits_share_a_batch(self):
+        """Test requests arriving within the window are generated together, results in order."""
+        batcher = MicroBatcher(self._process, max_batch_size=8, max_wait_seconds=0.05)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+        assert self.batches == [[0, 1, 2, 3, 4]]
+
+    def test_full_batch_dispatches_without_waiting(self):
+        """Test a batch is dispatched as soon as it is full and the rest form the next one."""
+        metrics = MetricsRegistry()
+        batcher = MicroBatcher(self._process, max_batch_size=2, max_wait_seconds=10, metrics=metrics)
+
+        async def scenario():
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), timeout=5)
+
+        assert asyncio.run(scenario()) == [0, 10, 20, 30]
+        assert self.batches == [[0, 1], [2, 3]]
+        assert metrics.snapshot()["batch_size"] == 2
+
+    def test_errors_reach_every_caller(self):
+        """Test a failed batch fails every request in it."""
+        def fail(items):
+            raise RuntimeError("model crashed")
+
+        batcher = MicroBatcher(fail, max_batch_size=4, max_wait_seconds=0.01)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    def test_rejects_beyond_max_pending(self):
+        """Test submits beyond max_pending waiting items get a 429 and the others are still served."""
+        batcher = MicroBatcher(self._process, max_batch_size=8, max_wait_seconds=0.05, max_pending=2)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        assert results[:2] == [0, 10]
+        assert isinstance(results[2], HTTPException) and results[2].status_code == 429
+
+
+class TestLocalProvider:
+    """Test cases for the local CTranslate2 provider."""
+
+    def test_provider_hint_routes_to_local(self):
+        """Test provider_hint "local" selects the local provider and anything else OpenAI."""
+        assert isinstance(get_llm_provider("local"), CTranslate2Provider)
+        assert not isinstance(get_llm_provider(None), CTranslate2Provider)
+
+    def test_missing_model_path(self):
+        """Test rewriting without a configured model fails with a ValueError."""
+        with patch.object(settings, "LOCAL_LLM_MODEL_PATH", None):
+            provider = CTranslate2Provider()
+
+        with pytest.raises(ValueError):
+            asyncio.run(provider.rewrite("hello", PROFILE))
+
+    def test_rewrite_stops_at_deadline(self):
+        """Test a local rewrite still waiting for its batch gives up at the request deadline."""
+        def slow(prompts):
+            time.sleep(0.3)
+            return prompts
+
+        provider = CTranslate2Provider()
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait_seconds=0)
+
+        async def scenario():
+            # The first rewrite holds the batcher while the second waits for it
+            first = asyncio.create_task(provider.rewrite("first", PROFILE))
+            await asyncio.sleep(0.05)
+            with deadline_scope(0.1):
+                await provider.rewrite("second", PROFILE)
+
+        with patch.object(provider, "_batcher", return_value=batcher):
+            with pytest.raises(DeadlineExceeded):
+                asyncio.run(scenario())
+
+    def test_concurrent_rewrites_batch(self, tmp_path):
+        """Test concurrent rewrites against a tiny model are generated in one batch."""
+        model_dir = build_tiny_model(tmp_path / "tiny")
+        with patch.multiple(
+            settings,
+            LOCAL_LLM_MODEL_PATH=str(model_dir),
+            LOCAL_LLM_COMPUTE_TYPE="float32",
+            LOCAL_LLM_MAX_NEW_TOKENS=8,
+            LOCAL_LLM_MAX_BATCH_SIZE=4,
+            LOCAL_LLM_BATCH_WAIT_MS=50,
+        ):
+            provider = CTranslate2Provider()
+            options = RewriteOptions(temperature=0)
+            batches = []
+            generate = provider._generate
+
+            def record(prompts, temperature):
+                batches.append(len(prompts))
+                return generate(prompts, temperature)
+
+            async def scenario():
+                return await asyncio.gather(
+                    *(provider.rewrite("we agreed to move the launch", PROFILE, options) for _ in range(4))
+                )
+
+            with patch.object(provider, "_generate", side_effect=record):
+                results = asyncio.run(scenario())
+
+        assert batches == [4]
+        texts = [text for text, _ in results]
+        # Greedy decoding of the same prompt is deterministic
+        assert len(set(texts)) == 1 and texts[0]
@@ -0,0 +1,149 @@
+import io
+
+import orjson
+import structlog
+
+from app.core.logging import REDACTED, EventSampler, LogWriter, redact_event, render_json
+from app.core.metrics import MetricsRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestEventSampler:
+    """Test cases for EventSampler."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.metrics = MetricsRegistry()
+        self.sampler = EventSampler(clock=self.clock, metrics=self.metrics)
+
+    def _kept(self, event: str, count: int) -> list:
+        kept = []
+        for _ in range(count):
+            try:
+                kept.append(self.sampler(None, "info", {"event": event}))
+            except structlog.DropEvent:
+                pass
+        return kept
+
+    def test_unconfigured_events_pass(self):
+        """Test events without a rule are never dropped."""
+        assert len(self._kept("Request handled", 5)) == 5
+
+    def test_one_in(self):
+        """Test one in every N occurrences is kept, carrying the suppressed count."""
+        self.sampler.configure("chatty", one_in=3)
+
+        kept = self._kept("chatty", 9)
+
+        assert len(kept) == 3
+        assert kept[1]["suppressed"] == 2
+        assert self.metrics.snapshot()["log_events_sampled_out_total"] == 6
+
+    def test_rate_limit(self):
+        """Test at most max_per_second occurrences are kept as time passes."""
+        self.sampler.configure("chatty", max_per_second=1 / 60)
+
+        assert len(self._kept("chatty", 10)) == 1
+        self.clock.now = 30
+        assert self._kept("chatty", 10) == []
+        self.clock.now = 60
+        kept = self._kept("chatty", 10)
+
+        assert len(kept) == 1
+        assert kept[0]["suppressed"] == 19
+
+
+class TestLogWriter:
+    """Test cases for LogWriter."""
+
+    def test_writes_synchronously_until_started(self):
+        """Test lines are written directly while the writer thread is not running."""
+        stream = io.StringIO()
+        writer = LogWriter(stream, max_queue=10)
+
+        writer.put("one")
+
+        assert stream.getvalue() == "one\n"
+
+    def test_stop_drains_queue(self):
+        """Test stopping the writer writes every queued line in order."""
+        stream = io.StringIO()
+        writer = LogWriter(stream, max_queue=0)
+        writer.start()
+
+        for i in range(5000):
+            writer.put(str(i))
+        writer.stop()
+
+        assert stream.getvalue().splitlines() == [str(i) for i in range(5000)]
+
+    def test_drops_when_full(self):
+        """Test lines beyond the queue bound are dropped and counted instead of blocking."""
+        metrics = MetricsRegistry()
+        writer = LogWriter(io.StringIO(), max_queue=2, metrics=metrics)
+        # Mark the writer as running without a thread draining the queue
+        writer._thread = object()
+
+        for i in range(5):
+            writer.put(str(i))
+
+        assert metrics.snapshot()["log_lines_dropped_total"] == 3
+
+
+def test_render_json():
+    """Test events render as a single JSON line, stringifying unknown types."""
+    line = render_json(None, "info", {"event": "Rewrite completed", "ms": 12, "path": object, 1: "x"})
+
+    assert "\n" not in line
+    decoded = orjson.loads(line)
+    assert decoded["event"] == "Rewrite completed"
+    assert decoded["ms"] == 12
+    assert decoded["1"] == "x"
+    assert decoded["path"] == str(object)
+
+
+class TestRedaction:
+    """Test cases for the redaction processor."""
+
+    def test_sensitive_keys_at_any_depth(self):
+        """Test values under sensitive keys are redacted in nested dicts and lists, keeping numbers."""
+        event = {
+            "event": "Rewrite failed",
+            "request": {"profile": {"api_key": "abc"}, "messages": [{"content": "hello"}]},
+            "transcript": ["one", "two"],
+            "estimated_tokens": 12,
+        }
+
+        redacted = redact_event(None, "info", event)
+
+        assert redacted["request"]["profile"]["api_key"] == REDACTED
+        assert redacted["request"]["messages"] == [{"content": REDACTED}]
+        assert redacted["transcript"] == [REDACTED, REDACTED]
+        assert redacted["estimated_tokens"] == 12
+        assert event["request"]["profile"]["api_key"] == "abc"
+
+    def test_pii_in_string_values(self):
+        """Test emails, bearer strings and tokens are redacted inside free text."""
+        redacted = redact_event(None, "info", {
+            "event": "Login failed for jane.doe@example.com",
+            "detail": ["Authorization: Bearer abc.def-ghi=", "key sk-abcdefghijklmnop1234 rejected"],
+            "cookie": "session=eyJhbGciOi.eyJzdWIiOiIxIn0.c2ln; path=/",
+        })
+
+        assert redacted["event"] == f"Login failed for {REDACTED}"
+        assert redacted["detail"] == [f"Authorization: {REDACTED}", f"key {REDACTED} rejected"]
+        assert redacted["cookie"] == f"session={REDACTED}; path=/"
+
+    def test_clean_values_untouched(self):
+        """Test strings without PII pass through unchanged."""
+        event = {"event": "Rewrite completed", "user_id": "7f1c0e6a", "model": "gpt-4o-mini", "skip": "task-list"}
+
+        assert redact_event(None, "info", event) == event
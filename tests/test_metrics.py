@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test cases for MetricsRegistry."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets(self):
+        """Test observations land in the first bucket whose bound they do not exceed."""
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.cumulative_counts() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+
+    def test_labelled_family(self):
+        """Test each label combination gets its own child metric."""
+        requests = self.registry.counter("requests_total", "Requests", labelnames=("route",))
+
+        requests.labels("/a").inc()
+        requests.labels("/a").inc()
+        requests.labels("/b").inc()
+
+        assert requests.labels("/a").value == 2
+        assert self.registry.snapshot()["requests_total"] == 3
+        with pytest.raises(ValueError):
+            self.registry.counter("requests_total", "Requests")
+
+    def test_render_prometheus_text(self):
+        """Test metrics render in the Prometheus text exposition format."""
+        self.registry.gauge("in_flight", "In flight").set(2)
+        self.registry.histogram("latency_seconds", "Latency", labelnames=("route",), buckets=(0.1,)).labels('/a"b').observe(0.05)
+
+        assert self.registry.render().splitlines() == [
+            "# HELP in_flight In flight",
+            "# TYPE in_flight gauge",
+            "in_flight 2",
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+            'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 1',
+            'latency_seconds_sum{route="/a\\"b"} 0.05',
+            'latency_seconds_count{route="/a\\"b"} 1',
+        ]
+
+
+class TestMetricsEndpoint:
+    """Test cases for the /metrics endpoint."""
+
+    def test_requests_are_labelled_by_route_template(self, run_app, auth_headers):
+        """Test request metrics use the matched route and stage histograms are exposed."""
+        async def scenario(client):
+            await client.get("/api/v1/usage", headers=await auth_headers(client))
+            await client.get("/no/such/path")
+            return (await client.get("/metrics")).text
+
+        text = run_app(scenario)
+        assert 'http_requests_total{method="POST",route="/api/v1/auth/login",status="200"}' in text
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/usage"}' in text
+        assert "auth_duration_seconds_count" in text
+        assert "db_query_duration_seconds_count" in text
+        assert 'queue_wait_seconds_count{queue="password_hash"}' in text
+        assert "http_requests_in_flight 1" in text
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.core import auth
+from app.core.auth import PasswordHashExecutor, verify_and_update_password
+
+
+class TestPasswordHashExecutor:
+    """Test cases for PasswordHashExecutor."""
+
+    def test_runs_off_the_event_loop(self):
+        """Test hashing functions run on the executor's worker threads."""
+        executor = PasswordHashExecutor(max_workers=1, max_queue=0)
+
+        thread_name = asyncio.run(executor.run(lambda: threading.current_thread().name))
+
+        assert thread_name.startswith("password-hash")
+        executor.shutdown()
+
+    def test_rejects_when_queue_full(self):
+        """Test work beyond the worker and queue limits is rejected with a 503."""
+        executor = PasswordHashExecutor(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = asyncio.create_task(executor.run(release.wait))
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await executor.run(lambda: None)
+            finally:
+                release.set()
+                await blocked
+            return exc_info.value
+
+        error = asyncio.run(scenario())
+
+        assert error.status_code == 503
+        executor.shutdown()
+
+
+class TestVerifyAndUpdatePassword:
+    """Test cases for verify_and_update_password."""
+
+    def test_rehash_when_cost_changes(self):
+        """Test a hash with an outdated cost is replaced on successful verification."""
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password123")
+        new_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+
+        with patch.object(auth, "pwd_context", new_context), patch.object(auth.settings, "PASSWORD_REHASH_ON_LOGIN", True):
+            verified, new_hash = asyncio.run(verify_and_update_password("password123", old_hash))
+
+        assert verified is True
+        assert new_hash is not None and new_hash.startswith("$2b$05$")
+
+    def test_no_rehash_when_disabled(self):
+        """Test no replacement hash is produced when rehashing is disabled."""
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password123")
+        new_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+
+        with patch.object(auth, "pwd_context", new_context), patch.object(auth.settings, "PASSWORD_REHASH_ON_LOGIN", False):
+            verified, new_hash = asyncio.run(verify_and_update_password("password123", old_hash))
+
+        assert verified is True
+        assert new_hash is None
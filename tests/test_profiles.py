@@ -0,0 +1,155 @@
+from unittest.mock import patch
+
+from app.core.database import async_session
+from app.models.api.schemas import Profile
+from app.repositories.profile_repository import SQLAlchemyProfileRepository
+from app.services.llm.prompts import build_system_prompt
+from app.services.profiles.profile_service import profile_etag
+
+PROFILE = {
+    "id": "support",
+    "name": "Support",
+    "tone": "friendly",
+    "constraints": ["Be brief"],
+    "glossary": {"SLA": "service level agreement"},
+}
+
+
+class PromptRecordingLLMProvider:
+    """LLM provider stub recording the system prompt of each call."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def rewrite(self, transcript, profile, options=None, user=None):
+        self.prompts.append(build_system_prompt(profile))
+        return transcript, 0
+
+
+class TestProfileRegistry:
+    """Test cases for stored rewrite profiles."""
+
+    def test_put_versions_changes_only(self, run_app, auth_headers):
+        """Test storing a profile creates version 1 and only changed content bumps it."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            url = "/api/v1/profiles/support"
+            created = await client.put(url, json=PROFILE, headers=headers)
+            unchanged = await client.put(url, json=PROFILE, headers=headers)
+            changed = await client.put(url, json=dict(PROFILE, tone="formal"), headers=headers)
+            return created, unchanged, changed
+
+        created, unchanged, changed = run_app(scenario)
+
+        assert created.status_code == 201
+        assert created.json()["version"] == 1
+        assert created.headers["ETag"] == created.json()["etag"]
+        assert unchanged.status_code == 200
+        assert unchanged.headers["ETag"] == created.headers["ETag"]
+        assert changed.json()["version"] == 2
+        assert changed.headers["ETag"] != created.headers["ETag"]
+
+    def test_conditional_requests(self, run_app, auth_headers):
+        """Test If-None-Match answers 304 for a current copy and If-Match rejects stale writes."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            url = "/api/v1/profiles/support"
+            etag = (await client.put(url, json=PROFILE, headers=headers)).headers["ETag"]
+            current = await client.get(url, headers={**headers, "If-None-Match": etag})
+            await client.put(url, json=dict(PROFILE, tone="formal"), headers=headers)
+            stale_get = await client.get(url, headers={**headers, "If-None-Match": etag})
+            stale_put = await client.put(url, json=PROFILE, headers={**headers, "If-Match": etag})
+            stale_delete = await client.delete(url, headers={**headers, "If-Match": etag})
+            return current, stale_get, stale_put, stale_delete
+
+        current, stale_get, stale_put, stale_delete = run_app(scenario)
+
+        assert current.status_code == 304
+        assert current.content == b""
+        assert stale_get.status_code == 200
+        assert stale_get.json()["tone"] == "formal"
+        assert stale_put.status_code == 412
+        assert stale_delete.status_code == 412
+
+    def test_rewrite_with_stored_profile(self, run_app, auth_headers, count_round_trips):
+        """Test a rewrite by profile ID uses the stored prompt and, once cached, no database round trips."""
+        provider = PromptRecordingLLMProvider()
+
+        async def scenario(client):
+            headers = await auth_headers(client)
+            await client.put("/api/v1/profiles/support", json=PROFILE, headers=headers)
+            body = {"transcript": "hello", "profile_id": "support", "profile_version": 1}
+            with patch("app.api.v1.routes.get_llm_provider", return_value=provider):
+                inline = await client.post(
+                    "/api/v1/rewrite", json={"transcript": "hello", "profile": PROFILE}, headers=headers
+                )
+                with count_round_trips() as counter:
+                    stored = await client.post("/api/v1/rewrite", json=body, headers=headers)
+            return inline, stored, counter
+
+        inline, stored, counter = run_app(scenario)
+
+        assert inline.status_code == stored.status_code == 200
+        assert provider.prompts[0] == provider.prompts[1]
+        assert counter.statements == []
+
+    def test_rewrite_profile_reference_errors(self, run_app, auth_headers):
+        """Test unknown and outdated profile references and ambiguous requests are rejected."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            await client.put("/api/v1/profiles/support", json=PROFILE, headers=headers)
+
+            async def rewrite(**body):
+                return (await client.post("/api/v1/rewrite", json={"transcript": "hello", **body}, headers=headers)).status_code
+
+            with patch("app.api.v1.routes.get_llm_provider", return_value=PromptRecordingLLMProvider()):
+                return [
+                    await rewrite(profile_id="missing"),
+                    await rewrite(profile_id="support", profile_version=2),
+                    await rewrite(profile_id="support", profile=PROFILE),
+                    await rewrite(),
+                ]
+
+        assert run_app(scenario) == [404, 409, 422, 422]
+
+    def test_pinned_version_rereads_stale_cache(self, run_app, auth_headers, credentials):
+        """Test a rewrite pinned to a version written through another worker is served, not rejected."""
+        provider = PromptRecordingLLMProvider()
+
+        async def scenario(client):
+            user_id = (await client.post("/api/v1/auth/register", json=credentials)).json()["id"]
+            headers = await auth_headers(client)
+            await client.put("/api/v1/profiles/support", json=PROFILE, headers=headers)
+
+            # Another worker replaces the profile; this worker's cache still holds version 1
+            formal = Profile(**dict(PROFILE, tone="formal"))
+            async with async_session() as db:
+                await SQLAlchemyProfileRepository(db).save_profile(
+                    user_id, formal, etag=profile_etag(formal), system_prompt=build_system_prompt(formal), expected_version=1
+                )
+
+            with patch("app.api.v1.routes.get_llm_provider", return_value=provider):
+                body = {"transcript": "hello", "profile_id": "support"}
+                pinned = await client.post("/api/v1/rewrite", json={**body, "profile_version": 2}, headers=headers)
+                outdated = await client.post("/api/v1/rewrite", json={**body, "profile_version": 1}, headers=headers)
+            return pinned.status_code, outdated.status_code
+
+        assert run_app(scenario) == (200, 409)
+        assert "formal" in provider.prompts[0]
+
+    def test_profiles_are_per_user(self, run_app, auth_headers):
+        """Test a user cannot read or reference another user's profile."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            await client.put("/api/v1/profiles/support", json=PROFILE, headers=headers)
+            other_headers = await auth_headers(client, {"email": "other@example.com", "password": "password123"})
+            with patch("app.api.v1.routes.get_llm_provider", return_value=PromptRecordingLLMProvider()):
+                rewrite = await client.post(
+                    "/api/v1/rewrite", json={"transcript": "hello", "profile_id": "support"}, headers=other_headers
+                )
+            read = await client.get("/api/v1/profiles/support", headers=other_headers)
+            deleted = await client.delete("/api/v1/profiles/support", headers=headers)
+            gone = await client.get("/api/v1/profiles/support", headers=headers)
+            return rewrite.status_code, read.status_code, deleted.status_code, gone.status_code
+
+        assert run_app(scenario) == (404, 404, 204, 404)
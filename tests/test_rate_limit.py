@@ -0,0 +1,129 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.deadline import DeadlineExceeded
+from app.core.rate_limit import (
+    DatabaseRateLimitBackend,
+    InProcessRateLimitBackend,
+    RateLimit,
+    rate_limiter,
+)
+
+LIMIT = RateLimit(capacity=2, refill_per_second=1)
+
+
+class TestRateLimitBackends:
+    """Test cases for the token bucket backends."""
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, run_with_database):
+        """Set up test fixtures."""
+        self.run_with_database = run_with_database
+
+    def _consume_all(self, backend, costs):
+        async def run():
+            return [await backend.consume("user:a", cost, LIMIT) for cost in costs]
+
+        return self.run_with_database(run)
+
+    def test_burst_then_refill(self, fake_clock):
+        """Test a bucket admits its capacity, rejects, then refills over time."""
+        clock = fake_clock
+        for backend in (InProcessRateLimitBackend(max_keys=10, clock=clock), DatabaseRateLimitBackend(clock=clock)):
+            async def run():
+                decisions = [await backend.consume("user:a", 1, LIMIT) for _ in range(3)]
+                clock.now += 1
+                return decisions, await backend.consume("user:a", 1, LIMIT)
+
+            decisions, refilled = self.run_with_database(run)
+            assert [d.allowed for d in decisions] == [True, True, False]
+            assert decisions[2].retry_after == 1
+            assert refilled.allowed
+
+    def test_large_cost_goes_into_debt(self, fake_clock):
+        """Test a cost above capacity is admitted on a full bucket and must be repaid."""
+        backend = InProcessRateLimitBackend(max_keys=10, clock=fake_clock)
+
+        large, follow_up = self._consume_all(backend, [5, 1])
+
+        assert large.allowed and large.remaining == 0
+        assert not follow_up.allowed
+        assert follow_up.retry_after == 4
+
+    def test_evicts_least_recently_used(self):
+        """Test the in-process backend keeps at most max_keys buckets."""
+        backend = InProcessRateLimitBackend(max_keys=2)
+
+        async def run():
+            for key in ("a", "b", "c"):
+                await backend.consume(key, 1, LIMIT)
+
+        asyncio.run(run())
+        assert list(backend._buckets) == ["b", "c"]
+
+
+class TestRateLimitMiddleware:
+    """Test cases for rate limiting through the API."""
+
+    @pytest.fixture(autouse=True)
+    def setup_app(self, run_app, auth_headers, fake_llm_provider):
+        """Set up test fixtures."""
+        self.run_app = run_app
+        self.auth_headers = auth_headers
+        self.llm_provider = fake_llm_provider
+
+    def _rewrite_responses(self, requests):
+        async def scenario(client):
+            headers = await self.auth_headers(client)
+            body = {
+                "transcript": "hello " * 50,
+                "profile": {"id": "p", "name": "Plain", "tone": "neutral", "constraints": []},
+            }
+            with patch("app.api.v1.routes.get_llm_provider", return_value=self.llm_provider):
+                return [await client.post("/api/v1/rewrite", json=body, headers=headers) for _ in range(requests)]
+
+        return self.run_app(scenario)
+
+    def test_user_request_limit(self):
+        """Test requests beyond the user's burst get a 429 with rate limit headers."""
+        with patch.object(rate_limiter, "backend", InProcessRateLimitBackend(max_keys=10)), \
+                patch.object(rate_limiter, "user_limit", RateLimit(capacity=2, refill_per_second=0.01)):
+            responses = self._rewrite_responses(3)
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert responses[1].headers["RateLimit-Remaining"] == "0"
+        assert int(responses[2].headers["Retry-After"]) > 0
+
+    def test_endpoint_cost_limit(self):
+        """Test rewrites are charged by estimated tokens against the endpoint budget."""
+        endpoint_limits = {"rewrite": RateLimit(capacity=400, refill_per_second=0.01)}
+        with patch.object(rate_limiter, "backend", InProcessRateLimitBackend(max_keys=10)), \
+                patch.object(rate_limiter, "endpoint_limits", endpoint_limits):
+            responses = self._rewrite_responses(3)
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert responses[0].headers["RateLimit-Limit"] == "400"
+        assert int(responses[1].headers["RateLimit-Remaining"]) < 400
+        assert responses[2].json()["detail"] == "Rate limit exceeded"
+
+    def test_failed_rewrite_is_refunded(self):
+        """Test rewrites failing with a server error or deadline give their charge back."""
+        endpoint_limits = {"rewrite": RateLimit(capacity=400, refill_per_second=0.01)}
+        failures = [RuntimeError("provider down"), DeadlineExceeded(), DeadlineExceeded()]
+        with patch.object(rate_limiter, "backend", InProcessRateLimitBackend(max_keys=10)), \
+                patch.object(rate_limiter, "endpoint_limits", endpoint_limits), \
+                patch.object(self.llm_provider, "rewrite", AsyncMock(side_effect=failures + [("ok", 0)])):
+            responses = self._rewrite_responses(4)
+
+        assert [r.status_code for r in responses] == [500, 504, 504, 200]
+
+    def test_buckets_keyed_on_user_id(self):
+        """Test buckets are keyed on the user ID rather than the email address."""
+        backend = InProcessRateLimitBackend(max_keys=10)
+        with patch.object(rate_limiter, "backend", backend):
+            self._rewrite_responses(1)
+
+        assert backend._buckets
+        assert not any("@" in key for key in backend._buckets)
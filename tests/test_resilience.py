@@ -0,0 +1,183 @@
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+from openai import BadRequestError, RateLimitError
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, DeadlineMiddleware, deadline_scope, remaining, within_deadline
+from app.models.api.schemas import Profile
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+
+PROFILE = Profile(id="p", name="Plain", tone="neutral", constraints=[])
+
+REWRITE_BODY = {
+    "transcript": "hello world",
+    "profile": {"id": "p", "name": "Plain", "tone": "neutral", "constraints": []},
+}
+
+
+def _rewrite_against(config, deadline_seconds=None):
+    """Rewrite once against a fake API; return (outcome, elapsed seconds, server stats)."""
+    from app.services.llm.openai_provider import OpenAIProvider
+
+    async def run(provider):
+        started = time.monotonic()
+        with deadline_scope(deadline_seconds):
+            try:
+                outcome = await provider.rewrite("hello there", PROFILE)
+            except Exception as e:
+                outcome = e
+        return outcome, time.monotonic() - started
+
+    with FakeOpenAIServer(config) as server, ExitStack() as stack:
+        stack.enter_context(patch.object(settings, "OPENAI_API_KEY", "test"))
+        stack.enter_context(patch.object(settings, "OPENAI_BASE_URL", server.base_url))
+        stack.enter_context(patch.object(settings, "PROVIDER_BACKOFF_BASE_SECONDS", 0.01))
+        outcome, elapsed = asyncio.run(run(OpenAIProvider()))
+        return outcome, elapsed, server.stats
+
+
+class TestProviderRetries:
+    """Test cases for retries and deadlines of provider calls against a faulty API."""
+
+    def test_rate_limit_retried_after_retry_after(self):
+        """Test a 429 is retried once the upstream's Retry-After has passed."""
+        config = FakeOpenAIConfig(chat_latency_ms=0, jitter_ms=0, fail_first=1, error_status=429, retry_after_seconds=0.2)
+
+        outcome, elapsed, stats = _rewrite_against(config)
+
+        assert outcome[0] == "hello there"
+        assert stats.requests == 2
+        assert elapsed >= 0.2
+
+    def test_gives_up_after_max_attempts(self):
+        """Test persistent server errors are retried up to the attempt limit, then raised."""
+        config = FakeOpenAIConfig(chat_latency_ms=0, jitter_ms=0, fail_first=10, error_status=503)
+
+        outcome, _, stats = _rewrite_against(config)
+
+        assert getattr(outcome, "status_code", None) == 503
+        assert stats.requests == settings.PROVIDER_MAX_ATTEMPTS
+
+    def test_client_error_not_retried(self):
+        """Test a 400 fails at once."""
+        config = FakeOpenAIConfig(chat_latency_ms=0, jitter_ms=0, fail_first=1, error_status=400)
+
+        outcome, _, stats = _rewrite_against(config)
+
+        assert isinstance(outcome, BadRequestError)
+        assert stats.requests == 1
+
+    def test_hung_upstream_stopped_at_deadline(self):
+        """Test a call that never answers is abandoned at the deadline, which the upstream is told."""
+        config = FakeOpenAIConfig(chat_latency_ms=0, jitter_ms=0, hang_first=1)
+
+        outcome, elapsed, stats = _rewrite_against(config, deadline_seconds=0.3)
+
+        assert isinstance(outcome, DeadlineExceeded)
+        assert 0.3 <= elapsed < 2
+        assert stats.hangs == 1
+        assert 0 < stats.request_timeouts[0] <= 0.3
+
+    def test_no_retry_that_cannot_finish_in_time(self):
+        """Test a retry the deadline would cut short is not waited for."""
+        config = FakeOpenAIConfig(chat_latency_ms=0, jitter_ms=0, fail_first=1, error_status=429, retry_after_seconds=30)
+
+        outcome, elapsed, stats = _rewrite_against(config, deadline_seconds=5)
+
+        assert isinstance(outcome, RateLimitError)
+        assert stats.requests == 1
+        assert elapsed < 5
+
+    def test_transcription_retried(self, tmp_path):
+        """Test a failed Whisper upload is retried with the file sent again."""
+        from app.services.stt.whisper_provider import WhisperSTT
+
+        audio = tmp_path / "audio.wav"
+        audio.write_bytes(b"\0" * 32000)
+        config = FakeOpenAIConfig(transcription_latency_ms=0, jitter_ms=0, fail_first=1, error_status=502)
+
+        with FakeOpenAIServer(config) as server, \
+                patch.object(settings, "OPENAI_API_KEY", "test"), \
+                patch.object(settings, "OPENAI_BASE_URL", server.base_url), \
+                patch.object(settings, "PROVIDER_BACKOFF_BASE_SECONDS", 0.01):
+            text, _ = asyncio.run(WhisperSTT().transcribe(audio))
+
+        assert text.startswith("This is a synthetic transcription")
+        assert server.stats.requests == 2
+
+
+class SlowLLMProvider:
+    """LLM provider stub answering only after a delay, within the request deadline."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def rewrite(self, transcript, profile, options=None, user=None):
+        async with within_deadline():
+            await asyncio.sleep(self.delay)
+        return transcript, 0
+
+
+class TestDeadlineMiddleware:
+    """Test cases for request deadlines through the API."""
+
+    @pytest.fixture(autouse=True)
+    def setup_app(self, run_app, auth_headers):
+        """Set up test fixtures."""
+        self.run_app = run_app
+        self.auth_headers = auth_headers
+
+    def _rewrite(self, provider, timeout_header):
+        async def scenario(client):
+            headers = {**await self.auth_headers(client), "X-Request-Timeout": timeout_header}
+            with patch("app.api.v1.routes.get_llm_provider", return_value=provider):
+                return await client.post("/api/v1/rewrite", json=REWRITE_BODY, headers=headers)
+
+        return self.run_app(scenario)
+
+    def test_client_timeout_shortens_request(self):
+        """Test a request over the client's X-Request-Timeout ends in a 504."""
+        response = self._rewrite(SlowLLMProvider(delay=5), "0.2")
+
+        assert response.status_code == 504
+
+    def test_request_within_timeout_succeeds(self):
+        """Test a request finishing inside its budget is unaffected."""
+        response = self._rewrite(SlowLLMProvider(delay=0), "5")
+
+        assert response.status_code == 200
+
+    def test_invalid_timeout_rejected(self):
+        """Test an X-Request-Timeout that is not a positive number is a 400."""
+        for value in ("soon", "0", "-1", "nan"):
+            response = self._rewrite(SlowLLMProvider(delay=0), value)
+
+            assert response.status_code == 400
+
+    def test_budget_starts_after_body_received(self):
+        """Test time spent receiving a slow upload does not count against the deadline."""
+        chunks = [
+            {"type": "http.request", "body": b"a", "more_body": True},
+            {"type": "http.request", "body": b"b", "more_body": False},
+        ]
+        left = []
+
+        async def receive():
+            await asyncio.sleep(0.3)
+            return chunks.pop(0)
+
+        async def app(scope, receive, send):
+            await receive()
+            left.append(remaining())
+            await receive()
+            left.append(remaining())
+
+        middleware = DeadlineMiddleware(app, {"/upload": 0.2})
+        asyncio.run(middleware({"type": "http", "path": "/upload", "headers": []}, receive, None))
+
+        assert left[0] is None
+        assert 0.1 < left[1] <= 0.2
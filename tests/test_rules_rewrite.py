@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import patch
+
+from app.core.metrics import MetricsRegistry
+from app.models.api.schemas import Profile
+from app.services.llm.factory import get_llm_provider
+from app.services.llm.rules import PhraseMatcher, RuleRewriter
+from app.services.llm.rules_provider import RulesProvider
+
+PROFILE = Profile(
+    id="notes",
+    name="Notes",
+    tone="neutral",
+    constraints=[],
+    glossary={"SLA": "service level agreement", "New York": "city", "iPhone": "phone"},
+    rewrite_mode="rules",
+)
+
+
+class TestPhraseMatcher:
+    """Test cases for the Aho-Corasick phrase matcher."""
+
+    def test_leftmost_longest_matches(self):
+        """Test overlapping phrases resolve to the leftmost, then longest, match."""
+        matcher = PhraseMatcher({("a", "b", "c"): 1, ("b", "c"): 2, ("c",): 3, ("b", "d"): 4})
+
+        assert matcher.find(["a", "b", "c", "b", "c", "x", "b", "d"]) == [(0, 3, 1), (3, 5, 2), (6, 8, 4)]
+        assert matcher.find(["a", "b", "x"]) == []
+
+
+class TestRuleRewriter:
+    """Test cases for rule-based rewriting."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.rewriter = RuleRewriter(PROFILE.glossary, ["um", "uh", "you know"])
+
+    def test_removes_fillers_with_their_commas(self):
+        """Test fillers are removed along with the commas setting them off."""
+        assert self.rewriter.rewrite("um, so i was, uh, going home, you know") == "So I was going home."
+
+    def test_normalizes_glossary_terms(self):
+        """Test glossary terms are matched case-insensitively and written as the glossary spells them."""
+        assert self.rewriter.rewrite("the new york sla covers the IPHONE") == "The New York SLA covers the iPhone."
+
+    def test_sentence_casing_and_punctuation(self):
+        """Test sentences are capitalized without breaking abbreviations, numbers or existing punctuation."""
+        assert (
+            self.rewriter.rewrite("it's 3.5 percent. e.g. this one! i'm sure?")
+            == "It's 3.5 percent. E.g. this one! I'm sure?"
+        )
+
+
+class TestRulesProvider:
+    """Test cases for the rule-based rewrite provider."""
+
+    def test_selected_by_profile_or_request(self):
+        """Test rules are used for rules profiles unless the request names a provider, or when requested."""
+        assert isinstance(get_llm_provider(None, "rules"), RulesProvider)
+        assert isinstance(get_llm_provider("rules", "llm"), RulesProvider)
+        assert not isinstance(get_llm_provider("openai", "rules"), RulesProvider)
+        assert not isinstance(get_llm_provider(None, "llm"), RulesProvider)
+
+    def test_falls_back_to_llm_over_max_words(self, fake_llm_provider):
+        """Test a rewrite the rules cannot fit in max_words goes to the LLM."""
+        metrics = MetricsRegistry()
+        provider = RulesProvider(["um"], metrics=metrics)
+        profile = PROFILE.model_copy(update={"max_words": 3})
+
+        with patch("app.services.llm.factory.get_llm_provider", return_value=fake_llm_provider):
+            short = asyncio.run(provider.rewrite("um hello there", profile))
+            long = asyncio.run(provider.rewrite("um this is far too long", profile))
+
+        assert short[0] == "Hello there."
+        assert long[0] == "um this is far too long"
+        assert metrics.snapshot()["rules_rewrite_fallbacks_total"] == 1
+
+    def test_rewrite_endpoint_without_llm(self, run_app, auth_headers):
+        """Test a rules profile is rewritten through the API without calling an LLM."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            body = {"transcript": "um, the sla is fine", "profile": PROFILE.model_dump()}
+            return await client.post("/api/v1/rewrite", json=body, headers=headers)
+
+        response = run_app(scenario)
+
+        assert response.status_code == 200
+        assert response.json()["draft"] == "The SLA is fine."
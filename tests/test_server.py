@@ -0,0 +1,97 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.core.database import BaseModel
+from app.server import check_shared_backends, memory_usage
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError("server did not become healthy")
+
+
+class TestPreforkServer:
+    """Test cases for the pre-fork server."""
+
+    def test_memory_usage(self):
+        """Test memory usage is read for a live process."""
+        usage = memory_usage(os.getpid())
+
+        assert usage["rss_mb"] > 0
+        assert usage["pss_mb"] <= usage["rss_mb"]
+
+    def test_several_workers_need_shared_backends(self):
+        """Test several workers are refused unless idempotency keys and revocations go through the database."""
+        for idempotency, invalidation in (("memory", "database"), ("database", "memory")):
+            with patch.object(settings, "IDEMPOTENCY_BACKEND", idempotency), \
+                    patch.object(settings, "INVALIDATION_BACKEND", invalidation):
+                check_shared_backends(1)
+                with pytest.raises(SystemExit):
+                    check_shared_backends(2)
+        with patch.object(settings, "IDEMPOTENCY_BACKEND", "database"), \
+                patch.object(settings, "INVALIDATION_BACKEND", "database"):
+            check_shared_backends(2)
+
+    def test_workers_serve_restart_and_stop(self, tmp_path):
+        """Test forked workers serve requests, restart without downtime on SIGHUP and stop on SIGTERM."""
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}/api/v1/health"
+        database = create_engine(f"sqlite:///{tmp_path / 'server.db'}")
+        BaseModel.metadata.create_all(database)
+        database.dispose()
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'server.db'}",
+            "HOST": "127.0.0.1",
+            "PORT": str(port),
+            "WORKERS": "2",
+            "IDEMPOTENCY_BACKEND": "database",
+            "INVALIDATION_BACKEND": "database",
+            "DB_HEALTH_CHECK_INTERVAL_SECONDS": "0",
+            "LOG_LEVEL": "WARNING",
+        }
+        server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env)
+        try:
+            _wait_healthy(url)
+            worker_pids = set(map(int, subprocess.check_output(["pgrep", "-P", str(server.pid)]).split()))
+            assert len(worker_pids) == 2
+
+            server.send_signal(signal.SIGHUP)
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline:
+                assert httpx.get(url).status_code == 200
+                current = set(map(int, subprocess.check_output(["pgrep", "-P", str(server.pid)]).split()))
+                if len(current) == 2 and not current & worker_pids:
+                    break
+                time.sleep(0.1)
+            else:
+                raise AssertionError("workers were not replaced")
+
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=60) == 0
+        finally:
+            if server.poll() is None:
+                server.kill()
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.database import async_session
+from app.repositories.session_repository import SQLAlchemySessionRepository
+from app.repositories.user_repository import SQLAlchemyUserRepository
+
+
+async def _login(client, credentials, device):
+    response = await client.post("/api/v1/auth/login", json={**credentials, "device": device})
+    assert response.status_code == 200
+    return response.json()["refresh_token"]
+
+
+async def _refresh(client, refresh_token):
+    return await client.post("/api/v1/auth/refresh_token", params={"refresh_token": refresh_token})
+
+
+class TestRefreshSessions:
+    """Test cases for refresh token sessions."""
+
+    def test_second_device_keeps_first_signed_in(self, run_app, credentials):
+        """Test logging in on a second device does not invalidate the first."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            phone = await _login(client, credentials, "phone")
+            laptop = await _login(client, credentials, "laptop")
+            return (await _refresh(client, phone)).status_code, (await _refresh(client, laptop)).status_code
+
+        assert run_app(scenario) == (200, 200)
+
+    def test_rotation_invalidates_presented_token(self, run_app, credentials):
+        """Test a refresh token can only be used once and its replacement works."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            refresh_token = await _login(client, credentials, "phone")
+            rotated = await _refresh(client, refresh_token)
+            reused = await _refresh(client, refresh_token)
+            next_refresh = await _refresh(client, rotated.json()["refresh_token"])
+            return rotated.status_code, reused.status_code, next_refresh.status_code
+
+        assert run_app(scenario) == (200, 401, 200)
+
+    def test_expired_sessions_deleted_in_batches(self, run_app, credentials):
+        """Test cleanup deletes every expired session across several batches and keeps live ones."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            live_token = await _login(client, credentials, "phone")
+            user_id = (await client.post("/api/v1/auth/register", json={"email": "other@example.com", "password": "password123"})).json()["id"]
+
+            async with async_session() as db:
+                repository = SQLAlchemySessionRepository(db)
+                expired_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+                for i in range(5):
+                    await repository.create_session(user_id, f"expired-{i}", expired_at)
+                deleted = await repository.delete_expired_sessions(batch_size=2)
+
+            return deleted, (await _refresh(client, live_token)).status_code
+
+        assert run_app(scenario) == (5, 200)
+
+
+class TestTokenRevocation:
+    """Test cases for revoking access tokens already handed out."""
+
+    def test_deactivated_user_token_rejected(self, run_app, credentials):
+        """Test a deactivated user's access token is rejected on the next request."""
+        async def scenario(client):
+            user_id = (await client.post("/api/v1/auth/register", json=credentials)).json()["id"]
+            login = await client.post("/api/v1/auth/login", json=credentials)
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            before = await client.get("/api/v1/usage", headers=headers)
+
+            async with async_session() as db:
+                await SQLAlchemyUserRepository(db).update_user_fields(user_id, {"is_active": False})
+
+            return before.status_code, (await client.get("/api/v1/usage", headers=headers)).status_code
+
+        assert run_app(scenario) == (200, 401)
+
+    def test_logout_rejects_earlier_access_tokens(self, run_app, credentials):
+        """Test logging out rejects the session's refresh token and earlier access tokens, but not later ones."""
+        async def scenario(client):
+            await client.post("/api/v1/auth/register", json=credentials)
+            phone = (await client.post("/api/v1/auth/login", json={**credentials, "device": "phone"})).json()
+            laptop_refresh = await _login(client, credentials, "laptop")
+            headers = {"Authorization": f"Bearer {phone['access_token']}"}
+            before = await client.get("/api/v1/usage", headers=headers)
+
+            logout = await client.post("/api/v1/auth/logout", params={"refresh_token": phone["refresh_token"]})
+
+            after = await client.get("/api/v1/usage", headers=headers)
+            phone_refresh = await _refresh(client, phone["refresh_token"])
+            refreshed = (await _refresh(client, laptop_refresh)).json()["access_token"]
+            laptop = await client.get("/api/v1/usage", headers={"Authorization": f"Bearer {refreshed}"})
+            return before.status_code, logout.status_code, after.status_code, phone_refresh.status_code, laptop.status_code
+
+        assert run_app(scenario) == (200, 204, 401, 401, 200)
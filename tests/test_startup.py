@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+# Importing app.main is timed against importing the frameworks it is built on,
+# measured in the same run, so the budget holds on slower and busier machines.
+# It takes about 1.5x the frameworks' time with providers imported lazily,
+# and over 2.5x with them imported eagerly.
+IMPORT_TIME_BUDGET_RATIO = float(os.getenv("IMPORT_TIME_BUDGET_RATIO", "2.2"))
+
+# What any version of the application has to import
+FRAMEWORK_MODULES = ("fastapi", "sqlalchemy.ext.asyncio")
+
+# Heavy provider dependencies that must not load until a provider is used
+LAZY_MODULES = ("faster_whisper", "ctranslate2", "onnxruntime", "openai", "av")
+
+_IMPORT_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+for module in {imports!r}:
+    importlib.import_module(module)
+print(time.perf_counter() - start, *(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+def _import(modules: tuple, env: dict) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT.format(imports=modules, modules=LAZY_MODULES)],
+        capture_output=True, text=True, check=True, env={**os.environ, **env},
+    )
+    seconds, *loaded = result.stdout.strip().splitlines()[-1].split()
+    return float(seconds), loaded
+
+
+def _import_app(env: dict) -> tuple:
+    return _import(("app.main",), env)
+
+
+class TestColdStart:
+    """Test importing the application stays cheap."""
+
+    def test_providers_not_imported(self):
+        """Test no provider dependency is imported with the application, for either STT provider."""
+        for provider in ("openai", "local"):
+            _, loaded = _import_app({"WHISPER_PROVIDER": provider})
+            assert loaded == [], provider
+
+    def test_import_time_budget(self):
+        """Test importing app.main stays within its budget relative to the frameworks, taking the best of two runs."""
+        app_seconds, framework_seconds = [], []
+        for _ in range(2):
+            app_seconds.append(_import_app({})[0])
+            framework_seconds.append(_import(FRAMEWORK_MODULES, {})[0])
+
+        assert min(app_seconds) < IMPORT_TIME_BUDGET_RATIO * min(framework_seconds)
+
+    def test_factory_loads_configured_provider(self):
+        """Test the STT factory imports only the configured provider."""
+        script = (
+            "import sys\n"
+            "from app.services.stt.factory import get_stt_provider\n"
+            "get_stt_provider()\n"
+            "print('faster_whisper' in sys.modules, 'openai' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True, text=True, check=True, env={**os.environ, "WHISPER_PROVIDER": "openai"},
+        )
+
+        assert result.stdout.strip().splitlines()[-1] == "False True"
@@ -0,0 +1,87 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.models.api.schemas import TranscribeFinalEvent, TranscribeSegmentEvent
+from benchmarks.synthetic_audio import write_speech_like_wav
+
+
+class StreamingSTTProvider:
+    """STT provider stub streaming fixed segments, optionally failing before the final event."""
+
+    def __init__(self, segments, fail: bool = False):
+        self.segments = segments
+        self.fail = fail
+        self.audio_files = []
+
+    async def transcribe_stream(self, audio_file, language=None, audio_seconds=None, max_audio_seconds=None):
+        self.audio_files.append(audio_file)
+        for i, text in enumerate(self.segments):
+            assert audio_file.exists()
+            yield TranscribeSegmentEvent(text=text, start=float(i), end=float(i + 1), avg_logprob=-0.1)
+        if self.fail:
+            raise RuntimeError("decoder crashed")
+        yield TranscribeFinalEvent(text=" ".join(self.segments), stt_ms=42, duration=float(len(self.segments)))
+
+
+class TestStreamingTranscription:
+    """Test cases for NDJSON streamed transcriptions."""
+
+    @pytest.fixture(autouse=True)
+    def setup_app(self, run_app, auth_headers, tmp_path):
+        """Set up test fixtures."""
+        self.run_app = run_app
+        self.auth_headers = auth_headers
+        self.audio = write_speech_like_wav(tmp_path / "audio.wav", 2).read_bytes()
+
+    def _stream(self, provider):
+        """Stream a transcription through the API; return the parsed events and the recorded usage calls."""
+        async def scenario(client):
+            headers = await self.auth_headers(client)
+            with patch("app.api.v1.routes.get_stt_provider", return_value=provider), \
+                    patch("app.api.v1.routes._record_usage") as record_usage:
+                response = await client.post(
+                    "/api/v1/transcribe",
+                    files={"audio": ("a.wav", self.audio, "audio/wav")},
+                    data={"stream": "true"},
+                    headers=headers,
+                )
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            return [json.loads(line) for line in response.text.splitlines()], record_usage
+
+        return self.run_app(scenario)
+
+    def test_segments_then_final_event(self):
+        """Test each segment is streamed as an event, followed by one final event with the full text."""
+        events, _ = self._stream(StreamingSTTProvider(["hello", "world"]))
+
+        assert [event["event"] for event in events] == ["segment", "segment", "final"]
+        assert [event["text"] for event in events[:2]] == ["hello", "world"]
+        assert events[-1]["text"] == "hello world"
+        assert events[-1]["stt_ms"] == 42
+
+    def test_error_event_when_provider_fails_mid_stream(self):
+        """Test a failure after streaming has started ends the stream with an error event."""
+        events, _ = self._stream(StreamingSTTProvider(["hello"], fail=True))
+
+        assert [event["event"] for event in events] == ["segment", "error"]
+        assert "decoder crashed" in events[-1]["detail"]
+
+    def test_temp_file_removed(self):
+        """Test the uploaded audio's temporary file is removed once the stream ends, whether or not it failed."""
+        for provider in (StreamingSTTProvider(["hello"]), StreamingSTTProvider(["hello"], fail=True)):
+            self._stream(provider)
+
+            assert len(provider.audio_files) == 1
+            assert not provider.audio_files[0].exists()
+
+    def test_usage_recorded_only_on_final_event(self):
+        """Test usage is recorded once for a completed stream and not at all for a failed one."""
+        _, completed_usage = self._stream(StreamingSTTProvider(["hello", "world"]))
+        _, failed_usage = self._stream(StreamingSTTProvider(["hello"], fail=True))
+
+        completed_usage.assert_called_once()
+        assert completed_usage.call_args.kwargs["stt_ms"] == 42
+        failed_usage.assert_not_called()
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from app.core.deadline import DeadlineExceeded, deadline_scope
+from app.core.metrics import MetricsRegistry
+from app.services.stt.faster_whisper import FasterWhisperSTT
+from app.services.stt.scheduler import BULK, INTERACTIVE, SttScheduler
+
+
+async def _hold_then_run(scheduler, jobs, order):
+    """Hold the only slot while ``jobs`` queue up, then record the order their steps run in."""
+    blocker = scheduler.job(1)
+
+    async def step(name, job):
+        async with scheduler.slot(job):
+            order.append(name)
+
+    async with scheduler.slot(blocker):
+        tasks = [asyncio.create_task(step(name, job)) for name, job in jobs]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+
+class TestSttScheduler:
+    """Test cases for the duration-aware STT scheduler."""
+
+    def test_classifies_by_duration(self):
+        """Test jobs are interactive up to the threshold and bulk beyond it."""
+        scheduler = SttScheduler(interactive_max_seconds=30)
+
+        assert scheduler.job(5).job_class == INTERACTIVE
+        assert scheduler.job(30).job_class == INTERACTIVE
+        assert scheduler.job(7200).job_class == BULK
+
+    def test_interactive_first_then_shortest(self):
+        """Test waiting interactive steps run before bulk ones, shortest first within a class."""
+        scheduler = SttScheduler(interactive_max_seconds=30)
+        order = []
+        jobs = [
+            ("bulk-long", scheduler.job(7200)),
+            ("note-long", scheduler.job(20)),
+            ("bulk-short", scheduler.job(600)),
+            ("note-short", scheduler.job(3)),
+        ]
+
+        asyncio.run(_hold_then_run(scheduler, jobs, order))
+
+        assert order == ["note-short", "note-long", "bulk-short", "bulk-long"]
+
+    def test_bulk_ages_ahead_of_interactive(self, fake_clock):
+        """Test a bulk step that has waited too long runs ahead of interactive ones."""
+        clock = fake_clock
+        scheduler = SttScheduler(interactive_max_seconds=30, bulk_max_wait_seconds=10, clock=clock)
+        order = []
+
+        async def run():
+            blocker = scheduler.job(1)
+
+            async def step(name, job):
+                async with scheduler.slot(job):
+                    order.append(name)
+
+            async with scheduler.slot(blocker):
+                bulk = asyncio.create_task(step("bulk", scheduler.job(7200)))
+                await asyncio.sleep(0)
+                clock.now += 11
+                note = asyncio.create_task(step("note", scheduler.job(3)))
+                await asyncio.sleep(0)
+            await asyncio.gather(bulk, note)
+
+        asyncio.run(run())
+
+        assert order == ["bulk", "note"]
+
+    def test_long_job_preempted_at_segment_boundary(self):
+        """Test a voice note arriving during a long transcription runs before it finishes."""
+        metrics = MetricsRegistry()
+        scheduler = SttScheduler(interactive_max_seconds=30, metrics=metrics)
+        events = []
+
+        async def long_transcription():
+            job = scheduler.job(600)
+            for segment in range(20):
+                async with scheduler.slot(job):
+                    await asyncio.sleep(0.005)
+                job.progress((segment + 1) * 30)
+            events.append("bulk done")
+
+        async def voice_note():
+            await asyncio.sleep(0.02)
+            job = scheduler.job(5)
+            async with scheduler.slot(job):
+                events.append("note done")
+
+        async def run():
+            await asyncio.gather(long_transcription(), voice_note())
+
+        asyncio.run(run())
+
+        assert events == ["note done", "bulk done"]
+        assert metrics.snapshot()["stt_preemptions_total"] >= 1
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        """Test a step cancelled while waiting neither runs nor holds the slot."""
+        scheduler = SttScheduler()
+        order = []
+
+        async def run():
+            async def step(name):
+                async with scheduler.slot(scheduler.job(5)):
+                    order.append(name)
+
+            async with scheduler.slot(scheduler.job(1)):
+                cancelled = asyncio.create_task(step("cancelled"))
+                waiting = asyncio.create_task(step("waiting"))
+                await asyncio.sleep(0)
+                cancelled.cancel()
+                await asyncio.sleep(0)
+            await waiting
+
+        asyncio.run(run())
+
+        assert order == ["waiting"]
+
+    def test_cancelled_step_holds_slot_until_thread_finishes(self):
+        """Test a step cancelled while its thread runs keeps the slot until the thread is done."""
+        scheduler = SttScheduler()
+        thread_may_finish = threading.Event()
+        order = []
+
+        def blocking_step():
+            thread_may_finish.wait(5)
+            order.append("cancelled step's thread")
+
+        async def run():
+            running = asyncio.create_task(scheduler.run(scheduler.job(5), blocking_step))
+            await asyncio.sleep(0.05)
+            running.cancel()
+            next_step = asyncio.create_task(scheduler.run(scheduler.job(1), order.append, "next step"))
+            await asyncio.sleep(0.05)
+            thread_may_finish.set()
+            await next_step
+
+        asyncio.run(run())
+
+        assert order == ["cancelled step's thread", "next step"]
+
+
+class TestFasterWhisperSteps:
+    """Test cases for how the local STT provider loads its model and runs scheduled steps."""
+
+    def test_concurrent_first_uses_load_the_model_once(self):
+        """Test worker threads asking for the model at once share a single load."""
+        loads = []
+
+        def load_slowly(**kwargs):
+            loads.append(kwargs)
+            time.sleep(0.1)
+            return object()
+
+        stt = FasterWhisperSTT()
+        with patch("app.services.stt.faster_whisper.WhisperModel", side_effect=load_slowly), \
+                ThreadPoolExecutor(max_workers=4) as executor:
+            models = list(executor.map(lambda _: stt.model, range(4)))
+
+        assert len(loads) == 1
+        assert all(model is models[0] for model in models)
+
+    def test_queued_step_gives_up_at_deadline(self):
+        """Test a step waiting for a model slot raises DeadlineExceeded once the request deadline passes."""
+        scheduler = SttScheduler()
+        stt = FasterWhisperSTT()
+        ran = []
+
+        async def run():
+            async with scheduler.slot(scheduler.job(1)):
+                with deadline_scope(0.1):
+                    await asyncio.wait_for(stt._step(scheduler.job(1), ran.append, "step"), timeout=5)
+
+        with patch("app.services.stt.faster_whisper.stt_scheduler", scheduler):
+            with pytest.raises(DeadlineExceeded):
+                asyncio.run(run())
+        assert ran == []
@@ -0,0 +1,120 @@
+import time
+from unittest.mock import patch
+
+from app.core.invalidation import DatabaseInvalidationChannel
+from app.core.token_cache import TokenVerificationCache
+from app.models.api.schemas import TokenData
+
+
+class TestTokenVerificationCache:
+    """Test cases for TokenVerificationCache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.cache = TokenVerificationCache(max_entries=2, ttl_seconds=300)
+        self.token_data = TokenData(email="test@example.com")
+
+    def test_hit_after_put(self):
+        """Test a cached token is served until it expires."""
+        self.cache.put("token-a", self.token_data, time.time() + 60)
+
+        assert self.cache.get("token-a") == self.token_data
+        assert self.cache.stats()["hits"] == 1
+
+    def test_miss_for_unknown_token(self):
+        """Test an unknown token is a miss."""
+        assert self.cache.get("token-a") is None
+        assert self.cache.stats()["misses"] == 1
+
+    def test_evicted_at_token_expiry(self):
+        """Test entries are evicted at the token's exp claim."""
+        now = time.time()
+        self.cache.put("token-a", self.token_data, now + 10)
+
+        with patch("app.core.token_cache.time.time", return_value=now + 10):
+            assert self.cache.get("token-a") is None
+        assert self.cache.stats()["size"] == 0
+
+    def test_ttl_caps_long_lived_tokens(self):
+        """Test entries never outlive the configured TTL."""
+        now = time.time()
+        self.cache.put("token-a", self.token_data, now + 3600)
+
+        with patch("app.core.token_cache.time.time", return_value=now + 301):
+            assert self.cache.get("token-a") is None
+
+    def test_token_without_exp_not_cached(self):
+        """Test tokens without an exp claim are never cached."""
+        self.cache.put("token-a", self.token_data, None)
+        assert self.cache.get("token-a") is None
+
+    def test_bounded_by_max_entries(self):
+        """Test the least recently used entry is evicted at capacity."""
+        exp = time.time() + 60
+        self.cache.put("token-a", self.token_data, exp)
+        self.cache.put("token-b", self.token_data, exp)
+        self.cache.get("token-a")
+        self.cache.put("token-c", self.token_data, exp)
+
+        assert self.cache.get("token-b") is None
+        assert self.cache.get("token-a") is not None
+        assert self.cache.get("token-c") is not None
+
+    def test_invalidate_subject(self):
+        """Test revoking a subject drops all of its tokens."""
+        exp = time.time() + 60
+        self.cache.put("token-a", self.token_data, exp)
+        self.cache.put("token-b", TokenData(email="other@example.com"), exp)
+
+        self.cache.invalidate_subject("test@example.com")
+
+        assert self.cache.get("token-a") is None
+        assert self.cache.get("token-b") is not None
+
+    def test_revoked_subject_rejects_earlier_tokens(self):
+        """Test a revoked subject's tokens issued before the revocation are rejected until they expire."""
+        cache = TokenVerificationCache(max_entries=2, ttl_seconds=300, token_lifetime_seconds=60)
+        now = time.time()
+
+        with patch("app.core.token_cache.time.time", return_value=now):
+            cache.invalidate_subject("test@example.com")
+
+        assert cache.is_revoked("test@example.com", now - 1)
+        assert cache.is_revoked("test@example.com", None)
+        assert not cache.is_revoked("test@example.com", now + 1)
+        assert not cache.is_revoked("other@example.com", now - 1)
+
+        with patch("app.core.token_cache.time.time", return_value=now + 61):
+            cache.invalidate_subject("other@example.com")
+        assert not cache.is_revoked("test@example.com", now - 1)
+
+    def test_revocation_reaches_other_workers(self, run_with_database):
+        """Test a revocation published through the database is honoured by other workers, including ones started later."""
+        channels = [DatabaseInvalidationChannel("token_revocations", poll_interval=1, replay_seconds=60) for _ in range(3)]
+        revoking, running, started_later = (
+            TokenVerificationCache(max_entries=2, ttl_seconds=300, token_lifetime_seconds=60, channel=channel)
+            for channel in channels
+        )
+        issued_at = time.time()
+        running.put("token-a", self.token_data, issued_at + 60)
+
+        async def run():
+            await channels[1].poll()
+            revoking.invalidate_subject("test@example.com")
+            # Writes the queued revocation
+            await channels[0].stop()
+            await channels[1].poll()
+            await channels[2].poll()
+
+        run_with_database(run)
+
+        assert running.get("token-a") is None
+        assert running.is_revoked("test@example.com", issued_at)
+        assert started_later.is_revoked("test@example.com", issued_at)
+        assert not running.is_revoked("test@example.com", time.time() + 1)
+
+    def test_disabled_cache(self):
+        """Test a cache with no capacity never stores tokens."""
+        cache = TokenVerificationCache(max_entries=0, ttl_seconds=300)
+        cache.put("token-a", self.token_data, time.time() + 60)
+        assert cache.get("token-a") is None
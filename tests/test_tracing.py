@@ -0,0 +1,116 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.core.tracing import FileSpanExporter, InMemorySpanExporter, parse_traceparent, tracer
+from app.models.api.schemas import Profile
+from app.services.llm.openai_provider import OpenAIProvider
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class FakeCompletions:
+    """Chat completions stub recording the outbound headers."""
+
+    def __init__(self):
+        self.extra_headers = None
+
+    async def create(self, extra_headers=None, **kwargs):
+        self.extra_headers = extra_headers
+        message = SimpleNamespace(content="rewritten")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=12))
+
+
+class TestTracer:
+    """Test cases for the tracer."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.exporter = InMemorySpanExporter()
+
+    def test_parse_traceparent(self):
+        """Test valid traceparent headers parse and invalid ones are ignored."""
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, "01")
+        assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+        assert parse_traceparent("garbage") is None
+
+    def test_nested_spans_share_trace(self):
+        """Test spans opened inside another span become its children and record errors."""
+        with patch.object(tracer, "exporter", self.exporter):
+            with tracer.span("outer") as outer:
+                with pytest.raises(RuntimeError):
+                    with tracer.span("inner"):
+                        raise RuntimeError("boom")
+
+        inner, finished_outer = self.exporter.get_finished_spans()
+        assert finished_outer is outer
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_span_id == outer.span_id
+        assert inner.status == "error"
+        assert inner.attributes["error.type"] == "RuntimeError"
+
+    def test_disabled_tracer_is_a_no_op(self):
+        """Test spans are not created while no exporter is configured."""
+        with patch.object(tracer, "exporter", None):
+            with tracer.span("ignored") as span:
+                assert span is None
+
+    def test_file_exporter_writes_from_background_thread(self, tmp_path):
+        """Test spans reach the file as JSON lines once the writer thread is shut down."""
+        exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"), max_queue=10)
+
+        with patch.object(tracer, "exporter", exporter):
+            with tracer.span("outer"):
+                with tracer.span("inner"):
+                    pass
+        exporter.shutdown()
+
+        lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+        assert [json.loads(line)["name"] for line in lines] == ["inner", "outer"]
+
+    def test_request_continues_incoming_trace(self, run_app, auth_headers):
+        """Test the request span continues an incoming trace and parents auth and repository spans."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            self.exporter.clear()
+            await client.get(
+                "/api/v1/usage",
+                headers={
+                    **headers,
+                    "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01",
+                },
+            )
+
+        with patch.object(tracer, "exporter", self.exporter):
+            run_app(scenario)
+
+        spans = {span.name: span for span in self.exporter.get_finished_spans()}
+        request = spans["GET /api/v1/usage"]
+        auth = spans["auth.get_current_user"]
+        lookup = spans["user_repository.get_user_by_email"]
+        assert request.trace_id == TRACE_ID
+        assert request.parent_span_id == PARENT_ID
+        assert request.attributes["http.status_code"] == 200
+        assert auth.parent_span_id == request.span_id
+        assert lookup.parent_span_id == auth.span_id
+        assert {span.trace_id for span in spans.values()} == {TRACE_ID}
+
+    def test_openai_call_carries_trace_context(self):
+        """Test the rewrite's outbound OpenAI request carries a traceparent for its span."""
+        provider = OpenAIProvider()
+        completions = FakeCompletions()
+        provider._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        profile = Profile(id="p", name="Plain", tone="neutral", constraints=[])
+
+        with patch.object(tracer, "exporter", self.exporter):
+            asyncio.run(provider.rewrite("hello", profile))
+
+        call, rewrite = self.exporter.get_finished_spans()
+        assert call.name == "llm.chat_completion"
+        assert call.parent_span_id == rewrite.span_id
+        assert call.attributes["llm.total_tokens"] == 12
+        assert completions.extra_headers == {"traceparent": f"00-{call.trace_id}-{call.span_id}-01"}
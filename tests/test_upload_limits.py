@@ -0,0 +1,137 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.core.auth import verify_token
+from app.core.upload_limits import UploadLimit, UploadLimits, upload_limits
+from app.services.stt.audio import MAX_BYTES_PER_SECOND, AudioInfo, AudioTooLongError, estimated_duration_seconds
+from app.services.stt.faster_whisper import FasterWhisperSTT
+from benchmarks.synthetic_audio import write_speech_like_wav
+
+TIERS = {"free": UploadLimit(max_bytes=200_000, max_audio_seconds=4), "pro": UploadLimit(1_000_000, 30)}
+
+
+class FakeSTTProvider:
+    """STT provider stub counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def transcribe(self, audio_file, language=None, audio_seconds=None, max_audio_seconds=None):
+        self.calls += 1
+        return "hello", 0
+
+
+def speech_wav(seconds: float) -> bytes:
+    """Build a speech-like WAV file of the given length."""
+    with tempfile.TemporaryDirectory() as directory:
+        return write_speech_like_wav(Path(directory) / "audio.wav", seconds).read_bytes()
+
+
+class TestUploadLimits:
+    """Test cases for per-tier upload limits."""
+
+    @pytest.fixture(autouse=True)
+    def setup_app(self, run_app, auth_headers):
+        """Set up test fixtures."""
+        self.run_app = run_app
+        self.auth_headers = auth_headers
+
+    def test_tier_lookup(self):
+        """Test each tier gets its own limits and unknown tiers get the default's."""
+        limits = UploadLimits(TIERS)
+
+        assert limits.for_tier("pro").max_audio_seconds == 30
+        assert limits.for_tier(None) == limits.for_tier("enterprise") == TIERS["free"]
+
+    def _transcribe(self, stt, **request):
+        async def scenario(client):
+            auth = await self.auth_headers(client)
+            assert verify_token(auth["Authorization"].split()[1], Exception()).tier == "free"
+            headers = {**request.pop("headers", {}), **auth}
+            with patch("app.api.v1.routes.get_stt_provider", return_value=stt):
+                return await client.post("/api/v1/transcribe", headers=headers, **request)
+
+        with patch.object(upload_limits, "tiers", TIERS):
+            return self.run_app(scenario)
+
+    def test_accepts_audio_within_limits(self):
+        """Test audio within the tier's limits is transcribed."""
+        stt = FakeSTTProvider()
+
+        response = self._transcribe(stt, files={"audio": ("a.wav", speech_wav(2), "audio/wav")})
+
+        assert response.status_code == 200
+        assert response.json()["text"] == "hello"
+
+    def test_rejects_content_length_before_reading(self):
+        """Test a declared length over the byte limit is rejected without reading the body."""
+        stt = FakeSTTProvider()
+
+        async def body():
+            raise AssertionError("body should not be read")
+            yield b""
+
+        response = self._transcribe(stt, content=body(), headers={"Content-Length": "5000000"})
+
+        assert response.status_code == 413
+        assert stt.calls == 0
+
+    def test_rejects_unbounded_body_once_too_large(self):
+        """Test a body sent without a length is cut off once it passes the byte limit."""
+        stt = FakeSTTProvider()
+        chunks_sent = []
+
+        async def body():
+            yield b'--b\r\nContent-Disposition: form-data; name="audio"; filename="a.wav"\r\n\r\n'
+            for _ in range(100):
+                chunks_sent.append(1)
+                yield b"x" * 65536
+
+        response = self._transcribe(stt, content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+
+        assert response.status_code == 413
+        assert len(chunks_sent) < 100
+        assert stt.calls == 0
+
+    def test_rejects_overlong_audio_from_header(self):
+        """Test audio longer than the tier's limit is rejected before transcription."""
+        stt = FakeSTTProvider()
+
+        response = self._transcribe(stt, files={"audio": ("a.wav", speech_wav(6), "audio/wav")})
+
+        assert response.status_code == 413
+        assert "second" in response.json()["detail"]
+        assert stt.calls == 0
+
+    def test_rejects_non_audio(self):
+        """Test files without decodable audio are rejected."""
+        stt = FakeSTTProvider()
+
+        response = self._transcribe(stt, files={"audio": ("a.wav", b"not audio" * 100, "audio/wav")})
+
+        assert response.status_code == 415
+        assert stt.calls == 0
+
+    def test_header_duration_not_below_size_bound(self):
+        """Test a header claiming less audio than the file size allows is not believed."""
+        info = AudioInfo(duration_seconds=1.0, codec="pcm_s16le", sample_rate=16000, channels=1)
+
+        assert estimated_duration_seconds(info, 10 * MAX_BYTES_PER_SECOND) == 10
+        assert estimated_duration_seconds(info, 1000) == 1.0
+
+    def test_decoded_length_checked_against_limit(self, tmp_path):
+        """Test audio decoding longer than the limit is rejected before inference, whatever the header said."""
+        model = Mock(feature_extractor=SimpleNamespace(sampling_rate=16000))
+        stt = FasterWhisperSTT()
+        stt._model = model
+        audio_file = write_speech_like_wav(tmp_path / "audio.wav", 6)
+
+        with pytest.raises(AudioTooLongError):
+            asyncio.run(stt.transcribe(audio_file, audio_seconds=1, max_audio_seconds=4))
+
+        model.transcribe.assert_not_called()
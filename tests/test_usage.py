@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.api.schemas import UsageEvent
+from app.models.db import UsageEventModel
+from app.repositories.usage_repository import utc_date
+from app.services.usage.usage_service import UsageRecorder, usage_recorder
+
+REWRITE_BODY = {
+    "transcript": "hello world",
+    "profile": {"id": "p", "name": "Plain", "tone": "neutral", "constraints": []},
+}
+
+
+def _event(user_id: str) -> UsageEvent:
+    return UsageEvent(user_id=user_id, endpoint="rewrite", llm_ms=10, estimated_tokens=20, occurred_at=datetime.now(timezone.utc))
+
+
+class TestUsageRecorder:
+    """Test cases for UsageRecorder."""
+
+    def test_flush_writes_multi_row_batches(self, run_app, credentials, count_round_trips):
+        """Test buffered events are written as one INSERT per batch."""
+        recorder = UsageRecorder(flush_interval_seconds=0, batch_size=2, max_buffered=100)
+
+        async def scenario(client):
+            user_id = (await client.post("/api/v1/auth/register", json=credentials)).json()["id"]
+            with count_round_trips() as counter:
+                for _ in range(5):
+                    recorder.record(_event(user_id))
+                    await asyncio.sleep(0)
+                await recorder.stop()
+            return counter
+
+        counter = run_app(scenario)
+        assert counter.statements == ["INSERT"] * 3
+        assert counter.commits == 3
+
+    def test_failed_flush_keeps_events(self):
+        """Test a failed batch is kept for the next flush and overflow drops the oldest events."""
+        recorder = UsageRecorder(flush_interval_seconds=0, batch_size=10, max_buffered=3)
+
+        async def scenario():
+            for _ in range(4):
+                recorder.record(_event("00000000-0000-0000-0000-000000000000"))
+            with patch(
+                "app.services.usage.usage_service.SQLAlchemyUsageRepository.insert_events",
+                side_effect=RuntimeError("database down"),
+            ):
+                await recorder.stop()
+
+        asyncio.run(scenario())
+        assert len(recorder._buffer) == 3
+        assert recorder._dropped.value == 1
+        assert recorder._flush_failures.value == 1
+
+
+class TestUsageEndpoints:
+    """Test cases for the usage endpoints."""
+
+    def test_rewrite_usage_is_reported(self, run_app, auth_headers, fake_llm_provider):
+        """Test rewrites show up in the usage summary and daily usage after a flush."""
+        async def scenario(client):
+            headers = await auth_headers(client)
+            with patch("app.api.v1.routes.get_llm_provider", return_value=fake_llm_provider):
+                for _ in range(2):
+                    await client.post("/api/v1/rewrite", json=REWRITE_BODY, headers=headers)
+            await usage_recorder.flush()
+            summary = await client.get("/api/v1/usage", headers=headers)
+            daily = await client.get("/api/v1/usage/daily", headers=headers)
+            return summary.json(), daily.json()
+
+        summary, daily = run_app(scenario)
+        assert summary["total"]["requests"] == 2
+        assert summary["endpoints"][0]["endpoint"] == "rewrite"
+        assert summary["endpoints"][0]["estimated_tokens"] > 0
+        assert [day["requests"] for day in daily["days"]] == [2]
+
+    def test_days_grouped_in_utc(self):
+        """Test daily usage converts timestamps to UTC before taking the date on PostgreSQL."""
+        query = select(utc_date(UsageEventModel.occurred_at))
+
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        assert "date(usage_events.occurred_at AT TIME ZONE 'UTC')" in sql
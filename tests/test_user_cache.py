@@ -0,0 +1,70 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.auth import create_access_token
+from app.core.dependencies import get_current_user
+from app.core.invalidation import LocalInvalidationChannel
+from app.core.user_cache import UserCache
+from app.models.api.schemas import User, UserCreate
+from app.services.auth.user_service import UserService
+
+
+class TestUserCache:
+    """Test cases for UserCache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.user = User(id="1", email="test@example.com", created_at="2023-01-01T00:00:00")
+
+    def test_hit_until_ttl(self):
+        """Test a cached user is served until its TTL elapses."""
+        cache = UserCache(max_entries=10, ttl_seconds=30)
+        cache.put(self.user)
+
+        assert cache.get("test@example.com") == self.user
+        with patch("app.core.user_cache.time.monotonic", return_value=time.monotonic() + 31):
+            assert cache.get("test@example.com") is None
+
+    def test_invalidate(self):
+        """Test an invalidated user is re-read."""
+        cache = UserCache(max_entries=10, ttl_seconds=30)
+        cache.put(self.user)
+        cache.invalidate("test@example.com")
+
+        assert cache.get("test@example.com") is None
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test invalidations are delivered to every cache on the channel."""
+        channel = LocalInvalidationChannel()
+        worker_a = UserCache(max_entries=10, ttl_seconds=30, channel=channel)
+        worker_b = UserCache(max_entries=10, ttl_seconds=30, channel=channel)
+        worker_a.put(self.user)
+        worker_b.put(self.user)
+
+        worker_a.invalidate("test@example.com")
+
+        assert worker_a.get("test@example.com") is None
+        assert worker_b.get("test@example.com") is None
+
+
+class TestGetCurrentUserCaching:
+    """Test cases for the cached get_current_user path."""
+
+    def test_steady_state_skips_repository(self, user_repository):
+        """Test repeated requests with the same token only query the repository once."""
+        user_service = UserService(user_repository)
+        asyncio.run(user_service.create_user(UserCreate(email="test@example.com", password="password123")))
+        credentials = HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials=create_access_token({"sub": "test@example.com"})
+        )
+
+        with patch("app.core.dependencies.user_cache", UserCache(max_entries=10, ttl_seconds=30)), \
+                patch.object(user_repository, "get_user_by_email", wraps=user_repository.get_user_by_email) as lookup:
+            for _ in range(5):
+                user = asyncio.run(get_current_user(credentials, user_service))
+                assert user.email == "test@example.com"
+
+        assert lookup.call_count == 1